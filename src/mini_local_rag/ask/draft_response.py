@@ -100,13 +100,16 @@ class DraftResponseStep(Step):
         added_combinations = set()
 
         for doc in documents:
-            file_path = doc.metadata['file_path']
-            section = doc.metadata['headers']
-            entry = f"| {file_path} | {section} |"
-            # ensure unique sections are displayed, we might have multiple chunks in one section so display once
-            if entry not in added_combinations:
-                added_combinations.add(entry)
-                markdown.append(entry)
+            # the duplicates of a chunk that were not stored are cited as well
+            sources = [doc.metadata] + doc.metadata.get('duplicates',[])
+            for source in sources:
+                file_path = source['file_path']
+                section = source['headers']
+                entry = f"| {file_path} | {section} |"
+                # ensure unique sections are displayed, we might have multiple chunks in one section so display once
+                if entry not in added_combinations:
+                    added_combinations.add(entry)
+                    markdown.append(entry)
 
         markdown.append("----")
         markdown.append("")
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+from typing import Any, Dict, Optional
+from langchain_core.documents import Document
+
+from mini_local_rag.chunk_store import ChunkStore
+from mini_local_rag.config import Config
+from mini_local_rag.embedder import Embedder
+from mini_local_rag.embedding_cache import record_cache_stats
+from mini_local_rag.minhash_index import MinHashIndex
+from mini_local_rag.pipeline import Step
+from mini_local_rag.sparse_index import SparseIndex
+from mini_local_rag.vector_store import VectorStore
+
+
+class HybridRetrievalStep(Step):
+    """
+    A pipeline step that retrieves documents with the dense and the sparse retrievers at the same time
+    and merges their rankings with reciprocal rank fusion (RRF).
+
+    The BM25 sparse index doesn't need the question embedding, so it is searched in a background thread
+    while the question is embedded and the vector store is queried. The retrieval latency is then the
+    slowest of the two retrievers instead of their sum.
+
+    Both retrievers return chunk ids and scores only. Every chunk gets the fused score `sum(weight / (rrf_k + rank))`
+    over the rankings it appears in, with ranks starting at 1, and only the texts of the `top_k` best chunks are read
+    from the chunk store. The duplicates of the kept chunks that were
+    not stored are listed in their metadata, so every file containing the text can be cited.
+
+    Attributes:
+        label (str): The label identifying this step ("Document Retrieval").
+        embedder (Embedder): The embedder used to embed the question.
+        vector_store (VectorStore): The vector store used for dense retrieval.
+        chunk_store (ChunkStore): The store the texts of the fused chunks are read from.
+        index (SparseIndex): The sparse index, kept in memory across questions and reloaded only when it changes on disk.
+        top_k (int): The number of documents kept after fusion, retrieved from `config.retrieval_top_k`.
+        candidates (int): The number of documents taken from each retriever, retrieved from `config.retrieval_candidates`.
+        rrf_k (int): The rank offset of the fusion, retrieved from `config.rrf_k`.
+        dense_weight (float): The weight of the dense ranking, retrieved from `config.dense_weight`.
+        sparse_weight (float): The weight of the sparse ranking, retrieved from `config.sparse_weight`.
+        duplicates (Optional[MinHashIndex]): The index holding the duplicate chunks that were not stored.
+    """
+    label = "Document Retrieval"
+    def __init__(self,embedder:Embedder,vector_store:VectorStore,chunk_store:ChunkStore,config:Config,duplicates:Optional[MinHashIndex]=None):
+        """
+        Initializes the step with the retrievers and the fusion settings.
+
+        Args:
+            embedder (Embedder): The embedder used to embed the question.
+            vector_store (VectorStore): The vector store used for dense retrieval.
+            chunk_store (ChunkStore): The store the texts of the fused chunks are read from.
+            config (Config): The configuration containing the sparse index and the fusion settings.
+            duplicates (Optional[MinHashIndex]): The index holding the duplicate chunks that were not stored, if any.
+        """
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.chunk_store = chunk_store
+        self.index = SparseIndex(config=config)
+        self.top_k = config.retrieval_top_k
+        self.candidates = max(config.retrieval_candidates, config.retrieval_top_k)
+        self.rrf_k = config.rrf_k
+        self.dense_weight = config.dense_weight
+        self.sparse_weight = config.sparse_weight
+        self.duplicates = duplicates
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Retrieves documents for the question with both retrievers concurrently and fuses their rankings.
+
+        Args:
+            context (Dict[str, Any]): The context containing the question.
+
+        Updates:
+            context["embedding"]: The embedding of the question.
+            context["documents"]: The fused documents, best first, with the fused `score` in their metadata
+                                  and `dense_score`/`sparse_score` for the retrievers that found them. Documents with duplicates
+                                  list their file path and headers under `duplicates`.
+            context["log_record"].embedding_cache: The cache hits and misses, when the embedder is cached.
+            context["log_record"].retrieval_latency: The time spent by each retriever, in seconds.
+        """
+        question = str(context["question"])
+        record = context.get("log_record")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            sparse_future = executor.submit(self._timed, self.index.search, question, self.candidates)
+
+            start = time.time()
+            with record_cache_stats(self.embedder,record):
+                context["embedding"] = self.embedder.embed(question)
+            dense_results = self.vector_store.search(context["embedding"],top_k=self.candidates)
+            dense_latency = time.time() - start
+
+            sparse_results, sparse_latency = sparse_future.result()
+
+        context["documents"] = self._fuse(dense_results,sparse_results)
+        if self.duplicates is not None:
+            duplicates = self.duplicates.duplicates_of([doc.metadata["id"] for doc in context["documents"]])
+            for doc in context["documents"]:
+                if doc.metadata["id"] in duplicates:
+                    doc.metadata["duplicates"] = duplicates[doc.metadata["id"]]
+        if record is not None:
+            record.retrieval_latency = {"dense": round(dense_latency, 3), "sparse": round(sparse_latency, 3)}
+
+    def _fuse(self,dense_results:list[tuple[str,float]],sparse_results:list[tuple[str,float]]) -> list[Document]:
+        """
+        Merges the dense and the sparse results with reciprocal rank fusion and reads the best chunks from the chunk store.
+
+        Args:
+            dense_results (list[tuple[str, float]]): The chunk ids and cosine similarities of the vector store, most similar first.
+            sparse_results (list[tuple[str, float]]): The chunk ids and BM25 scores of the sparse index, best first.
+
+        Returns:
+            list[Document]: Up to `top_k` documents, highest fused score first.
+        """
+        fused: dict[str, float] = {}
+        for rank, (id, _) in enumerate(dense_results, start=1):
+            fused[id] = fused.get(id, 0.0) + self.dense_weight / (self.rrf_k + rank)
+        for rank, (id, _) in enumerate(sparse_results, start=1):
+            fused[id] = fused.get(id, 0.0) + self.sparse_weight / (self.rrf_k + rank)
+
+        best = sorted(fused, key=lambda id: fused[id], reverse=True)[:self.top_k]
+
+        dense_scores = dict(dense_results)
+        sparse_scores = dict(sparse_results)
+        # the sparse index can reference chunks the stores no longer hold, they are skipped
+        results: list[Document] = self.chunk_store.get(best)
+        for doc in results:
+            id = doc.metadata["id"]
+            if id in dense_scores:
+                doc.metadata["dense_score"] = dense_scores[id]
+            if id in sparse_scores:
+                doc.metadata["sparse_score"] = sparse_scores[id]
+            doc.metadata["score"] = fused[id]
+        return results
+
+    @staticmethod
+    def _timed(function, *args) -> tuple[Any, float]:
+        start = time.time()
+        return function(*args), time.time() - start
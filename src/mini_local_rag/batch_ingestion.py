@@ -0,0 +1,167 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+from typing import Any, Dict, Optional
+
+from docling_core.types.doc.document import DoclingDocument
+from rich import print as rprint
+
+from mini_local_rag.config import Config
+from mini_local_rag.document_manifest import DocumentManifest, FileFingerprint
+from mini_local_rag.ingest.load_checkpoint import LoadCheckpointStep
+from mini_local_rag.ingest.pdf_parse import PdfParseStep
+from mini_local_rag.logger.structured_logger import StructuredLogger
+from mini_local_rag.parse_checkpoints import ParseCheckpoints
+from mini_local_rag.pipeline import Pipeline, Step
+
+
+# the parser of a worker process, created once by `_init_parser`
+_parser: Optional[PdfParseStep] = None
+
+
+def _init_parser(config: Config, num_threads: int) -> None:
+    global _parser
+    # the batch already parses a file per process, the pages of a file are not split further
+    _parser = PdfParseStep(config=config, num_threads=num_threads, page_workers=1)
+
+
+def _parse(file_path: str, profile: str) -> DoclingDocument:
+    context: Dict[str, Any] = {"file_path": file_path, "parse_profile": profile}
+    _parser.execute(context)
+    return context["pdf"]
+
+
+class CollectParsedPdfStep(Step):
+    """
+    A pipeline step that takes the document parsed by a worker process of a batch ingestion.
+
+    Attributes:
+        label (str): The label identifying this step ("Parsing Pdf file").
+    """
+    label = "Parsing Pdf file"
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Waits for the parsing of the file and adds the parsed document to the context.
+
+        Args:
+            context (Dict[str, Any]): The context holding the future of the parsing under `"parse_future"`.
+
+        Updates:
+            context["pdf"]: The parsed PDF document. Parsing errors of the worker are raised here.
+        """
+        future: Future = context.pop("parse_future")
+        context["pdf"] = future.result()
+
+
+class BatchIngestion:
+    """
+    Ingests many PDF files, parsing them in a pool of worker processes.
+
+    Docling parsing is CPU-bound, so every worker process holds its own `DocumentConverter` and parses one
+    file at a time. The parsed documents go through a shared stage in the main process (captioning, chunking,
+    embedding, persistence and the sparse index update), one pipeline per file, in the order the parsing completes.
+    Unchanged files are skipped before parsing, and files with a parse checkpoint are not parsed again but resume
+    from their markdown. A file is recorded in the manifest as soon as its pipeline succeeded, so the files ingested
+    before a failure, or before a worker process died, are not ingested again.
+
+    At most `2 * workers` files are parsed or waiting for the shared stage at any time, which bounds
+    the memory held by parsed documents.
+
+    Attributes:
+        file_paths (list[str]): The files to ingest.
+        workers (int): The number of parsing processes.
+        profile (str): The parsing profile of the files.
+        config (Config): The configuration of the pipelines.
+        manifest (DocumentManifest): The manifest of the ingested files.
+        checkpoints (ParseCheckpoints): The store of the parsed markdown.
+        document_steps (list[Step]): The steps run for every parsed document.
+        index_steps (list[Step]): The steps updating the indexes, run for every file after its chunks are persisted.
+        logger (StructuredLogger): The logger of the pipelines.
+    """
+
+    def __init__(self, file_paths: list[str], workers: int, config: Config, manifest: DocumentManifest, checkpoints: ParseCheckpoints,
+                 document_steps: list[Step], index_steps: list[Step], logger: StructuredLogger, profile: Optional[str] = None):
+        self.file_paths = file_paths
+        self.workers = max(1, workers)
+        self.profile = PdfParseStep._check_profile(profile or config.parse_profile)
+        self.config = config
+        self.manifest = manifest
+        self.checkpoints = checkpoints
+        self.document_steps = document_steps
+        self.index_steps = index_steps
+        self.logger = logger
+
+    def execute(self) -> None:
+        """
+        Ingests the files and prints how many were ingested, skipped as unchanged, or failed.
+        """
+        pending: list[tuple[str, FileFingerprint]] = []
+        restored: list[tuple[str, FileFingerprint]] = []
+        for file_path in self.file_paths:
+            unchanged, fingerprint = self.manifest.check(file_path, profile=self.profile)
+            if unchanged:
+                continue
+            # the absolute path keys the chunks of the file, like in the manifest
+            if self.checkpoints.load(self.checkpoints.key(sha256=fingerprint.sha256, profile=self.profile)) is not None:
+                restored.append((fingerprint.path, fingerprint))
+            else:
+                pending.append((fingerprint.path, fingerprint))
+        skipped = len(self.file_paths) - len(pending) - len(restored)
+
+        ingested = failed = 0
+
+        def ingest(file_path: str, fingerprint: FileFingerprint, future: Optional[Future]) -> None:
+            nonlocal ingested, failed
+            pipeline = self._document_pipeline(file_path, fingerprint, future)
+            pipeline.execute()
+            if pipeline.context["log_record"].errors:
+                failed += 1
+                return
+            # only once the chunks are persisted and indexed, a file left out of the manifest is ingested again
+            self.manifest.record(fingerprint, chunks=pipeline.context.get("chunk_count"), profile=self.profile)
+            ingested += 1
+
+        # the files with a checkpoint resume from their markdown, without a parsing process
+        for file_path, fingerprint in restored:
+            ingest(file_path, fingerprint, None)
+
+        if pending:
+            # split the CPU threads of the machine between the workers
+            num_threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # spawn fresh workers instead of forking a process that may already hold threads and models
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_parser, initargs=(self.config, num_threads)) as executor:
+                queue = iter(pending)
+                running: dict[Future, tuple[str, FileFingerprint]] = {}
+
+                def submit() -> None:
+                    nonlocal failed
+                    for file_path, fingerprint in queue:
+                        try:
+                            running[executor.submit(_parse, file_path, self.profile)] = (file_path, fingerprint)
+                        except BrokenProcessPool:
+                            # a worker process died, the files not submitted yet can't be parsed; the running ones fail on their result
+                            failed += 1 + sum(1 for _ in queue)
+                            return
+                        if len(running) >= 2 * self.workers:
+                            return
+
+                submit()
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path, fingerprint = running.pop(future)
+                        ingest(file_path, fingerprint, future)
+                    submit()
+
+        rprint(f"Ingested {ingested} files, skipped {skipped} unchanged files, {failed} failed")
+
+    def _document_pipeline(self, file_path: str, fingerprint: FileFingerprint, future: Optional[Future]) -> Pipeline:
+        steps = [LoadCheckpointStep(checkpoints=self.checkpoints, config=self.config), CollectParsedPdfStep(), *self.document_steps, *self.index_steps]
+        pipeline = Pipeline(label=f"Ingesting file: {file_path}", context={"file_path": file_path, "parse_profile": self.profile}, steps=steps, config=self.config, logger=self.logger)
+        # added after the log record copied the inputs, the fingerprint and the future are not part of the log
+        pipeline.context["fingerprint"] = fingerprint
+        if future is not None:
+            pipeline.context["parse_future"] = future
+        return pipeline
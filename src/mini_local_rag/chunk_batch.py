@@ -0,0 +1,74 @@
+from typing import Optional
+
+from langchain_core.documents import Document
+import numpy as np
+
+
+class ChunkBatch:
+    """
+    A compact, columnar batch of chunks travelling from the embedder to the vector store.
+
+    The ids, texts, headers and file paths are parallel lists, and the embeddings are one contiguous float32
+    matrix with a row per chunk. An embedding held as a Python list of floats costs about 32 bytes per value,
+    a float32 row costs 4, and the matrix is handed to the vector stores without being copied into lists.
+
+    Attributes:
+        ids (list[str]): The chunk ids.
+        texts (list[str]): The chunk texts.
+        headers (list[str]): The headers of every chunk.
+        file_paths (list[str]): The path of the file of every chunk.
+        embeddings (Optional[np.ndarray]): The float32 embeddings, one row per chunk, or None before embedding.
+    """
+    __slots__ = ("ids", "texts", "headers", "file_paths", "embeddings")
+
+    def __init__(self, ids: list[str], texts: list[str], headers: list[str], file_paths: list[str], embeddings: Optional[np.ndarray] = None):
+        """
+        Initializes the batch from parallel columns.
+
+        Raises:
+            ValueError: If the columns or the embedding rows don't have the same length.
+        """
+        if not len(ids) == len(texts) == len(headers) == len(file_paths):
+            raise ValueError("ids, texts, headers and file_paths must have the same length")
+        self.ids = ids
+        self.texts = texts
+        self.headers = headers
+        self.file_paths = file_paths
+        self.embeddings = None
+        if embeddings is not None:
+            self.set_embeddings(embeddings)
+
+    @classmethod
+    def from_documents(cls, documents: list[Document], embeddings: Optional[np.ndarray] = None) -> "ChunkBatch":
+        """
+        Builds a batch from chunks carrying `id`, `headers` and `file_path` in their metadata.
+
+        Args:
+            documents (list[Document]): The chunks.
+            embeddings (Optional[np.ndarray]): The embeddings of the chunks, one row per chunk, if already computed.
+
+        Returns:
+            ChunkBatch: The batch.
+        """
+        return cls(
+            ids=[doc.metadata["id"] for doc in documents],
+            texts=[doc.page_content for doc in documents],
+            headers=[doc.metadata["headers"] for doc in documents],
+            file_paths=[doc.metadata["file_path"] for doc in documents],
+            embeddings=embeddings,
+        )
+
+    def set_embeddings(self, embeddings: np.ndarray) -> None:
+        """
+        Sets the embeddings of the batch, converted to a contiguous float32 matrix if needed.
+
+        Raises:
+            ValueError: If the number of rows differs from the number of chunks.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(self.ids):
+            raise ValueError(f"Expected one embedding row per chunk ({len(self.ids)}), got shape {embeddings.shape}")
+        self.embeddings = embeddings
+
+    def __len__(self) -> int:
+        return len(self.ids)
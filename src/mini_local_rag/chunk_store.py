@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+
+from langchain_core.documents import Document
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.config import Config
+from mini_local_rag.vector_store import VectorStore
+
+
+class ChunkStore:
+    """
+    The single store of the chunk texts and metadata, addressed by chunk id, in a SQLite file under `config.data_folder`.
+
+    The vector store keeps only the ids and embeddings of the chunks and the sparse index only their ids and term
+    counts, so the text of every chunk is stored once. Both retrievers return chunk ids with their scores, and the
+    texts are read from this store for the final results only.
+
+    Attributes:
+        __store_file (str): The name of the store file inside the data folder.
+        __batch_size (int): The number of ids per statement, below SQLite's limit of host parameters.
+        path (str): The path of the SQLite database file.
+        imported (bool): Whether the chunks of the vector store written before the chunk store existed were imported.
+    """
+
+    __store_file: str = "chunk_store.db"
+    __batch_size: int = 500
+
+    def __init__(self, config: Config):
+        """
+        Opens (or creates) the store database.
+
+        Args:
+            config (Config): The configuration containing the data folder.
+        """
+        cwd = os.getcwd()
+        self.path = os.path.join(cwd, config.data_folder, self.__store_file)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, content TEXT NOT NULL, headers TEXT, file_path TEXT)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS chunks_file_path ON chunks(file_path)")
+        self._connection.commit()
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        self.imported = version >= 1
+
+    def set_imported(self) -> None:
+        """
+        Records that the chunks of the vector store written before the chunk store existed were imported.
+        """
+        with self._lock:
+            self._connection.execute("PRAGMA user_version = 1")
+            self._connection.commit()
+        self.imported = True
+
+    def save(self, chunks: ChunkBatch) -> None:
+        """
+        Saves the texts, headers and file paths of a batch of chunks, replacing chunks with the same id.
+
+        Args:
+            chunks (ChunkBatch): The chunks to be saved.
+        """
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO chunks (id, content, headers, file_path) VALUES (?, ?, ?, ?)",
+                zip(chunks.ids, chunks.texts, chunks.headers, chunks.file_paths)
+            )
+            self._connection.commit()
+
+    def get(self, ids: list[str]) -> list[Document]:
+        """
+        Reads chunks by id.
+
+        Args:
+            ids (list[str]): The chunk ids to read.
+
+        Returns:
+            list[Document]: The chunks found, in the order of `ids`, with `id`, `headers` and `file_path` in their metadata.
+                            Unknown ids are skipped.
+        """
+        found: dict[str, Document] = {}
+        with self._lock:
+            for start in range(0, len(ids), self.__batch_size):
+                batch = ids[start:start + self.__batch_size]
+                placeholders = ",".join("?" * len(batch))
+                for id, content, headers, file_path in self._connection.execute(
+                    f"SELECT id, content, headers, file_path FROM chunks WHERE id IN ({placeholders})", batch
+                ):
+                    found[id] = Document(content, metadata={"id": id, "headers": headers, "file_path": file_path})
+        return [found[id] for id in ids if id in found]
+
+    def delete(self, ids: list[str]) -> None:
+        """
+        Deletes chunks by id. Unknown ids are ignored.
+
+        Args:
+            ids (list[str]): The chunk ids to delete.
+        """
+        with self._lock:
+            for start in range(0, len(ids), self.__batch_size):
+                batch = ids[start:start + self.__batch_size]
+                self._connection.execute(f"DELETE FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch)
+            self._connection.commit()
+
+
+def open_chunk_store(config: Config, vector_store: VectorStore) -> ChunkStore:
+    """
+    Opens the chunk store.
+
+    On the first open, the chunks a vector store wrote with their text before the chunk store existed
+    are imported, so previously ingested files stay retrievable. An interrupted import is restarted.
+
+    Args:
+        config (Config): The configuration containing the data folder.
+        vector_store (VectorStore): The vector store that may hold the texts of previously ingested chunks.
+
+    Returns:
+        ChunkStore: The chunk store.
+    """
+    store = ChunkStore(config=config)
+    if not store.imported:
+        for documents in vector_store.iterLegacyChunks():
+            store.save(ChunkBatch.from_documents(documents))
+        store.set_imported()
+    return store
@@ -1,9 +1,12 @@
 import argparse
+import glob
+import os
 import shlex
 import sys
 from typing import Optional
 
 from mini_local_rag.config import Config
+from mini_local_rag.ingest.pdf_parse import PARSE_PROFILES
 from mini_local_rag.pipeline_builder import PipelineBuilder
 from rich import print as rprint
 
@@ -18,14 +21,34 @@ class AppContext:
 
 
     def documents_cmd(self,args: argparse.Namespace) -> None:
-        """Handle the 'documents' command: list all documents."""
+        """Handle the 'documents' command: list a page of the ingested documents, optionally filtered by path."""
 
-        self.get_builder().get_documents().execute()
+        self.get_builder().get_documents(page=args.page,page_size=args.page_size,search=args.search).execute()
 
     def ingest_cmd(self,args: argparse.Namespace) -> None:
-        """Handle the 'ingest' command: ingest a document from the given file path."""
+        """Handle the 'ingest' command: ingest a document from the given file path, or every pdf of a directory or glob pattern."""
 
-        self.get_builder().get_ingestion_pipeline(file_path=args.file_path).execute()
+        if args.dir is None and args.glob is None:
+            if args.file_path is None:
+                rprint("Provide a file path, --dir or --glob")
+                return
+            self.get_builder().get_ingestion_pipeline(file_path=args.file_path,profile=args.profile).execute()
+            return
+
+        if args.dir is not None:
+            # the extension is matched ignoring case, so REPORT.PDF is ingested too
+            file_paths = [os.path.join(root,name) for root,_,names in os.walk(args.dir) for name in names if name.lower().endswith(".pdf")]
+        else:
+            file_paths = glob.glob(args.glob,recursive=True)
+        if not file_paths:
+            rprint("No pdf files found")
+            return
+        self.get_builder().get_batch_ingestion(file_paths=sorted(file_paths),workers=args.workers,profile=args.profile).execute()
+
+    def compression_report_cmd(self,args: argparse.Namespace) -> None:
+        """Handle the 'compression-report' command: compare the recall and size of truncated and quantized embeddings."""
+
+        self.get_builder().get_compression_report(sample=args.sample).execute()
 
     def ask_cmd(self,args: argparse.Namespace) -> None:
         """Handle the 'ask' command: process the given question."""
@@ -83,12 +106,19 @@ class AppContext:
         
         # documents command
         documents = subparsers.add_parser("documents", help="List all documents by path")
+        documents.add_argument("--search", help="Only list the documents whose path contains this text")
+        documents.add_argument("--page", type=int, default=1, help="Page of the list to display, starting at 1")
+        documents.add_argument("--page-size", type=int, help="Number of documents per page (default: config.documents_page_size)")
         documents.add_argument("--show-logs", action="store_true", help="Display debug logs")
         documents.set_defaults(func=self.documents_cmd)
         
         # ingest command
         ingest = subparsers.add_parser("ingest", help="Ingest a document")
-        ingest.add_argument("file_path", help="Path to the pdf file to ingest")
+        ingest.add_argument("file_path", nargs="?", help="Path to the pdf file to ingest")
+        ingest.add_argument("--dir", help="Ingest every pdf file of a directory, recursively")
+        ingest.add_argument("--glob", help="Ingest every file matching a glob pattern, e.g. 'reports/**/*.pdf'")
+        ingest.add_argument("--workers", type=int, help="Number of processes parsing pdf files in a batch ingestion")
+        ingest.add_argument("--profile", choices=PARSE_PROFILES, help="Pdf parsing profile, 'auto' only runs OCR on pages without a text layer (default: config.parse_profile)")
         ingest.add_argument("--show-logs", action="store_true", help="Display debug logs")
         ingest.set_defaults(func=self.ingest_cmd)
 
@@ -98,6 +128,12 @@ class AppContext:
         ask.add_argument("--show-logs", action="store_true", help="Display debug logs")
         ask.set_defaults(func=self.ask_cmd)
 
+        # compression-report command
+        report = subparsers.add_parser("compression-report", help="Compare recall and size of truncated and quantized embeddings")
+        report.add_argument("--sample", type=int, help="Number of stored chunks embedded for the report (default: config.compression_report_sample)")
+        report.add_argument("--show-logs", action="store_true", help="Display debug logs")
+        report.set_defaults(func=self.compression_report_cmd)
+
         parser.add_argument("--interactive","-i", action="store_true", help="Interactive mode, Can be used only on start up")
         self.parser = parser
 
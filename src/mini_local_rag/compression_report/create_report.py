@@ -0,0 +1,56 @@
+from typing import Any, Dict
+
+from rich.markdown import Markdown
+
+from mini_local_rag.config import Config
+from mini_local_rag.embedding_compression import PRECISIONS, recall_report
+from mini_local_rag.pipeline import Step
+
+
+class CreateCompressionReportStep(Step):
+    """
+    A pipeline step that measures the recall of truncated and quantized embeddings against the full ones
+    and displays it next to the size of a stored embedding.
+
+    Attributes:
+        label (str): The label identifying this step ("Measuring recall of compressed embeddings").
+        dimensions (list[int]): The dimensions compared, retrieved from `config.compression_report_dimensions`.
+        top_k (int): The number of neighbours compared per chunk, retrieved from `config.compression_report_top_k`.
+    """
+    label = "Measuring recall of compressed embeddings"
+    def __init__(self, config: Config):
+        """
+        Initializes the step with the dimensions and the number of neighbours compared.
+
+        Args:
+            config (Config): The configuration containing the compression report settings.
+        """
+        self.dimensions = config.compression_report_dimensions
+        self.top_k = config.compression_report_top_k
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Builds the recall-versus-size table of the sampled embeddings, for every dimension and precision.
+
+        Args:
+            context (Dict[str, Any]): The context containing the full embeddings of the sampled chunks.
+
+        Updates:
+            context["report"]: The dimensions, precision, bytes per vector, compression and recall of every combination.
+            context["output"] (Markdown): The report as a Markdown table.
+        """
+        embeddings = context["embeddings"]
+        dimensions = [embeddings.shape[1], *self.dimensions]
+        report = recall_report(embeddings, dimensions=dimensions, precisions=list(PRECISIONS), top_k=self.top_k)
+        context["report"] = report
+
+        markdown: list[str] = []
+        markdown.append("")
+        markdown.append(f"# Recall@{self.top_k} of compressed embeddings ({embeddings.shape[0]} chunks)")
+        markdown.append("| Dimensions | Precision | Bytes per vector | Compression | Recall |")
+        markdown.append("|-----------|---------|---------|---------|---------|")
+        for entry in report:
+            markdown.append(f"| {entry['dimensions']} | {entry['precision']} | {entry['bytes']} | {entry['compression']:.1f}x | {entry['recall']:.3f} |")
+        markdown.append("----")
+        markdown.append("")
+        context["output"] = Markdown("\n".join(markdown))
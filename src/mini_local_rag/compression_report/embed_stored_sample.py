@@ -0,0 +1,64 @@
+from typing import Any, Dict
+
+import numpy as np
+
+from mini_local_rag.chunk_store import ChunkStore
+from mini_local_rag.config import Config
+from mini_local_rag.embedder import Embedder, embed_concurrently
+from mini_local_rag.pipeline import Step
+from mini_local_rag.vector_store import VectorStore
+
+
+class EmbedStoredSampleStep(Step):
+    """
+    A pipeline step that embeds a random sample of the stored chunks at the full width of the embedding model.
+
+    The stored embeddings may already be truncated or quantized, so the sampled chunks are embedded again
+    with an embedder that doesn't truncate, giving the reference the compressed embeddings are compared to.
+
+    Attributes:
+        label (str): The label identifying this step ("Embedding a sample of the stored chunks").
+        vector_store (VectorStore): The vector store the chunks are sampled from.
+        chunk_store (ChunkStore): The store the texts of the sampled chunks are read from.
+        embedder (Embedder): The embedder producing the full embeddings.
+        batch_size (int): The number of chunks embedded per request, retrieved from `config.embedding_batch_size`.
+        concurrency (int): The number of requests sent at the same time, retrieved from `config.embedding_concurrency`.
+    """
+    label = "Embedding a sample of the stored chunks"
+    __seed: int = 0
+    def __init__(self, vector_store: VectorStore, chunk_store: ChunkStore, embedder: Embedder, config: Config):
+        """
+        Initializes the step with the stores and the full width embedder.
+
+        Args:
+            vector_store (VectorStore): The vector store the chunks are sampled from.
+            chunk_store (ChunkStore): The store the texts of the sampled chunks are read from.
+            embedder (Embedder): The embedder producing the full embeddings.
+            config (Config): The configuration containing the embedding batch size and concurrency.
+        """
+        self.vector_store = vector_store
+        self.chunk_store = chunk_store
+        self.embedder = embedder
+        self.batch_size = config.embedding_batch_size
+        self.concurrency = config.embedding_concurrency
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Samples up to `context["sample"]` stored chunks and embeds them.
+
+        Args:
+            context (Dict[str, Any]): The context containing the sample size.
+
+        Updates:
+            context["embeddings"]: The float32 full embeddings of the sampled chunks, one row per chunk.
+            context["log_record"].sample: The number of chunks sampled out of the stored chunks.
+        """
+        ids = sorted(id for file_path in self.vector_store.listDocuments() for id in self.vector_store.listIds(file_path))
+        rng = np.random.default_rng(self.__seed)
+        sample = [ids[idx] for idx in sorted(rng.choice(len(ids), size=min(len(ids), context["sample"]), replace=False))]
+        texts = [doc.page_content for doc in self.chunk_store.get(sample)]
+
+        context["embeddings"] = embed_concurrently(self.embedder, texts, batch_size=self.batch_size, max_workers=self.concurrency)
+        record = context.get("log_record")
+        if record is not None:
+            record.sample = {"chunks": len(texts), "stored": len(ids)}
@@ -15,11 +15,92 @@ class Config:
             ("##", "Header 2"),
         ]
 
+    # pdf parsing profile: "fast" (no OCR, fast table model), "balanced" (OCR, accurate table model),
+    # "full" (balanced with formula enrichment) or "auto" (fast on pages with a text layer, balanced on scanned pages)
+    parse_profile="full"
+    # number of documents listed per page by the documents command
+    documents_page_size=50
+    # maximum number of parsed documents kept as markdown checkpoints, least recently used are evicted
+    parse_checkpoint_max_entries=1000
+    # number of processes parsing pdf files during a directory or glob ingestion
+    parse_workers=2
+    # pdfs longer than parse_page_window pages are split into page ranges of that size,
+    # converted in parallel by parse_page_workers processes (1 disables the splitting)
+    parse_page_window=50
+    parse_page_workers=2
+    # number of images sent to the vision model at the same time, should not exceed OLLAMA_NUM_PARALLEL
+    caption_concurrency=2
+    # seconds allowed for captioning all images of a document, images not captioned in time are dropped
+    caption_timeout=600
+    # images with a side shorter than this (pixels) are treated as decorative and not captioned
+    caption_min_image_edge=64
+    # images are downscaled to this longest side (pixels) and re-encoded as JPEG before captioning
+    caption_max_image_edge=1024
+    caption_jpeg_quality=85
+    # maximum number of captions kept in the persistent caption cache, least recently used are evicted
+    caption_cache_max_entries=20000
+
+    # near-duplicate chunks (MinHash estimated Jaccard similarity of word shingles >= dedup_threshold) are not embedded
+    # nor stored, but kept as references to the surviving chunk. dedup_bands must divide dedup_num_perm
+    deduplicate_chunks=True
+    dedup_threshold=0.9
+    dedup_num_perm=128
+    dedup_bands=16
+    dedup_shingle_size=5
+    # streaming ingestion: chunks are embedded, saved and indexed streaming_batch_size at a time instead of all at once,
+    # bounding the memory used by large documents
+    streaming_ingestion=False
+    streaming_batch_size=256
     ## chunk size is 2056 but leave it 2000 just in case
     chunk_size=2000
     chunk_overlap=100
+    # number of chunks sent to the embedding model in a single request
+    embedding_batch_size=32
+    # number of embedding batches sent to ollama at the same time, should not exceed OLLAMA_NUM_PARALLEL
+    embedding_concurrency=2
+    # maximum number of embeddings kept in the persistent embedding cache, least recently used are evicted
+    embedding_cache_max_entries=50000
+    # embeddings of documents and questions are truncated to embedding_dimensions and re-normalised (None keeps all 2560),
+    # qwen3-embedding is trained so that the leading dimensions stay meaningful
+    embedding_dimensions=None
+    # element type of the embeddings stored by the flat and ivf_pq backends: "float32", "float16" or "int8" (one scale per row).
+    # chroma only stores float32. Changing the dimensions or the precision requires re-creating the vector store
+    embedding_precision="float32"
+    # compression-report: number of stored chunks embedded at full width, dimensions compared and neighbours per chunk
+    compression_report_sample=2000
+    compression_report_dimensions=[2560, 1024, 512, 256, 128]
+    compression_report_top_k=10
+    # legacy pickled tf-idf retriever, imported into the sparse index on the first ingest
     retriever_path=".data/tf-idf-retriever"
+    sparse_index_path=".data/sparse_index"
+    # number of hashed term features of the sparse index, can't change once the index exists
+    sparse_index_features=2**20
+    # BM25 term frequency saturation and document length normalization of the sparse index
+    bm25_k1=1.5
+    bm25_b=0.75
+    # hybrid retrieval: documents kept after fusion and candidates taken from each retriever
+    retrieval_top_k=3
+    retrieval_candidates=20
+    # reciprocal rank fusion: weight / (rrf_k + rank) is summed over the dense and sparse rankings
+    rrf_k=60
+    dense_weight=1.0
+    sparse_weight=1.0
     chromadb_path=".data/chroma_db"
+    # "chroma", "flat" (exact NumPy index, fast for tens of thousands of chunks)
+    # or "ivf_pq" (compressed approximate index for millions of chunks)
+    vector_store_backend="chroma"
+    flat_index_path=".data/flat_index"
+    # ivf_pq: number of coarse lists, lists visited per query and one-byte codes per embedding
+    # pq_subquantizers must divide the embedding dimension (2560 for qwen3-embedding:4b)
+    ivf_nlist=1024
+    ivf_nprobe=16
+    pq_subquantizers=256
+    # ivf_pq: the quantizers are trained on a sample once the index holds ivf_train_min_rows embeddings,
+    # before that queries are exact
+    ivf_train_sample=20000
+    ivf_train_min_rows=10000
+    # ivf_pq: approximate results re-ranked with the full precision embeddings
+    ivf_rerank_candidates=100
     data_folder =".data"
     enable_local_models = False
     def __init__(self,**kwargs):
@@ -0,0 +1,227 @@
+from dataclasses import dataclass
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from mini_local_rag.config import Config
+from mini_local_rag.vector_store import VectorStore
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """
+    The identity of a file's content at one point in time.
+
+    Attributes:
+        path (str): The absolute path of the file.
+        size (int): The size of the file in bytes.
+        mtime_ns (int): The modification time of the file in nanoseconds.
+        sha256 (str): The SHA-256 hash of the file content.
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """
+    An ingested file as listed by the document catalog.
+
+    Attributes:
+        path (str): The absolute path of the file.
+        size (int): The size of the file in bytes.
+        sha256 (str): The SHA-256 hash of the file content.
+        ingested_at (int): The time of the last ingestion in nanoseconds since the epoch.
+        chunks (Optional[int]): The number of chunks of the file, None for files recorded without it.
+        profile (Optional[str]): The parsing profile of the file, None for files recorded without it.
+    """
+    path: str
+    size: int
+    sha256: str
+    ingested_at: int
+    chunks: Optional[int]
+    profile: Optional[str]
+
+
+class DocumentManifest:
+    """
+    A persistent record of the ingested files, stored in a SQLite file under `config.data_folder`.
+
+    Every successfully ingested file is recorded with its size, modification time and SHA-256 hash.
+    A file is unchanged when its size and modification time match the recorded ones, or, if only the
+    modification time differs (for example after a copy or a checkout), when its content hash matches.
+    The file is only hashed when the cheap checks are not enough.
+
+    The manifest is also the document catalog: every file is recorded with its number of chunks and its
+    parsing profile, so the ingested documents are listed page by page from this small table instead of
+    reading the metadata of every chunk from the vector store.
+
+    Attributes:
+        __manifest_file (str): The name of the manifest file inside the data folder.
+        __hash_block_size (int): The number of bytes read at a time while hashing a file.
+        path (str): The path of the SQLite database file.
+        imported (bool): Whether the documents of the vector store ingested before the catalog existed were imported.
+    """
+
+    __manifest_file: str = "manifest.db"
+    __hash_block_size: int = 1024 * 1024
+
+    def __init__(self, config: Config):
+        """
+        Opens (or creates) the manifest database.
+
+        Args:
+            config (Config): The configuration containing the data folder.
+        """
+        cwd = os.getcwd()
+        self.path = os.path.join(cwd, config.data_folder, self.__manifest_file)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL, ingested_at INTEGER NOT NULL)"
+        )
+        # catalog columns, added to manifests created before the catalog
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(files)")}
+        for column, definition in (("chunks", "INTEGER"), ("profile", "TEXT")):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE files ADD COLUMN {column} {definition}")
+        self._connection.commit()
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        self.imported = version >= 1
+
+    def import_documents(self, documents: dict[str, int]) -> None:
+        """
+        Adds documents ingested before the catalog existed, keeping the files already recorded.
+
+        The files are recorded with an empty hash, so they are parsed again on their next ingestion like before the manifest.
+
+        Args:
+            documents (dict[str, int]): The number of chunks by file path.
+        """
+        now = time.time_ns()
+        rows = []
+        for file_path, chunks in documents.items():
+            path = os.path.abspath(file_path)
+            size = os.stat(path).st_size if os.path.isfile(path) else 0
+            rows.append((path, size, 0, "", now, chunks))
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO files (path, size, mtime_ns, sha256, ingested_at, chunks) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._connection.execute("PRAGMA user_version = 1")
+            self._connection.commit()
+        self.imported = True
+
+    def check(self, file_path: str, profile: Optional[str] = None) -> tuple[bool, FileFingerprint]:
+        """
+        Checks whether the file was ingested before with the same content and parsing profile.
+
+        Args:
+            file_path (str): The path of the file, absolute or relative to the working directory.
+            profile (Optional[str]): The parsing profile requested for the file. A file recorded with another profile
+                                     is parsed again. Files recorded without a profile match any profile.
+
+        Returns:
+            tuple[bool, FileFingerprint]: Whether the file is unchanged since it was recorded, and its current fingerprint
+                                          to record once it is ingested.
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._connection.execute("SELECT size, mtime_ns, sha256, profile FROM files WHERE path = ?", (path,)).fetchone()
+        same_profile = row is None or profile is None or row[3] is None or row[3] == profile
+
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return same_profile, FileFingerprint(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=row[2])
+
+        fingerprint = FileFingerprint(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=self._hash(path))
+        unchanged = row is not None and row[0] == fingerprint.size and row[2] == fingerprint.sha256
+        if unchanged:
+            # remember the new modification time so the next check doesn't hash the file again
+            with self._lock:
+                self._connection.execute("UPDATE files SET mtime_ns = ? WHERE path = ?", (fingerprint.mtime_ns, path))
+                self._connection.commit()
+        return unchanged and same_profile, fingerprint
+
+    def record(self, fingerprint: FileFingerprint, chunks: Optional[int] = None, profile: Optional[str] = None) -> None:
+        """
+        Records a file as ingested with the given fingerprint, replacing its previous entry.
+
+        Args:
+            fingerprint (FileFingerprint): The fingerprint of the ingested file.
+            chunks (Optional[int]): The number of chunks of the file.
+            profile (Optional[str]): The parsing profile the file was parsed with.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, ingested_at, chunks, profile) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint.path, fingerprint.size, fingerprint.mtime_ns, fingerprint.sha256, time.time_ns(), chunks, profile)
+            )
+            self._connection.commit()
+
+    def catalog(self, offset: int = 0, limit: int = 50, search: Optional[str] = None) -> tuple[list[CatalogEntry], int]:
+        """
+        Lists a page of the ingested files, ordered by path.
+
+        Args:
+            offset (int): The number of matching files skipped. Defaults to 0.
+            limit (int): The maximum number of files returned. Defaults to 50.
+            search (Optional[str]): Only the files whose path contains this text, ignoring case, are listed.
+
+        Returns:
+            tuple[list[CatalogEntry], int]: The files of the page and the total number of matching files.
+        """
+        condition, parameters = "", []
+        if search:
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            condition, parameters = "WHERE path LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+        with self._lock:
+            (total,) = self._connection.execute(f"SELECT COUNT(*) FROM files {condition}", parameters).fetchone()
+            rows = self._connection.execute(
+                f"SELECT path, size, sha256, ingested_at, chunks, profile FROM files {condition} ORDER BY path LIMIT ? OFFSET ?",
+                [*parameters, limit, offset]
+            ).fetchall()
+        return [CatalogEntry(*row) for row in rows], total
+
+    def get(self, file_path: str) -> Optional[FileFingerprint]:
+        """
+        Returns the recorded fingerprint of a file, or None if the file was never ingested.
+        """
+        path = os.path.abspath(file_path)
+        with self._lock:
+            row = self._connection.execute("SELECT path, size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)).fetchone()
+        return FileFingerprint(*row) if row is not None else None
+
+    def _hash(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            while block := file.read(self.__hash_block_size):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+def open_document_manifest(config: Config, vector_store: VectorStore) -> DocumentManifest:
+    """
+    Opens the document manifest.
+
+    On the first open, the documents the vector store holds from before the catalog existed are added to
+    the catalog, so previously ingested files are still listed.
+
+    Args:
+        config (Config): The configuration containing the data folder.
+        vector_store (VectorStore): The vector store that may hold previously ingested documents.
+
+    Returns:
+        DocumentManifest: The document manifest.
+    """
+    manifest = DocumentManifest(config=config)
+    if not manifest.imported:
+        manifest.import_documents({file_path: len(vector_store.listIds(file_path)) for file_path in vector_store.listDocuments()})
+    return manifest
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import ollama
 
 
@@ -8,10 +10,25 @@ class Embedder(ABC):
 
     This class should be subclassed to implement embedding generation for various models or methods. 
     The `embed` method must be implemented by any subclass to convert input text into a list of floating point numbers representing its embedding.
+    The `embed_many` method must be implemented to embed a list of texts, ideally sending them to the model in batches.
+    The `embed_array` method returns the same embeddings as one float32 matrix, the form used by the ingestion.
+
+    Attributes:
+        model_name (str): The identifier of the model that produces the embeddings.
 
     Methods:
         embed: An abstract method that takes a text string and returns its embedding as a list of floats.
+        embed_many: An abstract method that takes a list of text strings and returns one embedding per text, in input order.
+        embed_array: Returns the embeddings of a list of text strings as a float32 matrix, built from `embed_many` unless overridden.
     """
+
+    @property
+    @abstractmethod
+    def model_name(self) -> str:
+        """
+        The identifier of the model that produces the embeddings, used to tell apart embeddings of different models.
+        """
+        pass
     
     @abstractmethod
     def embed(self, text: str) -> list[float]:
@@ -26,6 +43,35 @@ class Embedder(ABC):
         """
         pass
 
+    @abstractmethod
+    def embed_many(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        """
+        Abstract method to generate embeddings for a list of texts.
+
+        Args:
+            texts (list[str]): The input strings for which the embeddings will be generated.
+            batch_size (int): The maximum number of texts sent to the model in a single request. Defaults to 32.
+
+        Returns:
+            list[list[float]]: One embedding per input text, in the same order as `texts`.
+        """
+        pass
+
+    def embed_array(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generates embeddings for a list of texts as one float32 matrix.
+
+        Args:
+            texts (list[str]): The input strings for which the embeddings will be generated.
+            batch_size (int): The maximum number of texts sent to the model in a single request. Defaults to 32.
+
+        Returns:
+            np.ndarray: One row per input text, in the same order as `texts`.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.asarray(self.embed_many(texts, batch_size=batch_size), dtype=np.float32)
+
 class Qwen3Embedder(Embedder):
     """
     A concrete implementation of the `Embedder` interface for generating embeddings using the Qwen3 model.
@@ -38,10 +84,16 @@ class Qwen3Embedder(Embedder):
 
     Methods:
         embed: Implements the abstract `embed` method to generate embeddings using the Qwen3 model.
+        embed_many: Implements the abstract `embed_many` method, sending the texts to the Qwen3 model in batches.
+        embed_array: Sends the texts to the Qwen3 model in batches and writes every response straight into a float32 matrix.
     """
 
     __model = 'qwen3-embedding:4b' 
 
+    @property
+    def model_name(self) -> str:
+        return Qwen3Embedder.__model
+
     def embed(self, text: str) -> list[float]:
         """
         Generates an embedding for the provided text using the Qwen3 model.
@@ -64,4 +116,122 @@ class Qwen3Embedder(Embedder):
             input=text
         )
 
-        return res['embeddings'][0]
\ No newline at end of file
+        return res['embeddings'][0]
+
+    def embed_many(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        """
+        Generates embeddings for a list of texts using the Qwen3 model.
+
+        `ollama.embed` accepts a list as input, so the texts are sent in slices of `batch_size`,
+        which costs one HTTP round-trip per batch instead of one per text.
+
+        Args:
+            texts (list[str]): The input text strings to be embedded.
+            batch_size (int): The maximum number of texts sent in a single request. Defaults to 32.
+
+        Returns:
+            list[list[float]]: One embedding per input text, in the same order as `texts`.
+
+        Raises:
+            ValueError: If `batch_size` is smaller than 1.
+
+        Example:
+            embedder = Qwen3Embedder()
+            embeddings = embedder.embed_many(["first chunk", "second chunk"], batch_size=16)
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        embeddings: list[list[float]] = []
+        for start in range(0, len(texts), batch_size):
+            res = ollama.embed(
+                model=Qwen3Embedder.__model,
+                input=texts[start:start + batch_size]
+            )
+            embeddings.extend(res['embeddings'])
+
+        return embeddings
+
+    def embed_array(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generates embeddings for a list of texts using the Qwen3 model, as one float32 matrix.
+
+        Only the response of one batch is held as Python floats at a time, it is copied into the
+        matrix before the next batch is requested.
+
+        Args:
+            texts (list[str]): The input text strings to be embedded.
+            batch_size (int): The maximum number of texts sent in a single request. Defaults to 32.
+
+        Returns:
+            np.ndarray: One row per input text, in the same order as `texts`.
+
+        Raises:
+            ValueError: If `batch_size` is smaller than 1.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        matrix = None
+        for start in range(0, len(texts), batch_size):
+            res = ollama.embed(
+                model=Qwen3Embedder.__model,
+                input=texts[start:start + batch_size]
+            )
+            rows = np.asarray(res['embeddings'], dtype=np.float32)
+            if matrix is None:
+                matrix = np.empty((len(texts), rows.shape[1]), dtype=np.float32)
+            matrix[start:start + len(rows)] = rows
+
+        return matrix
+
+
+def embed_concurrently(embedder: Embedder, texts: list[str], batch_size: int = 32, max_workers: int = 1) -> np.ndarray:
+    """
+    Embeds the texts in batches sent through a bounded pool of worker threads.
+
+    Ollama can serve several requests at the same time (`OLLAMA_NUM_PARALLEL`), so keeping up to
+    `max_workers` batches in flight uses that capacity. Every batch is written into its rows of one
+    float32 matrix, in input order. If any batch fails, the batches that have not started yet are
+    cancelled and the error is raised.
+
+    Args:
+        embedder (Embedder): The embedder used for every batch.
+        texts (list[str]): The input text strings to be embedded.
+        batch_size (int): The number of texts per batch. Defaults to 32.
+        max_workers (int): The maximum number of batches embedded at the same time. Defaults to 1.
+
+    Returns:
+        np.ndarray: One float32 row per input text, in the same order as `texts`.
+
+    Raises:
+        ValueError: If `batch_size` or `max_workers` is smaller than 1.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    starts = range(0, len(texts), batch_size)
+    if max_workers == 1 or len(starts) <= 1:
+        return embedder.embed_array(texts, batch_size=batch_size)
+
+    matrix = None
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(starts)))
+    try:
+        futures = [executor.submit(embedder.embed_array, texts[start:start + batch_size], batch_size) for start in starts]
+        for start, future in zip(starts, futures):
+            rows = future.result()
+            if matrix is None:
+                matrix = np.empty((len(texts), rows.shape[1]), dtype=np.float32)
+            matrix[start:start + len(rows)] = rows
+    finally:
+        # on failure don't wait for the queued batches, only for the ones already running
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return matrix
@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from typing import Iterator, Optional
+
+import numpy as np
+
+from mini_local_rag.config import Config
+from mini_local_rag.embedder import Embedder
+from mini_local_rag.logger.log_record import LogRecord
+from mini_local_rag.sqlite_cache import SqliteLRUCache
+
+
+class CachedEmbedder(Embedder):
+    """
+    An `Embedder` decorator that keeps a persistent, content-addressed cache in front of another embedder.
+
+    Embeddings are stored as float32 blobs in a SQLite file under `config.data_folder`, keyed by the
+    model name and the hash of the normalized text. Repeated chunks and repeated questions are served
+    from the cache and only the misses are sent to the wrapped embedder.
+
+    Attributes:
+        __cache_file (str): The name of the cache file inside the data folder.
+        embedder (Embedder): The wrapped embedder used for cache misses.
+        hits (int): The number of texts served from the cache since creation.
+        misses (int): The number of texts sent to the wrapped embedder since creation.
+    """
+
+    __cache_file: str = "embedding_cache.db"
+
+    def __init__(self, embedder: Embedder, config: Config):
+        """
+        Initializes the cache and wraps the given embedder.
+
+        Args:
+            embedder (Embedder): The embedder used to generate embeddings missing from the cache.
+            config (Config): The configuration containing the data folder and the cache size limit.
+        """
+        self.embedder = embedder
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        cwd = os.getcwd()
+        path = os.path.join(cwd, config.data_folder, self.__cache_file)
+        self._cache = SqliteLRUCache(path=path, max_entries=config.embedding_cache_max_entries)
+
+    @property
+    def model_name(self) -> str:
+        return self.embedder.model_name
+
+    def embed(self, text: str) -> list[float]:
+        """
+        Returns the embedding of the text, from the cache when possible.
+
+        Args:
+            text (str): The input text string to be embedded.
+
+        Returns:
+            list[float]: The embedding of the text.
+        """
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        """
+        Returns the embeddings of the texts, embedding only the ones missing from the cache.
+
+        Args:
+            texts (list[str]): The input text strings to be embedded.
+            batch_size (int): The batch size passed to the wrapped embedder for the misses. Defaults to 32.
+
+        Returns:
+            list[list[float]]: One embedding per input text, in the same order as `texts`.
+        """
+        return self.embed_array(texts, batch_size=batch_size).tolist()
+
+    def embed_array(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Returns the embeddings of the texts as a float32 matrix, embedding only the ones missing from the cache.
+
+        Texts that appear more than once in `texts` are embedded once. New embeddings are written
+        back to the cache before returning. Cached blobs are copied into the matrix rows as they are,
+        without going through Python floats.
+
+        Args:
+            texts (list[str]): The input text strings to be embedded.
+            batch_size (int): The batch size passed to the wrapped embedder for the misses. Defaults to 32.
+
+        Returns:
+            np.ndarray: One row per input text, in the same order as `texts`.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [self._key(text) for text in texts]
+        found = self._cache.get_many(keys)
+
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        rows: dict[str, np.ndarray] = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in found.items()}
+        if missing:
+            embeddings = self.embedder.embed_array(list(missing.values()), batch_size=batch_size)
+            computed = dict(zip(missing.keys(), embeddings))
+            self._cache.put_many({key: row.tobytes() for key, row in computed.items()})
+            rows.update(computed)
+
+        with self._counter_lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        matrix = np.empty((len(texts), len(rows[keys[0]])), dtype=np.float32)
+        for i, key in enumerate(keys):
+            matrix[i] = rows[key]
+        return matrix
+
+    def _key(self, text: str) -> str:
+        """
+        Builds the cache key for a text: the hash of the model name and the normalized text.
+
+        Normalization applies Unicode NFC and collapses whitespace, so formatting-only differences share an entry.
+        """
+        normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def record_cache_stats(embedder: Embedder, record: Optional[LogRecord]) -> Iterator[None]:
+    """
+    Records the cache hits and misses of the embedding calls made inside the block into the log record.
+
+    Does nothing when the embedder is not a `CachedEmbedder` or there is no log record.
+
+    Args:
+        embedder (Embedder): The embedder used inside the block.
+        record (Optional[LogRecord]): The log record that receives an `embedding_cache` entry.
+    """
+    if not isinstance(embedder, CachedEmbedder) or record is None:
+        yield
+        return
+
+    hits, misses = embedder.hits, embedder.misses
+    try:
+        yield
+    finally:
+        record.embedding_cache = {
+            "hits": embedder.hits - hits,
+            "misses": embedder.misses - misses,
+        }
@@ -0,0 +1,188 @@
+from typing import Optional
+
+import numpy as np
+
+from mini_local_rag.embedder import Embedder
+
+
+# the element types an embedding matrix can be stored with
+PRECISIONS: dict[str, type] = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+
+def truncate_embeddings(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """
+    Keeps the first `dimensions` values of every embedding and scales the rows back to unit L2 norm.
+
+    Models trained with Matryoshka representation learning, like qwen3-embedding, concentrate the meaning in the
+    leading dimensions, so the truncated vectors can be compared with cosine similarity like the full ones.
+
+    Args:
+        vectors (np.ndarray): The embeddings, one per row.
+        dimensions (int): The number of dimensions kept.
+
+    Returns:
+        np.ndarray: The truncated, L2-normalised float32 embeddings. All-zero rows are left untouched.
+
+    Raises:
+        ValueError: If the embeddings have fewer than `dimensions` dimensions.
+    """
+    if vectors.shape[0] == 0:
+        return np.empty((0, dimensions), dtype=np.float32)
+    if vectors.shape[1] < dimensions:
+        raise ValueError(f"Cannot truncate {vectors.shape[1]}-dimensional embeddings to {dimensions} dimensions")
+
+    truncated = np.array(vectors[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return truncated / norms
+
+
+def quantize(vectors: np.ndarray, precision: str) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Converts float32 embeddings to the element type of `precision`.
+
+    float16 is a plain cast. int8 uses symmetric scalar quantization with one float32 scale per row,
+    the largest absolute value of the row mapping to 127, so the rows keep their precision whatever their range.
+
+    Args:
+        vectors (np.ndarray): The float32 embeddings, one per row.
+        precision (str): One of `PRECISIONS`.
+
+    Returns:
+        tuple[np.ndarray, Optional[np.ndarray]]: The converted rows, and the scale of every row for int8, None otherwise.
+
+    Raises:
+        ValueError: If the precision is unknown.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown embedding precision '{precision}', expected one of {list(PRECISIONS)}")
+    if precision != "int8":
+        return np.asarray(vectors, dtype=PRECISIONS[precision]), None
+
+    scales = np.abs(vectors).max(axis=1) / 127 if vectors.shape[0] else np.empty(0, dtype=np.float32)
+    scales[scales == 0] = 1
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def dequantize(vectors: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Converts stored rows back to float32, applying their int8 scales when given.
+    """
+    dequantized = np.asarray(vectors, dtype=np.float32)
+    if scales is not None:
+        dequantized = dequantized * scales[:, None]
+    return dequantized
+
+
+def bytes_per_vector(dimensions: int, precision: str) -> int:
+    """
+    Returns the number of bytes a stored embedding takes, including its int8 scale.
+    """
+    return dimensions * np.dtype(PRECISIONS[precision]).itemsize + (4 if precision == "int8" else 0)
+
+
+def recall_report(vectors: np.ndarray, dimensions: list[int], precisions: list[str], top_k: int = 10) -> list[dict[str, float]]:
+    """
+    Measures how well truncated and quantized embeddings preserve the nearest neighbours of the full embeddings.
+
+    Every embedding is used as a query against the others. The reference neighbours are the exact `top_k`
+    of the full float32 embeddings. For every combination of dimension and precision, the queries are truncated
+    like `TruncatedEmbedder` does and the stored side is truncated and quantized like the vector store does; the
+    recall is the fraction of the reference neighbours found in the compressed `top_k`.
+
+    Args:
+        vectors (np.ndarray): The full embeddings of a sample of chunks, one per row.
+        dimensions (list[int]): The dimensions to evaluate; larger than the embedding dimension are skipped.
+        precisions (list[str]): The precisions to evaluate, among `PRECISIONS`.
+        top_k (int): The number of neighbours compared. Defaults to 10.
+
+    Returns:
+        list[dict[str, float]]: One entry per combination, largest first, with `dimensions`, `precision`,
+                                `bytes` per vector, `compression` relative to the full float32 vectors and `recall`.
+
+    Raises:
+        ValueError: If there are not more embeddings than `top_k`.
+    """
+    count, full = vectors.shape
+    if count <= top_k:
+        raise ValueError(f"Need more than {top_k} embeddings to measure recall@{top_k}, got {count}")
+
+    def neighbours(queries: np.ndarray, stored: np.ndarray) -> np.ndarray:
+        scores = queries @ stored.T
+        # a chunk is not its own neighbour
+        np.fill_diagonal(scores, -np.inf)
+        return np.argpartition(-scores, top_k, axis=1)[:, :top_k]
+
+    reference = neighbours(truncate_embeddings(vectors, full), truncate_embeddings(vectors, full))
+    report: list[dict[str, float]] = []
+    for size in sorted({size for size in dimensions if size <= full}, reverse=True):
+        queries = truncate_embeddings(vectors, size)
+        for precision in precisions:
+            stored = dequantize(*quantize(queries, precision))
+            found = neighbours(queries, stored)
+            hits = sum(len(set(expected) & set(actual)) for expected, actual in zip(reference, found))
+            report.append({
+                "dimensions": size,
+                "precision": precision,
+                "bytes": bytes_per_vector(size, precision),
+                "compression": bytes_per_vector(full, "float32") / bytes_per_vector(size, precision),
+                "recall": hits / (count * top_k),
+            })
+    return report
+
+
+class TruncatedEmbedder(Embedder):
+    """
+    An `Embedder` decorator that truncates the embeddings of another embedder to `dimensions` and re-normalises them.
+
+    Documents and questions are embedded through the same decorator, so both sides of a similarity are truncated alike.
+    The model name includes the dimension, so the embedding cache keeps truncated and full embeddings apart.
+
+    Attributes:
+        embedder (Embedder): The wrapped embedder producing the full embeddings.
+        dimensions (int): The number of dimensions kept.
+    """
+
+    def __init__(self, embedder: Embedder, dimensions: int):
+        """
+        Wraps the given embedder.
+
+        Args:
+            embedder (Embedder): The embedder producing the full embeddings.
+            dimensions (int): The number of dimensions kept.
+
+        Raises:
+            ValueError: If `dimensions` is smaller than 1.
+        """
+        if dimensions < 1:
+            raise ValueError(f"dimensions must be at least 1, got {dimensions}")
+        self.embedder = embedder
+        self.dimensions = dimensions
+
+    @property
+    def model_name(self) -> str:
+        return f"{self.embedder.model_name}@{self.dimensions}"
+
+    def embed(self, text: str) -> list[float]:
+        """
+        Returns the truncated embedding of the text.
+        """
+        return self.embed_array([text])[0].tolist()
+
+    def embed_many(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        """
+        Returns the truncated embeddings of the texts, in input order.
+        """
+        return self.embed_array(texts, batch_size=batch_size).tolist()
+
+    def embed_array(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Returns the truncated embeddings of the texts as a float32 matrix, in input order.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return truncate_embeddings(self.embedder.embed_array(texts, batch_size=batch_size), self.dimensions)
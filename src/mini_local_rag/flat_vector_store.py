@@ -0,0 +1,337 @@
+import os
+import sqlite3
+import threading
+from typing import Iterator
+
+import numpy as np
+from langchain_core.documents import Document
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.config import Config
+from mini_local_rag.embedding_compression import PRECISIONS, dequantize, quantize
+from mini_local_rag.vector_store import VectorStore
+
+
+class FlatVectorStore(VectorStore):
+    """
+    An exact, brute-force vector store backed by a memory-mapped NumPy matrix.
+
+    Embeddings are L2-normalised and kept as rows of an `.npy` file, so cosine similarity is a matrix-vector
+    product, computed block by block, and the top-k rows are selected with `argpartition`. The rows are stored
+    as float32, float16 or int8 with one float32 scale per row (`config.embedding_precision`), halving or
+    quartering the file, the memory mapped and the bytes read per query. A sidecar SQLite
+    table maps every matrix row to its chunk id and file path, the texts are kept in the `ChunkStore`. Opening the store only maps the
+    file, so it loads in milliseconds regardless of corpus size.
+
+    The matrix file has room for more rows than are stored: new rows are written in place, and a full file is
+    copied once into a file twice as large, so appending batch after batch costs linear time overall. Only the
+    rows recorded in the sidecar table are read.
+
+    Deleting a chunk removes its sidecar row and records its matrix row as deleted; deleted rows stay in
+    the matrix but are never returned by a query.
+
+    Attributes:
+        __embeddings_file (str): The name of the embeddings matrix inside the index folder.
+        __scales_file (str): The name of the int8 row scales inside the index folder.
+        __metadata_file (str): The name of the sidecar SQLite table inside the index folder.
+        __scan_batch (int): The number of rows scored at a time, bounds the memory used to convert quantized rows.
+        path (str): The folder holding the index files, retrieved from `config.flat_index_path`.
+        precision (str): The element type of the stored rows, retrieved from `config.embedding_precision`.
+    """
+
+    __embeddings_file: str = "embeddings.npy"
+    __scales_file: str = "scales.npy"
+    __metadata_file: str = "chunks.db"
+    __scan_batch: int = 8192
+
+    def __init__(self,config:Config):
+        """
+        Opens (or creates) the index folder and memory-maps the existing embeddings.
+
+        Args:
+            config (Config): The configuration containing the index folder and the embedding precision.
+
+        Raises:
+            ValueError: If the embedding precision is unknown.
+        """
+        if config.embedding_precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision '{config.embedding_precision}', expected one of {list(PRECISIONS)}")
+        self.precision = config.embedding_precision
+        cwd = os.getcwd()
+        self.path = os.path.join(cwd, config.flat_index_path)
+        os.makedirs(self.path, exist_ok=True)
+        self._embeddings_path = os.path.join(self.path, self.__embeddings_file)
+        self._scales_path = os.path.join(self.path, self.__scales_file)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(self.path, self.__metadata_file), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS chunks (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, file_path TEXT)"
+        )
+        # indexes created by previous versions also hold the content and headers of the chunks
+        self._legacy = "content" in {row[1] for row in self._connection.execute("PRAGMA table_info(chunks)")}
+        self._connection.execute("CREATE INDEX IF NOT EXISTS chunks_file_path ON chunks(file_path)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS deleted (row INTEGER PRIMARY KEY)")
+        self._connection.commit()
+        self._load()
+
+    def _load(self) -> None:
+        """
+        Memory-maps the embeddings matrix, keeping only the rows recorded in the sidecar tables, and loads the int8 scales and the deleted rows.
+
+        Rows written to the matrix by a save that did not reach the sidecar table are ignored.
+        """
+        (last_row,) = self._connection.execute(
+            "SELECT MAX(last_row) FROM (SELECT MAX(row) AS last_row FROM chunks UNION ALL SELECT MAX(row) FROM deleted)"
+        ).fetchone()
+        count = 0 if last_row is None else last_row + 1
+        if count and os.path.exists(self._embeddings_path):
+            self._embeddings = np.load(self._embeddings_path, mmap_mode="r")[:count]
+        else:
+            self._embeddings = None
+        if self._embeddings is not None and self._embeddings.dtype == np.int8:
+            self._scales = np.load(self._scales_path, mmap_mode="r")[:count]
+        else:
+            self._scales = None
+        self._load_deleted()
+
+    def _load_deleted(self) -> None:
+        """
+        Builds the mask of the live matrix rows, or None when no row is deleted.
+        """
+        deleted = [row for (row,) in self._connection.execute("SELECT row FROM deleted")]
+        if not deleted or self._embeddings is None:
+            self._alive = None
+            return
+        self._alive = np.ones(self._embeddings.shape[0], dtype=bool)
+        self._alive[deleted] = False
+
+    def saveAll(self,chunks:ChunkBatch) -> None:
+        """
+        Appends a batch of chunks to the index.
+
+        The embeddings are normalised, converted to the store precision and written after the stored rows of the
+        matrix file, growing it when full. The sidecar rows are committed afterwards, so the rows of a failed save are
+        ignored and overwritten by the next one.
+
+        Args:
+            chunks (ChunkBatch): The chunks to be saved.
+
+        Raises:
+            ValueError: If the embedding dimension or the precision differs from the one of the stored embeddings.
+        """
+        if not len(chunks):
+            return
+
+        vectors, scales = quantize(_normalize(chunks.embeddings), self.precision)
+        with self._lock:
+            existing = self._embeddings
+            if existing is not None and existing.shape[1] != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index dimension {existing.shape[1]}")
+            if existing is not None and existing.dtype != vectors.dtype:
+                raise ValueError(f"Embedding precision {self.precision} does not match the index precision {existing.dtype}")
+
+            start = 0 if existing is None else existing.shape[0]
+            # release every mapping of the files, otherwise a grown file can't replace them on Windows
+            del existing
+            self._embeddings = self._scales = None
+            try:
+                if scales is not None:
+                    self._append_rows(self._scales_path, scales, start)
+                self._append_rows(self._embeddings_path, vectors, start)
+
+                insert = "INSERT INTO chunks (row, id, content, headers, file_path) VALUES (?, ?, '', '', ?)" if self._legacy else "INSERT INTO chunks (row, id, file_path) VALUES (?, ?, ?)"
+                self._connection.executemany(
+                    insert,
+                    [(start + idx, id, file_path) for idx, (id, file_path) in enumerate(zip(chunks.ids, chunks.file_paths))]
+                )
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+            finally:
+                self._load()
+
+    @staticmethod
+    def _append_rows(path: str, rows: np.ndarray, start: int) -> None:
+        """
+        Writes rows to the `.npy` file at `path` from row `start` on.
+
+        The rows are written in place when the file has room for them, otherwise the first `start` rows are copied
+        to a new file with twice the room, or just enough for a very large batch, which replaces the old one atomically.
+
+        Args:
+            path (str): The path of the `.npy` file.
+            rows (np.ndarray): The rows to write, with the element type of the file.
+            start (int): The number of stored rows, the rows after them are free.
+        """
+        end = start + len(rows)
+        existing = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+        # a file left by an emptied store may hold rows of another dimension or precision
+        if existing is not None and existing.shape[0] >= end and existing.shape[1:] == rows.shape[1:] and existing.dtype == rows.dtype:
+            del existing
+            matrix = np.lib.format.open_memmap(path, mode="r+")
+            matrix[start:end] = rows
+            matrix.flush()
+            return
+
+        capacity = max(end, 2 * (0 if existing is None else existing.shape[0]))
+        tmp_path = path + ".tmp"
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=rows.dtype, shape=(capacity, *rows.shape[1:]))
+        if start:
+            matrix[:start] = existing[:start]
+        matrix[start:end] = rows
+        matrix.flush()
+        del matrix, existing
+        os.replace(tmp_path, path)
+
+    def search(self,embdedding:list[float],top_k = 3) -> list[tuple[str,float]]:
+        """
+        Retrieves the stored chunks most similar to the given embedding by exact cosine similarity.
+
+        Args:
+            embdedding (list[float]): The embedding for which to retrieve similar chunks.
+            top_k (int, optional): The number of top results to return. Default is 3.
+
+        Returns:
+            list[tuple[str, float]]: The ids and similarity scores of up to `top_k` chunks within `_distance_threshold`, most similar first.
+        """
+        if self._embeddings is None or top_k < 1:
+            return []
+
+        query = _normalize(np.asarray(embdedding, dtype=np.float32).reshape(1, -1))[0]
+        rows, scores = self._search(query, top_k)
+        return self._to_ids([(int(row), float(score)) for row, score in zip(rows, scores) if 1 - score <= self._distance_threshold])
+
+    def _search(self, query: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the live rows with the highest cosine similarity to the normalised query by scanning the whole matrix.
+
+        The rows are scored `__scan_batch` at a time, so quantized rows are converted to float32 one block at a time.
+
+        Args:
+            query (np.ndarray): The L2-normalised query embedding.
+            top_k (int): The number of rows to return.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The best rows and their similarity scores, most similar first.
+        """
+        count = self._embeddings.shape[0]
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, self.__scan_batch):
+            rows = slice(start, start + self.__scan_batch)
+            scores[rows] = self._rows(rows) @ query
+        if self._alive is not None:
+            scores[~self._alive] = -np.inf
+        return _top_k(scores, top_k)
+
+    def _rows(self, rows) -> np.ndarray:
+        """
+        Reads matrix rows, selected by a slice or an array of row numbers, as float32 vectors.
+        """
+        return dequantize(self._embeddings[rows], None if self._scales is None else self._scales[rows])
+
+    def _to_ids(self, results: list[tuple[int, float]]) -> list[tuple[str, float]]:
+        """
+        Replaces the matrix rows of the results by their chunk ids, read from the sidecar table.
+
+        Args:
+            results (list[tuple[int, float]]): The matrix rows and their similarity scores, in result order.
+
+        Returns:
+            list[tuple[str, float]]: The chunk id and similarity score of every row, in result order.
+        """
+        if not results:
+            return []
+
+        rows = [row for row, _ in results]
+        placeholders = ",".join("?" * len(rows))
+        with self._lock:
+            by_row = dict(self._connection.execute(f"SELECT row, id FROM chunks WHERE row IN ({placeholders})", rows).fetchall())
+        return [(by_row[row], score) for row, score in results]
+
+    def listDocuments(self) -> set[str]:
+        """
+        Lists all documents currently stored in the index by their file paths.
+
+        Returns:
+            set[str]: A set of file paths for all documents in the index.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT DISTINCT file_path FROM chunks").fetchall()
+        return {str(file_path) for (file_path,) in rows}
+
+
+    def listIds(self,file_path:str) -> set[str]:
+        """
+        Lists the chunk ids stored for a file in the sidecar table.
+
+        Args:
+            file_path (str): The file path stored in the metadata of the chunks.
+
+        Returns:
+            set[str]: The ids of the chunks of the file.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT id FROM chunks WHERE file_path = ?", (file_path,)).fetchall()
+        return {id for (id,) in rows}
+
+    def delete(self,ids:list[str]) -> None:
+        """
+        Deletes documents by chunk id. Their sidecar rows are removed and their matrix rows are marked as deleted.
+
+        Args:
+            ids (list[str]): The chunk ids to delete. Unknown ids are ignored.
+        """
+        if not ids:
+            return
+
+        with self._lock:
+            # stay below SQLite's limit of host parameters per statement
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                self._connection.execute(f"INSERT OR IGNORE INTO deleted (row) SELECT row FROM chunks WHERE id IN ({placeholders})", batch)
+                self._connection.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+            self._connection.commit()
+            self._load_deleted()
+
+    def iterLegacyChunks(self,batch_size:int=1000) -> Iterator[list[Document]]:
+        """
+        Reads the chunks stored with their content in the sidecar table by previous versions, `batch_size` at a time.
+
+        Yields:
+            list[Document]: Chunks with `id`, `headers` and `file_path` in their metadata.
+        """
+        if not self._legacy:
+            return
+        last_row = -1
+        while True:
+            with self._lock:
+                records = self._connection.execute(
+                    "SELECT row, id, content, headers, file_path FROM chunks WHERE row > ? AND content != '' ORDER BY row LIMIT ?", (last_row, batch_size)
+                ).fetchall()
+            if not records:
+                return
+            last_row = records[-1][0]
+            yield [Document(content, metadata={"id": id, "headers": headers, "file_path": file_path}) for _, id, content, headers, file_path in records]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scales every row to unit L2 norm, leaving all-zero rows untouched.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Selects the `k` highest scores with `argpartition` and returns their positions and values, highest first.
+    """
+    k = min(k, scores.shape[0])
+    if k < 1:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=scores.dtype)
+    positions = np.argpartition(-scores, k - 1)[:k]
+    positions = positions[np.argsort(-scores[positions])]
+    return positions, scores[positions]
@@ -0,0 +1,51 @@
+from typing import Any, Dict
+
+from mini_local_rag.config import Config
+from mini_local_rag.document_manifest import DocumentManifest
+from mini_local_rag.pipeline import Step
+
+
+class CheckManifestStep(Step):
+    """
+    A pipeline step that stops the ingestion early when the file was already ingested with the same content and parsing profile.
+
+    It also replaces the file path by its absolute path, so the manifest, the chunk ids and the stored chunks
+    of a file are keyed by the same path whichever way the file was named.
+
+    Attributes:
+        label (str): The label identifying this step ("Checking document manifest").
+        manifest (DocumentManifest): The manifest of the ingested files.
+        profile (str): The default parsing profile, retrieved from `config.parse_profile`.
+    """
+    label = "Checking document manifest"
+    def __init__(self, manifest: DocumentManifest, config: Config) -> None:
+        """
+        Initializes the step with the manifest of the ingested files.
+
+        Args:
+            manifest (DocumentManifest): The manifest used to find unchanged files.
+            config (Config): The configuration containing the default parsing profile.
+        """
+        self.manifest = manifest
+        self.profile = config.parse_profile
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Compares the file with its manifest entry and stops the pipeline if it is unchanged.
+
+        Args:
+            context (Dict[str, Any]): The context containing the file path and optionally its parsing profile under `"parse_profile"`.
+
+        Updates:
+            context["file_path"]: The absolute path of the file.
+            context["fingerprint"]: The current fingerprint of the file, recorded once the ingestion succeeds.
+            context["stop_reason"]: Set when the file is unchanged, so the remaining steps are skipped.
+            context["output"]: A message telling that the file was skipped, when it is unchanged.
+        """
+        file_path = str(context["file_path"])
+        unchanged, fingerprint = self.manifest.check(file_path, profile=context.get("parse_profile") or self.profile)
+        context["file_path"] = fingerprint.path
+        context["fingerprint"] = fingerprint
+        if unchanged:
+            context["stop_reason"] = "unchanged since last ingest"
+            context["output"] = f"Skipped {file_path}: unchanged since last ingest"
@@ -1,5 +1,7 @@
-from typing import Any, Dict
-import uuid
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Iterator
+import unicodedata
 from mini_local_rag.config import Config
 from mini_local_rag.pipeline import Step
 from langchain_text_splitters import MarkdownHeaderTextSplitter
@@ -10,6 +12,9 @@ class MarkdownChunkingStep(Step):
     """
     A pipeline step that splits a Markdown document into smaller chunks based on header structure and character length.
 
+    Chunk ids are derived from the file path, the headers and the normalized text of the chunk, so re-ingesting
+    a changed file produces the same ids for the chunks that didn't change.
+
     Attributes:
         label (str): The label identifying this step ("Splitting Markdown into chunks").
     """
@@ -30,23 +35,65 @@ class MarkdownChunkingStep(Step):
         Splits the Markdown document into chunks based on headers and character length, and adds metadata to each chunk.
 
         The method first splits the Markdown document by its headers and then further splits the resulting text into smaller chunks.
-        Metadata, including file path and chunk identifier, is added to each chunk.
+        Metadata, including file path and the content-derived chunk identifier, is added to each chunk.
 
         Args:
             context (Dict[str, Any]): The context containing the Markdown document and file path.
 
         Updates:
             context["documents"]: A list of document chunks with metadata.
+            context["chunk_count"]: The number of chunks of the file.
         """
-
         documents = self.markdown_splitter.split_text(str(context["markdown"]))
-        file_path = str(context["file_path"])
         chunks: list[Document] = self.text_splitter.split_documents(documents)
+        context["documents"] = list(self._add_metadata(chunks, str(context["file_path"])))
+        context["chunk_count"] = len(context["documents"])
+
+    def iter_chunks(self, markdown: str, file_path: str) -> Iterator[Document]:
+        """
+        Yields the same chunks as `execute`, one header section at a time, so only the chunks of one section are held in memory.
+
+        Args:
+            markdown (str): The Markdown document.
+            file_path (str): The path of the file the document was parsed from.
+
+        Yields:
+            Document: The chunks of the document, in document order, with their metadata.
+        """
+        sections = self.markdown_splitter.split_text(markdown)
+        chunks = (chunk for section in sections for chunk in self.text_splitter.split_documents([section]))
+        return self._add_metadata(chunks, file_path)
+
+    def _add_metadata(self, chunks: Iterable[Document], file_path: str) -> Iterator[Document]:
+        occurrences: dict[str, int] = {}
         for doc in chunks:
             doc.metadata['file_path'] = file_path
-            doc.metadata['id']= str(uuid.uuid4())
             doc.metadata['headers']=" ".join([doc.metadata.get("Header 1",""), doc.metadata.get("Header 2","")]).strip()
             doc.metadata.pop("Header 1",None)
             doc.metadata.pop("Header 2",None)
+            # identical chunks in the same file are told apart by their occurrence
+            key = chunk_id(file_path, doc.metadata['headers'], doc.page_content)
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            doc.metadata['id'] = key if occurrence == 0 else chunk_id(file_path, doc.metadata['headers'], doc.page_content, occurrence)
+            yield doc
+
+
+def chunk_id(file_path: str, headers: str, text: str, occurrence: int = 0) -> str:
+    """
+    Returns the deterministic id of a chunk: the SHA-256 hash of its file path, headers and normalized text.
 
-        context["documents"] = chunks
\ No newline at end of file
+    Normalization applies Unicode NFC and collapses whitespace, so formatting-only differences keep the same id.
+
+    Args:
+        file_path (str): The path of the file the chunk belongs to.
+        headers (str): The headers of the chunk.
+        text (str): The text of the chunk.
+        occurrence (int): The number of identical chunks before this one in the file. Defaults to 0.
+
+    Returns:
+        str: The hexadecimal chunk id.
+    """
+    normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+    parts = [file_path, headers, normalized] + ([str(occurrence)] if occurrence else [])
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
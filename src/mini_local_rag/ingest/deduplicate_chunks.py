@@ -0,0 +1,108 @@
+from typing import Any, Dict, Optional
+from langchain_core.documents import Document
+import numpy as np
+
+from mini_local_rag.minhash_index import MinHashIndex
+from mini_local_rag.pipeline import Step
+
+
+class DeduplicateChunksStep(Step):
+    """
+    A pipeline step that removes the exact and near-duplicate chunks before embedding.
+
+    Reports repeat disclaimers, revision tables and boilerplate sections. Every new chunk is compared with
+    MinHash/LSH to the chunks already stored and to the new chunks before it in the file. A duplicate is not
+    embedded nor stored: it is recorded as a reference to the surviving chunk, with its own file path and headers.
+
+    A stored chunk that is no longer part of its file is not deleted while duplicates of other files reference it,
+    since it holds their text.
+
+    Attributes:
+        label (str): The label identifying this step ("Removing duplicate chunks").
+        index (MinHashIndex): The MinHash index of the stored chunks.
+    """
+    label = "Removing duplicate chunks"
+    def __init__(self, index: MinHashIndex) -> None:
+        """
+        Initializes the step with the MinHash index of the stored chunks.
+
+        Args:
+            index (MinHashIndex): The index used to find duplicates among the stored chunks.
+        """
+        self.index = index
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Keeps only the new chunks that are not duplicates and records the duplicates.
+
+        Args:
+            context (Dict[str, Any]): The context containing the new chunks of the file, its path and the ids of the stored chunks to delete.
+
+        Updates:
+            context["documents"]: The new chunks that are not duplicates.
+            context["signatures"]: The MinHash signatures of these chunks, added to the index once they are stored.
+            context["duplicates"]: The id, headers and surviving chunk id of every duplicate chunk of the file.
+            context["deleted_ids"]: Without the chunks still referenced by duplicates of other files.
+            context["log_record"].duplicates: The number of duplicates of stored chunks and of chunks of the same file.
+        """
+        file_path = str(context["file_path"])
+        deleted = set(context.get("deleted_ids",[]))
+        survivors, signatures, duplicates, stored_duplicates = self.deduplicate(context["documents"], exclude=deleted)
+
+        kept = self.index.referenced(sorted(deleted), except_file=file_path)
+        context["documents"] = survivors
+        context["signatures"] = signatures
+        context["duplicates"] = duplicates
+        context["deleted_ids"] = sorted(deleted - kept)
+
+        record = context.get("log_record")
+        if record is not None:
+            record.duplicates = {"stored": stored_duplicates, "in_file": len(duplicates) - stored_duplicates}
+
+    def deduplicate(self, documents: list[Document], exclude: set[str]) -> tuple[list[Document], dict[str, np.ndarray], list[tuple[str, str, str]], int]:
+        """
+        Separates the new chunks from the duplicates of stored chunks and of the new chunks before them.
+
+        Args:
+            documents (list[Document]): The new chunks, in file order.
+            exclude (set[str]): The ids of the stored chunks that can't be used as survivor.
+
+        Returns:
+            tuple[list[Document], dict[str, np.ndarray], list[tuple[str, str, str]], int]: The chunks that are not duplicates,
+                their signatures by id, the id, headers and surviving chunk id of every duplicate, and the number of
+                duplicates of stored chunks.
+        """
+        survivors: list[Document] = []
+        signatures: dict[str, np.ndarray] = {}
+        duplicates: list[tuple[str, str, str]] = []
+        # LSH buckets of the surviving new chunks
+        buckets: dict[tuple[int, int], list[str]] = {}
+        stored_duplicates = 0
+        for doc in documents:
+            signature = self.index.signature(doc.page_content)
+            if signature is None:
+                survivors.append(doc)
+                continue
+
+            survivor_id = self._find_in_file(signature, buckets, signatures)
+            if survivor_id is None:
+                survivor_id = self.index.find(signature, exclude=exclude)
+                stored_duplicates += survivor_id is not None
+            if survivor_id is not None:
+                duplicates.append((doc.metadata["id"], doc.metadata.get("headers", ""), survivor_id))
+                continue
+
+            survivors.append(doc)
+            signatures[doc.metadata["id"]] = signature
+            for bucket in self.index.buckets(signature):
+                buckets.setdefault(bucket, []).append(doc.metadata["id"])
+        return survivors, signatures, duplicates, stored_duplicates
+
+    def _find_in_file(self, signature: np.ndarray, buckets: dict[tuple[int, int], list[str]], signatures: dict[str, np.ndarray]) -> Optional[str]:
+        best, best_similarity = None, self.index.threshold
+        candidates = {id for bucket in self.index.buckets(signature) for id in buckets.get(bucket, [])}
+        for id in sorted(candidates):
+            similarity = self.index.similarity(signature, signatures[id])
+            if similarity >= best_similarity:
+                best, best_similarity = id, similarity
+        return best
@@ -0,0 +1,66 @@
+from typing import Any, Dict
+from langchain_core.documents import Document
+
+from mini_local_rag.config import Config
+from mini_local_rag.ingest.update_tf_idf_retreiver import open_sparse_index
+from mini_local_rag.pipeline import Step
+from mini_local_rag.vector_store import VectorStore
+
+
+class DiffChunksStep(Step):
+    """
+    A pipeline step that compares the chunks of the file with the chunks already stored for it.
+
+    Chunk ids are derived from the chunk content, so a chunk that didn't change keeps its id. Only the new
+    chunks are kept for embedding and persistence, and the stored chunks that disappeared from the file are
+    scheduled for deletion. The cost of re-ingesting a file then depends on the size of the edit.
+
+    The stored chunks are also looked up in the sparse index: a chunk saved to the vector store by an ingestion
+    that failed before updating the sparse index is kept for the sparse index update, without being embedded again.
+
+    Attributes:
+        label (str): The label identifying this step ("Comparing chunks with stored chunks").
+        vector_store (VectorStore): The vector store holding the chunks of previous ingestions.
+        config (Config): The configuration containing the sparse index settings.
+    """
+    label = "Comparing chunks with stored chunks"
+    def __init__(self,vector_store:VectorStore,config:Config):
+        """
+        Initializes the step with the vector store holding the stored chunks.
+
+        Args:
+            vector_store (VectorStore): The vector store used to list the stored chunks of the file.
+            config (Config): The configuration containing the sparse index settings.
+        """
+        self.vector_store = vector_store
+        self.config = config
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Keeps only the new chunks of the file and lists the stored chunks that are no longer part of it.
+
+        Args:
+            context (Dict[str, Any]): The context containing the chunks of the file and its path.
+
+        Updates:
+            context["documents"]: The chunks that are not stored yet.
+            context["deleted_ids"]: The ids of the stored chunks that are no longer part of the file.
+            context["unindexed_documents"]: The stored chunks of the file missing from the sparse index.
+            context["log_record"].chunks: The number of new, unchanged and deleted chunks.
+        """
+        documents: list[Document] = context["documents"]
+        stored = self.vector_store.listIds(str(context["file_path"]))
+        current = {doc.metadata["id"] for doc in documents}
+
+        context["documents"] = [doc for doc in documents if doc.metadata["id"] not in stored]
+        context["deleted_ids"] = sorted(stored - current)
+        indexed = open_sparse_index(config=self.config).contains(sorted(stored & current))
+        context["unindexed_documents"] = [doc for doc in documents if doc.metadata["id"] in stored and doc.metadata["id"] not in indexed]
+
+        record = context.get("log_record")
+        if record is not None:
+            record.chunks = {
+                "new": len(context["documents"]),
+                "unchanged": len(documents) - len(context["documents"]),
+                "deleted": len(context["deleted_ids"]),
+            }
@@ -1,7 +1,10 @@
 from typing import Any, Dict
 from langchain_core.documents import Document
 
-from mini_local_rag.embedder import Embedder
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.config import Config
+from mini_local_rag.embedder import Embedder, embed_concurrently
+from mini_local_rag.embedding_cache import record_cache_stats
 from mini_local_rag.pipeline import Step
 
 
@@ -10,36 +13,45 @@ class GenerateEmbeddingsStep(Step):
     """
     A pipeline step that generates embeddings for documents using a specified embedder model.
 
-    This step uses an embedder (such as `Qwen3Embedder`) to create embeddings for the provided question 
-    and stores the resulting embedding in the context. The embedder is passed as an argument during 
-    the initialization of the step.
+    This step uses an embedder (such as `Qwen3Embedder`) to create embeddings for the document chunks 
+    and stores the chunks with their embeddings as a columnar `ChunkBatch`, the embeddings being one
+    float32 matrix instead of a list of Python floats per chunk. The chunks are sent to the embedder
+    in batches to avoid one model round-trip per chunk, and up to `concurrency` batches are in flight at the same time.
 
     Attributes:
         label (str): The label identifying this step ("Embedding generation").
-        embedder (Embedder): The embedder instance used to generate embeddings for the question. 
+        embedder (Embedder): The embedder instance used to generate embeddings for the documents. 
                               The embedder model is passed during initialization.
+        batch_size (int): The number of chunks embedded per request, retrieved from `config.embedding_batch_size`.
+        concurrency (int): The number of requests sent at the same time, retrieved from `config.embedding_concurrency`.
     """
-    def __init__(self,embedder:Embedder):
+    def __init__(self,embedder:Embedder,config:Config):
         """
         Initializes the step with the provided embedder.
 
         Args:
-            embedder (Embedder): The embedder instance used to generate embeddings for the question.
+            embedder (Embedder): The embedder instance used to generate embeddings for the documents.
+            config (Config): The configuration containing the embedding batch size and concurrency.
         """
         self.embedder = embedder
+        self.batch_size = config.embedding_batch_size
+        self.concurrency = config.embedding_concurrency
     def execute(self, context: Dict[str, Any]) -> None:
         """
-        Generates embeddings for each document in the context and stores them in the document's metadata.
+        Generates embeddings for each document in the context and stores them in a `ChunkBatch`.
 
-        The method iterates through all documents in the context, uses the embedder to generate 
-        embeddings for each document's content, and adds the resulting embeddings to the document's metadata.
+        The method collects the content of all documents in the context, uses the embedder to generate 
+        their embeddings in batches, and builds a batch holding the chunks and their embedding matrix.
+        If any batch fails the step fails and no batch is built.
 
         Args:
             context (Dict[str, Any]): The context containing the documents for which embeddings need to be generated.
 
         Updates:
-            context["documents"]: Each document in the context will have an "embeddings" field in its metadata.
+            context["chunks"]: The chunks of the documents with their embeddings, ready to be saved.
+            context["log_record"].embedding_cache: The cache hits and misses, when the embedder is cached.
         """
         documents: list[Document] = context["documents"]
-        for doc in documents:
-            doc.metadata["embeddings"] = self.embedder.embed(doc.page_content)
\ No newline at end of file
+        with record_cache_stats(self.embedder,context.get("log_record")):
+            embeddings = embed_concurrently(self.embedder,[doc.page_content for doc in documents],batch_size=self.batch_size,max_workers=self.concurrency)
+        context["chunks"] = ChunkBatch.from_documents(documents,embeddings=embeddings if documents else None)
\ No newline at end of file
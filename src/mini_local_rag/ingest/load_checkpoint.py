@@ -0,0 +1,51 @@
+from typing import Any, Dict
+
+from mini_local_rag.config import Config
+from mini_local_rag.ingest.save_checkpoint import SaveCheckpointStep
+from mini_local_rag.parse_checkpoints import ParseCheckpoints
+from mini_local_rag.pipeline import Step
+
+
+class LoadCheckpointStep(Step):
+    """
+    A pipeline step that restores the markdown of a file parsed and captioned by an earlier ingestion,
+    so the pipeline resumes after `SaveCheckpointStep` instead of parsing the file again.
+
+    Attributes:
+        label (str): The label identifying this step ("Loading parse checkpoint").
+        checkpoints (ParseCheckpoints): The store of the parsed markdown.
+        profile (str): The default parsing profile, retrieved from `config.parse_profile`.
+    """
+    label = "Loading parse checkpoint"
+    def __init__(self, checkpoints: ParseCheckpoints, config: Config) -> None:
+        """
+        Initializes the step with the checkpoint store.
+
+        Args:
+            checkpoints (ParseCheckpoints): The store of the parsed markdown.
+            config (Config): The configuration containing the default parsing profile.
+        """
+        self.checkpoints = checkpoints
+        self.profile = config.parse_profile
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Looks the checkpoint of the file up and restores its markdown when there is one.
+
+        Args:
+            context (Dict[str, Any]): The context containing the fingerprint of the file computed by `CheckManifestStep`
+                                      and optionally the parsing profile of this file under `"parse_profile"`.
+
+        Updates:
+            context["checkpoint_key"]: The key under which `SaveCheckpointStep` saves the markdown, when there is no checkpoint.
+            context["markdown"]: The markdown of the file, when there is a checkpoint.
+            context["resume_from"]: Set to `SaveCheckpointStep` when there is a checkpoint, so parsing and captioning are skipped.
+        """
+        key = self.checkpoints.key(sha256=context["fingerprint"].sha256, profile=context.get("parse_profile") or self.profile)
+        markdown = self.checkpoints.load(key)
+        if markdown is None:
+            context["checkpoint_key"] = key
+            return
+        context["markdown"] = markdown
+        # without a key the save step does nothing, the steps after it use the restored markdown
+        context["resume_from"] = SaveCheckpointStep
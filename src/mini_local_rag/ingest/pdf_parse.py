@@ -1,63 +1,231 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions, EasyOcrOptions , AcceleratorDevice, AcceleratorOptions
+from docling.datamodel.pipeline_options import PdfPipelineOptions, EasyOcrOptions , AcceleratorDevice, AcceleratorOptions, TableFormerMode, TableStructureOptions
+from docling_core.types.doc.document import DoclingDocument
+import pypdfium2
 from mini_local_rag.config import Config
 from mini_local_rag.pipeline import Step
 
+
+# the parsing profiles, "auto" picks "fast" or "balanced" for every page
+PARSE_PROFILES = ("fast", "balanced", "full", "auto")
+
+# the converters of a page range worker process by profile, created on first use with the settings stored by `_init_converter`
+_converters: Dict[str, DocumentConverter] = {}
+_converter_settings: Optional[tuple[Config, int]] = None
+
+
+def _create_converter(config: Config, num_threads: int, profile: str) -> DocumentConverter:
+    """
+    Creates the converter of a parsing profile:
+    - "fast": no OCR, fast table structure model.
+    - "balanced": OCR, accurate table structure model.
+    - "full": OCR, accurate table structure model and formula enrichment.
+    Only the picture images are generated, the page images aren't used by the image captioning.
+    """
+    path = None
+    if (config.enable_local_models):
+        cwd = os.getcwd()
+        path = os.path.join(cwd, config.data_folder,PdfParseStep.models_folder)
+
+    pipeline_options = PdfPipelineOptions(
+        do_ocr=profile != "fast",
+        do_table_structure=True,
+        generate_picture_images=True,
+        generate_page_images=False,
+        do_formula_enrichment=profile == "full",
+        artifacts_path= path,
+        table_structure_options=TableStructureOptions(do_cell_matching=True, mode=TableFormerMode.FAST if profile == "fast" else TableFormerMode.ACCURATE),
+        ocr_options=EasyOcrOptions(),
+        accelerator_options=AcceleratorOptions(num_threads, device=AcceleratorDevice.CPU),
+    )
+    format_options = {InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+    return DocumentConverter(format_options=format_options)
+
+
+def _init_converter(config: Config, num_threads: int) -> None:
+    global _converter_settings
+    _converter_settings = (config, num_threads)
+
+
+def _convert_range(file_path: str, page_range: tuple[int, int], profile: str) -> DoclingDocument:
+    if profile not in _converters:
+        _converters[profile] = _create_converter(*_converter_settings, profile)
+    return _converters[profile].convert(file_path, page_range=page_range).document
+
+
+def _count_pages(file_path: str) -> int:
+    pdf = pypdfium2.PdfDocument(file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _text_layers(file_path: str) -> list[bool]:
+    """
+    Returns for every page of the PDF whether it has an extractable text layer.
+    """
+    pdf = pypdfium2.PdfDocument(file_path)
+    try:
+        layers = []
+        for page in pdf:
+            text_page = page.get_textpage()
+            layers.append(bool(text_page.get_text_bounded().strip()))
+            text_page.close()
+            page.close()
+        return layers
+    finally:
+        pdf.close()
+
+
 class PdfParseStep(Step):
     """
     A step in the pipeline responsible for parsing PDF files, extracting data, and performing OCR and table structure extraction.
 
+    The parsing profile trades accuracy for speed:
+    - "fast": no OCR and the fast table structure model, for born-digital PDFs.
+    - "balanced": OCR and the accurate table structure model.
+    - "full": "balanced" with formula enrichment.
+    - "auto": "fast" on the pages with an extractable text layer, "balanced" on the scanned ones.
+
+    PDFs longer than `page_window` pages are split into page ranges of that size, which are converted in parallel by
+    `page_workers` worker processes, each holding its own converters and an equal share of the CPU threads. The converted
+    ranges are merged back into one document in page order, keeping the original page numbers. The worker processes
+    are started for the first split PDF and reused for the next ones, so every worker loads its models once.
+
     Attributes:
         label (str): The label identifying this step ("Parsing Pdf file").
-        _converter (DocumentConverter): The converter responsible for parsing PDFs with options for OCR, table structure, and image generation.
+        profile (str): The default parsing profile, retrieved from `config.parse_profile`.
+        page_window (int): The number of pages converted at a time by a worker, retrieved from `config.parse_page_window`.
+        page_workers (int): The number of processes converting the page ranges of one PDF, retrieved from `config.parse_page_workers`.
+        _converters (dict[str, DocumentConverter]): The converters by profile, created on first use, responsible for parsing PDFs
+                                                    with options for OCR, table structure, and image generation.
+        _executor (Optional[ProcessPoolExecutor]): The page range worker processes, started on first use.
     """
     label="Parsing Pdf file"
     models_folder ="models"
-    def __init__(self,config:Config,num_threads=4):
+    def __init__(self,config:Config,num_threads=4,page_workers:Optional[int]=None):
         """
         Initializes the PdfParseStep with options for parsing PDFs, performing OCR, and other related tasks.
 
         Args:
             num_threads (int): The number of threads to use for acceleration during PDF processing (default is 4).
             config (Config): The configuration for the pipeline containing parameters for the models.
+            page_workers (Optional[int]): The number of processes converting the page ranges of one PDF,
+                                          defaults to `config.parse_page_workers`. 1 disables the splitting.
+
+        Raises:
+            ValueError: If `config.parse_profile` is not a known profile.
         """
-        path = None
-        if (config.enable_local_models):
-            cwd = os.getcwd()
-            path = os.path.join(cwd, config.data_folder,self.models_folder)
-
-        pipeline_options = PdfPipelineOptions(
-            do_ocr=True,
-            do_table_structure=True,
-            generate_picture_images=True,
-            generate_page_images=True,
-            do_formula_enrichment=True,
-            artifacts_path= path,
-            table_structure_options={"do_cell_matching": True},
-            ocr_options=EasyOcrOptions(),
-            accelerator_options=AcceleratorOptions(num_threads, device=AcceleratorDevice.CPU),
-        )
-        format_options = {InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
-        self._converter = DocumentConverter(format_options=format_options)
+        self.config = config
+        self.num_threads = num_threads
+        self.profile = self._check_profile(config.parse_profile)
+        self.page_window = max(1, config.parse_page_window)
+        self.page_workers = max(1, page_workers if page_workers is not None else config.parse_page_workers)
+        self._converters: Dict[str, DocumentConverter] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
 
     def execute(self, context: Dict[str, Any]) -> None:
         """
         Executes the PDF parsing step and adds the parsed document to the context.
 
         Args:
-            context (Dict[str, Any]): The context holding shared data for the pipeline execution, including the file path.
+            context (Dict[str, Any]): The context holding shared data for the pipeline execution, including the file path
+                                      and optionally the parsing profile of this file under `"parse_profile"`.
 
         Updates:
             context["pdf"]: The parsed PDF document.
+            context["log_record"].page_ranges: The profile of every page range converted separately, when the PDF was split.
         """
         file_path = str(context["file_path"])
+        profile = self._check_profile(context.get("parse_profile") or self.profile)
 
         if not os.path.isabs(file_path):
             cwd = os.getcwd()
             file_path = os.path.join(cwd, file_path)
 
+        page_ranges = self._page_ranges(file_path, profile)
+        if len(page_ranges) < 2:
+            profile = page_ranges[0][1] if page_ranges else ("balanced" if profile == "auto" else profile)
+            context["pdf"] = self._converter(profile).convert(file_path).document
+            return
+
+        if self.page_workers > 1:
+            try:
+                # map returns the ranges in page order, whatever order they finish in
+                documents = list(self._page_executor().map(_convert_range, [file_path] * len(page_ranges), *zip(*page_ranges)))
+            except BrokenProcessPool:
+                # a worker died, start new ones for the next PDF
+                self.close()
+                raise
+        else:
+            documents = [self._converter(range_profile).convert(file_path, page_range=page_range).document for page_range, range_profile in page_ranges]
+
+        context["pdf"] = DoclingDocument.concatenate(documents)
+        record = context.get("log_record")
+        if record is not None:
+            record.page_ranges = [f"{start}-{end}: {range_profile}" for (start, end), range_profile in page_ranges]
+
+    def _page_ranges(self, file_path: str, profile: str) -> list[tuple[tuple[int, int], str]]:
+        """
+        Splits the pages of the PDF into the page ranges converted separately, numbered from 1 and inclusive, with their profile.
+
+        With the "auto" profile, consecutive pages with a text layer form a "fast" range and consecutive pages without one
+        a "balanced" range. When the PDF is converted by several workers, the ranges are further split into `page_window` pages.
+        A single range means the whole PDF is converted at once, and no range means the PDF wasn't inspected.
+        """
+        if profile == "auto":
+            runs: list[tuple[int, int, str]] = []
+            for page_no, text_layer in enumerate(_text_layers(file_path), start=1):
+                page_profile = "fast" if text_layer else "balanced"
+                if runs and runs[-1][2] == page_profile:
+                    runs[-1] = (runs[-1][0], page_no, page_profile)
+                else:
+                    runs.append((page_no, page_no, page_profile))
+        elif self.page_workers > 1:
+            runs = [(1, _count_pages(file_path), profile)]
+        else:
+            return []
+
+        if self.page_workers == 1:
+            return [((start, end), run_profile) for start, end, run_profile in runs]
+        return [((start, min(start + self.page_window - 1, end)), run_profile)
+                for start, end, run_profile in runs
+                for start in range(start, end + 1, self.page_window)]
+
+    def _page_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns the page range worker processes, starting them on first use.
+        """
+        if self._executor is None:
+            # split the CPU threads of the machine between the workers
+            num_threads = max(1, (os.cpu_count() or 1) // self.page_workers)
+            # spawn fresh workers instead of forking a process that may already hold threads and models
+            mp_context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.page_workers, mp_context=mp_context, initializer=_init_converter, initargs=(self.config, num_threads))
+        return self._executor
+
+    def close(self) -> None:
+        """
+        Stops the page range worker processes, if started. They are started again for the next split PDF.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _converter(self, profile: str) -> DocumentConverter:
+        if profile not in self._converters:
+            self._converters[profile] = _create_converter(self.config, self.num_threads, profile)
+        return self._converters[profile]
 
-        context["pdf"] = self._converter.convert(file_path).document
\ No newline at end of file
+    @staticmethod
+    def _check_profile(profile: str) -> str:
+        if profile not in PARSE_PROFILES:
+            raise ValueError(f"Unknown parse profile '{profile}', expected one of {list(PARSE_PROFILES)}")
+        return profile
@@ -1,39 +1,51 @@
 
 from typing import Any, Dict
-from langchain_core.documents import Document
 
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.chunk_store import ChunkStore
 from mini_local_rag.pipeline import Step
 from mini_local_rag.vector_store import VectorStore
 
 
 class PersistChangesStep(Step):
     """
-    A pipeline step that persists changes to a vector database by saving documents.
+    A pipeline step that persists changes to a vector database by saving the embedded chunks.
+
+    The texts of the chunks go to the chunk store and their embeddings to the vector store.
 
     Attributes:
         label (str): The label identifying this step ("Persisting changes to vector db").
-        vector_store (VectorStore): The vector store instance responsible for saving documents.
+        vector_store (VectorStore): The vector store instance responsible for saving the embeddings.
+        chunk_store (ChunkStore): The store of the chunk texts.
     """
     label = "Persisting changes to vector db"
-    def __init__(self,vector_store:VectorStore):
+    def __init__(self,vector_store:VectorStore,chunk_store:ChunkStore):
         """
-        Initializes the step with a vector store to persist documents.
+        Initializes the step with the stores where the chunks are persisted.
 
         Args:
-            vector_store (VectorStore): The vector store where the documents will be saved.
+            vector_store (VectorStore): The vector store where the embeddings will be saved.
+            chunk_store (ChunkStore): The store where the chunk texts will be saved.
         """
         self.vector_store = vector_store
+        self.chunk_store = chunk_store
     def execute(self, context: Dict[str, Any]) -> None:
         """
-        Persists the documents in the context to the vector database.
+        Persists the embedded chunks in the context to the vector database.
 
-        The method retrieves the documents from the pipeline context and saves them to the vector store.
+        The method retrieves the chunk batch from the pipeline context and saves it to the chunk store and
+        the vector store, then deletes the stored chunks that are no longer part of the file. The texts are
+        saved first and deleted last, so every chunk found in the vector store can be read.
 
         Args:
-            context (Dict[str, Any]): The context containing the documents to be persisted.
+            context (Dict[str, Any]): The context containing the chunks to be persisted and the ids of the chunks to delete.
 
         Updates:
-            None: This step directly modifies the vector store with the provided documents.
+            None: This step directly modifies the stores with the provided chunks.
         """
-        documents: list[Document] = context["documents"]        
-        self.vector_store.saveAll(documents)
\ No newline at end of file
+        chunks: ChunkBatch = context["chunks"]
+        self.chunk_store.save(chunks)
+        self.vector_store.saveAll(chunks)
+        deleted_ids = context.get("deleted_ids",[])
+        self.vector_store.delete(deleted_ids)
+        self.chunk_store.delete(deleted_ids)
\ No newline at end of file
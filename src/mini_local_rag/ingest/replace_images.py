@@ -1,58 +1,178 @@
+import base64
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+import hashlib
+import io
+import os
+import time
 from docling_core.types.doc.document import PictureItem, DocItemLabel,DoclingDocument
 from typing import Any, Dict
 
 import ollama
+from PIL import Image
 
 from mini_local_rag.config import Config
 from mini_local_rag.pipeline import Step
+from mini_local_rag.sqlite_cache import SqliteLRUCache
 
 
 class ImageReplaceStep(Step):
     """
     A pipeline step that replaces images in a PDF document with text extracted using a vision model.
 
+    Captions are kept in a persistent cache keyed by the vision model, the prompt and the content of the
+    decoded image, so logos and diagrams repeated across pages and reports are sent to the model once.
+    Images with a side shorter than `min_image_edge` pixels are treated as decorative and not captioned.
+    The others are downscaled to `max_image_edge` pixels and re-encoded as JPEG before being sent, since the
+    vision model resizes them anyway. Up to `concurrency` uncached images are sent to the vision model at the
+    same time, and the captions are applied in document order. All captions of a document must be ready within `timeout` seconds;
+    images whose caption is not ready by then are not replaced, so one slow image can't hold up the whole ingest.
+
     Attributes:
+        __cache_file (str): The name of the caption cache file inside the data folder.
         label (str): The label identifying this step ("Replacing images on pdf with text").
+        vision_model (str): The vision model used to caption the images, retrieved from `config.vision_model`.
+        prompt (str): The captioning prompt, retrieved from `config.image_to_text_prompt`.
+        concurrency (int): The number of images captioned at the same time, retrieved from `config.caption_concurrency`.
+        timeout (float): The captioning budget of a document in seconds, retrieved from `config.caption_timeout`.
+        min_image_edge (int): The shortest side of a captioned image in pixels, retrieved from `config.caption_min_image_edge`.
+        max_image_edge (int): The longest side of an image sent to the model in pixels, retrieved from `config.caption_max_image_edge`.
+        jpeg_quality (int): The JPEG quality of the images sent to the model, retrieved from `config.caption_jpeg_quality`.
     """
+    __cache_file: str = "caption_cache.db"
     label = "Replacing images on pdf with text"
     def __init__(self, config: Config) -> None:
         """
         Initializes the image to text prompt used on ollama.
-        Initializes the vision model name
+        Initializes the vision model name, the captioning limits and the caption cache.
         Args:
-            config (Config): The configuration for the pipeline containing parameters for the splitters.
+            config (Config): The configuration for the pipeline containing the vision model and captioning settings.
         """
         self.vision_model = config.vision_model
         self.prompt= config.image_to_text_prompt
+        self.concurrency = max(1, config.caption_concurrency)
+        self.timeout = config.caption_timeout
+        self.min_image_edge = config.caption_min_image_edge
+        self.max_image_edge = config.caption_max_image_edge
+        self.jpeg_quality = config.caption_jpeg_quality
+        cwd = os.getcwd()
+        self._cache = SqliteLRUCache(path=os.path.join(cwd, config.data_folder, self.__cache_file), max_entries=config.caption_cache_max_entries)
     def execute(self,context: Dict[str, Any]) -> None:
         """
         Replaces images in the PDF document with text extracted using a vision model.
 
-        The method iterates through the PDF document's items, identifies images, and sends each image to the configured vision model to extract text. 
-        The extracted text is then added to the document as a replacement for the image.
+        The method collects the images of the document, skips the decorative ones and looks the captions of the others
+        up in the cache. Images missing from the cache are downscaled, re-encoded and sent once per distinct content to
+        the configured vision model through a bounded pool of worker threads, and the new captions are stored in the cache.
+        Every image is then replaced with its caption in document order. Images not captioned within the document's time budget are kept as images,
+        which the markdown conversion leaves out.
 
         Args:
             context (Dict[str, Any]): The context containing the PDF document and other shared data.
 
         Updates:
             context["pdf"]: The modified document with images replaced by extracted text.
+            context["captions_timed_out"]: The number of images whose caption was not ready in time.
+            context["log_record"].image_captions: The number of images skipped, served from the cache, captioned by the model and timed out.
         """
         document: DoclingDocument = context["pdf"]
+        pictures = [item for item, _ in document.iterate_items() if isinstance(item, PictureItem)]
+        if not pictures:
+            return
+
+        images: dict[str, bytes] = {}
+        captioned: list[tuple[PictureItem, str]] = []
+        for item in pictures:
+            image = base64.b64decode(item.image.uri.path.split(",")[1])
+            # only the image header is read to get the size
+            if min(Image.open(io.BytesIO(image)).size) < self.min_image_edge:
+                continue
+            key = self._key(image)
+            images[key] = image
+            captioned.append((item, key))
+        cached = self._cache.get_many(list(images))
+
         replacements = []
-        for item, _ in document.iterate_items():
-            if isinstance(item, PictureItem):
-                img = item.image.uri.path.split(",")[1]
-                response = ollama.chat(
-                        model=self.vision_model,
-                        messages=[
-                        ollama.Message(role='user', content=self.prompt, images=[ollama.Image(value=img)])
-                    ],)
-                
+        generated: dict[str, str] = {}
+        timed_out = 0
+        pending: dict[str, Future] = {}
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            for key, image in images.items():
+                if key not in cached:
+                    pending[key] = executor.submit(self._caption, image)
+
+            deadline = time.monotonic() + self.timeout
+            for item, key in captioned:
+                if key in cached:
+                    caption = cached[key].decode("utf-8")
+                else:
+                    try:
+                        caption = pending[key].result(timeout=max(0.0, deadline - time.monotonic()))
+                    except TimeoutError:
+                        timed_out += 1
+                        continue
+                    generated[key] = caption
                 new_text = document.add_text(
                     label=DocItemLabel.TEXT,
-                    text=response.message.content,
+                    text=caption,
                     prov=item.prov[0] if item.prov else None
                 )
                 replacements.append((item, new_text))
+        finally:
+            # don't wait for the images still being captioned, their results are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self._cache.put_many({key: caption.encode("utf-8") for key, caption in generated.items()})
         for old_item, new_item in replacements:
-            document.replace_item(new_item=new_item, old_item=old_item)
\ No newline at end of file
+            document.replace_item(new_item=new_item, old_item=old_item)
+
+        context["captions_timed_out"] = timed_out
+        record = context.get("log_record")
+        if record is not None:
+            record.image_captions = {
+                "skipped": len(pictures) - len(captioned),
+                "cached": sum(key in cached for _, key in captioned),
+                "generated": len(generated),
+                "timed_out": timed_out,
+            }
+
+    def _key(self, image: bytes) -> str:
+        """
+        Builds the cache key of a decoded image: the hash of the vision model, the prompt, the image bytes, the maximum image size
+        and the JPEG quality, like the parse checkpoints.
+        """
+        prompt_hash = hashlib.sha256(self.prompt.encode("utf-8")).hexdigest()
+        image_hash = hashlib.sha256(image).hexdigest()
+        return hashlib.sha256(f"{self.vision_model}\0{prompt_hash}\0{image_hash}\0{self.max_image_edge}\0{self.jpeg_quality}".encode("utf-8")).hexdigest()
+
+    def _caption(self, image: bytes) -> str:
+        """
+        Downscales and re-encodes one decoded image, sends it to the vision model and returns its caption.
+        """
+        response = ollama.chat(
+                model=self.vision_model,
+                messages=[
+                ollama.Message(role='user', content=self.prompt, images=[ollama.Image(value=self._prepare(image))])
+            ],)
+        return response.message.content
+
+    def _prepare(self, image: bytes) -> bytes:
+        """
+        Downscales the image so its longest side is at most `max_image_edge` pixels and re-encodes it as JPEG.
+
+        Transparent areas are flattened on a white background, the usual page color.
+        """
+        with Image.open(io.BytesIO(image)) as picture:
+            # decode at a reduced scale when the format supports it (JPEG), then resize precisely
+            picture.draft("RGB", (self.max_image_edge, self.max_image_edge))
+            picture.thumbnail((self.max_image_edge, self.max_image_edge), Image.Resampling.LANCZOS)
+            if picture.mode.endswith("A") or "transparency" in picture.info:
+                picture = picture.convert("RGBA")
+                background = Image.new("RGB", picture.size, (255, 255, 255))
+                background.paste(picture, mask=picture.getchannel("A"))
+                picture = background
+            elif picture.mode != "RGB":
+                picture = picture.convert("RGB")
+            output = io.BytesIO()
+            picture.save(output, format="JPEG", quality=self.jpeg_quality, optimize=True)
+        return output.getvalue()
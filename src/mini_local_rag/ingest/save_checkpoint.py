@@ -0,0 +1,39 @@
+from typing import Any, Dict
+
+from mini_local_rag.parse_checkpoints import ParseCheckpoints
+from mini_local_rag.pipeline import Step
+
+
+class SaveCheckpointStep(Step):
+    """
+    A pipeline step that saves the markdown of the parsed and captioned file as a checkpoint,
+    so a later failure doesn't require parsing the file again.
+
+    Markdown with images whose caption timed out is not saved, the next attempt captions them again.
+
+    Attributes:
+        label (str): The label identifying this step ("Saving parse checkpoint").
+        checkpoints (ParseCheckpoints): The store of the parsed markdown.
+    """
+    label = "Saving parse checkpoint"
+    def __init__(self, checkpoints: ParseCheckpoints) -> None:
+        """
+        Initializes the step with the checkpoint store.
+
+        Args:
+            checkpoints (ParseCheckpoints): The store of the parsed markdown.
+        """
+        self.checkpoints = checkpoints
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Saves the markdown under the key computed by `LoadCheckpointStep`.
+
+        Args:
+            context (Dict[str, Any]): The context containing the markdown, the checkpoint key and the number of captions that timed out.
+                                      There is no key when the markdown was restored from a checkpoint.
+        """
+        key = context.get("checkpoint_key")
+        if key is None or context.get("captions_timed_out"):
+            return
+        self.checkpoints.save(key, context["markdown"])
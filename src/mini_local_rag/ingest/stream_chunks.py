@@ -0,0 +1,140 @@
+from itertools import islice
+from typing import Any, Dict, Optional
+from langchain_core.documents import Document
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.chunk_store import ChunkStore
+from mini_local_rag.config import Config
+from mini_local_rag.embedder import Embedder, embed_concurrently
+from mini_local_rag.embedding_cache import record_cache_stats
+from mini_local_rag.ingest.chunk_markdown import MarkdownChunkingStep
+from mini_local_rag.ingest.deduplicate_chunks import DeduplicateChunksStep
+from mini_local_rag.ingest.update_tf_idf_retreiver import open_sparse_index
+from mini_local_rag.pipeline import Step
+from mini_local_rag.vector_store import VectorStore
+
+
+class StreamChunksStep(Step):
+    """
+    A pipeline step that chunks, embeds and persists a Markdown document in batches of `batch_size` chunks.
+
+    It replaces the chunking, comparison, embedding, persistence and sparse index steps for large documents:
+    the chunks are produced lazily by the chunker, and every batch of new chunks is embedded, saved to the
+    vector store and added to the sparse index before the next batch is read. The chunks and embeddings held
+    in memory are bounded by the batch size, the saved chunks are searchable while the rest of the document
+    is processed, and after a crash the next ingestion finds them stored and only embeds the remaining ones.
+    The stored chunks missing from the sparse index are added to it without being embedded again.
+    The stored chunks that are no longer part of the file are deleted once all new chunks are saved.
+
+    With a deduplicator, the duplicates of every batch are removed before embedding like `DeduplicateChunksStep`
+    does, and the signatures of the saved chunks are added to the MinHash index before the next batch, so the
+    later batches are compared with them too. The duplicates of the file are recorded at the end.
+
+    Attributes:
+        label (str): The label identifying this step ("Chunking, embedding and persisting in batches").
+        chunker (MarkdownChunkingStep): The chunker producing the chunks of the document.
+        embedder (Embedder): The embedder used to generate the embeddings of the chunks.
+        vector_store (VectorStore): The vector store where the embeddings are saved.
+        chunk_store (ChunkStore): The store where the chunk texts are saved.
+        config (Config): The configuration containing the sparse index settings.
+        deduplicator (Optional[DeduplicateChunksStep]): The step removing the duplicate chunks, None to store them all.
+        batch_size (int): The number of chunks read, embedded and saved at a time, retrieved from `config.streaming_batch_size`.
+        embedding_batch_size (int): The number of chunks embedded per request, retrieved from `config.embedding_batch_size`.
+        concurrency (int): The number of embedding requests sent at the same time, retrieved from `config.embedding_concurrency`.
+    """
+    label = "Chunking, embedding and persisting in batches"
+    def __init__(self, chunker: MarkdownChunkingStep, embedder: Embedder, vector_store: VectorStore, chunk_store: ChunkStore, config: Config,
+                 deduplicator: Optional[DeduplicateChunksStep] = None):
+        """
+        Initializes the step with the chunker, the embedder and the stores.
+
+        Args:
+            chunker (MarkdownChunkingStep): The chunker producing the chunks of the document.
+            embedder (Embedder): The embedder used to generate the embeddings of the chunks.
+            vector_store (VectorStore): The vector store where the embeddings are saved.
+            chunk_store (ChunkStore): The store where the chunk texts are saved.
+            config (Config): The configuration containing the streaming, embedding and sparse index settings.
+            deduplicator (Optional[DeduplicateChunksStep]): The step removing the duplicate chunks, None to store them all.
+        """
+        self.chunker = chunker
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.chunk_store = chunk_store
+        self.config = config
+        self.deduplicator = deduplicator
+        self.batch_size = max(1, config.streaming_batch_size)
+        self.embedding_batch_size = config.embedding_batch_size
+        self.concurrency = config.embedding_concurrency
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Streams the chunks of the Markdown document to the vector store and the sparse index.
+
+        Args:
+            context (Dict[str, Any]): The context containing the Markdown document and the file path.
+
+        Updates:
+            context["documents"]: An empty list, the chunks are already saved and indexed.
+            context["deleted_ids"]: An empty list, the chunks that are no longer part of the file are already deleted.
+            context["chunk_count"]: The number of chunks of the file.
+            context["log_record"].chunks: The number of new, unchanged and deleted chunks and the number of batches saved.
+            context["log_record"].duplicates: The number of duplicates of stored chunks and of chunks of the same batch, with a deduplicator.
+            context["log_record"].embedding_cache: The cache hits and misses, when the embedder is cached.
+        """
+        file_path = str(context["file_path"])
+        record = context.get("log_record")
+        stored = self.vector_store.listIds(file_path)
+        index = open_sparse_index(config=self.config)
+        indexed = index.contains(sorted(stored))
+
+        current: set[str] = set()
+        duplicates: list[tuple[str, str, str]] = []
+        new = unchanged = batches = stored_duplicates = 0
+        chunks = self.chunker.iter_chunks(str(context["markdown"]), file_path)
+        with record_cache_stats(self.embedder, record):
+            while batch := list(islice(chunks, self.batch_size)):
+                current.update(doc.metadata["id"] for doc in batch)
+                documents: list[Document] = [doc for doc in batch if doc.metadata["id"] not in stored]
+                unchanged += len(batch) - len(documents)
+                # stored chunks missing from the sparse index, saved by an ingestion that failed before indexing them
+                index.add([doc for doc in batch if doc.metadata["id"] in stored and doc.metadata["id"] not in indexed])
+                signatures = {}
+                if self.deduplicator is not None:
+                    documents, signatures, batch_duplicates, batch_stored = self.deduplicator.deduplicate(documents, exclude=set())
+                    duplicates.extend(batch_duplicates)
+                    stored_duplicates += batch_stored
+                if not documents:
+                    continue
+
+                embeddings = embed_concurrently(self.embedder, [doc.page_content for doc in documents], batch_size=self.embedding_batch_size, max_workers=self.concurrency)
+                chunk_batch = ChunkBatch.from_documents(documents, embeddings=embeddings)
+                # the texts first, so every chunk of the vector store can be read, and the vector store
+                # before the sparse index: a chunk saved there is not embedded again after a crash
+                self.chunk_store.save(chunk_batch)
+                self.vector_store.saveAll(chunk_batch)
+                index.add(documents)
+                if self.deduplicator is not None:
+                    self.deduplicator.index.add(signatures)
+                new += len(documents)
+                batches += 1
+
+        deleted = stored - current
+        if self.deduplicator is not None:
+            # a stored chunk still holding the text of duplicates, of this file or of others, is kept
+            deleted -= {survivor_id for _, _, survivor_id in duplicates}
+            deleted -= self.deduplicator.index.referenced(sorted(deleted), except_file=file_path)
+        deleted_ids = sorted(deleted)
+        self.vector_store.delete(deleted_ids)
+        index.delete(deleted_ids)
+        self.chunk_store.delete(deleted_ids)
+        if self.deduplicator is not None:
+            self.deduplicator.index.delete(deleted_ids)
+            self.deduplicator.index.replace_duplicates(file_path, duplicates)
+
+        context["documents"] = []
+        context["deleted_ids"] = []
+        context["chunk_count"] = new + unchanged + len(duplicates)
+        if record is not None:
+            record.chunks = {"new": new, "unchanged": unchanged, "deleted": len(deleted_ids), "batches": batches}
+            if self.deduplicator is not None:
+                record.duplicates = {"stored": stored_duplicates, "in_file": len(duplicates) - stored_duplicates}
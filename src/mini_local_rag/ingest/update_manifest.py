@@ -0,0 +1,41 @@
+from typing import Any, Dict
+
+from mini_local_rag.config import Config
+from mini_local_rag.document_manifest import DocumentManifest, FileFingerprint
+from mini_local_rag.pipeline import Step
+
+
+class UpdateManifestStep(Step):
+    """
+    A pipeline step that records the ingested file in the document manifest, with its number of chunks and parsing profile for the catalog.
+
+    It runs last, so a file is only recorded once all its chunks are persisted and a failed
+    ingestion is retried on the next run.
+
+    Attributes:
+        label (str): The label identifying this step ("Updating document manifest").
+        manifest (DocumentManifest): The manifest of the ingested files.
+        profile (str): The default parsing profile, retrieved from `config.parse_profile`.
+    """
+    label = "Updating document manifest"
+    def __init__(self, manifest: DocumentManifest, config: Config) -> None:
+        """
+        Initializes the step with the manifest of the ingested files.
+
+        Args:
+            manifest (DocumentManifest): The manifest where the ingested file is recorded.
+            config (Config): The configuration containing the default parsing profile.
+        """
+        self.manifest = manifest
+        self.profile = config.parse_profile
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Records the fingerprint computed by `CheckManifestStep` in the manifest.
+
+        Args:
+            context (Dict[str, Any]): The context containing the fingerprint of the ingested file, its number of chunks
+                                      and optionally its parsing profile under `"parse_profile"`.
+        """
+        fingerprint: FileFingerprint = context["fingerprint"]
+        self.manifest.record(fingerprint, chunks=context.get("chunk_count"), profile=context.get("parse_profile") or self.profile)
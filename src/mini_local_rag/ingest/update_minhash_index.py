@@ -0,0 +1,37 @@
+from typing import Any, Dict
+
+from mini_local_rag.minhash_index import MinHashIndex
+from mini_local_rag.pipeline import Step
+
+
+class UpdateMinHashIndexStep(Step):
+    """
+    A pipeline step that adds the stored chunks of the file to the MinHash index and records its duplicate chunks.
+
+    It runs after the chunks are persisted, so the index never points to chunks that were not stored.
+
+    Attributes:
+        label (str): The label identifying this step ("Updating duplicate index").
+        index (MinHashIndex): The MinHash index of the stored chunks.
+    """
+    label = "Updating duplicate index"
+    def __init__(self, index: MinHashIndex) -> None:
+        """
+        Initializes the step with the MinHash index of the stored chunks.
+
+        Args:
+            index (MinHashIndex): The index updated with the chunks of the file.
+        """
+        self.index = index
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        """
+        Adds the signatures of the new chunks, removes the deleted chunks and replaces the duplicates of the file.
+
+        Args:
+            context (Dict[str, Any]): The context containing the file path, the signatures and duplicates computed by
+                                      `DeduplicateChunksStep` and the ids of the deleted chunks.
+        """
+        self.index.add(context["signatures"])
+        self.index.delete(context.get("deleted_ids",[]))
+        self.index.replace_duplicates(str(context["file_path"]), context["duplicates"])
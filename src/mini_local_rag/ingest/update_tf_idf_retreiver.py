@@ -4,50 +4,67 @@ from mini_local_rag.config import Config
 from mini_local_rag.pipeline import Step
 from langchain_core.documents import Document
 
-from mini_local_rag.tf_idf_retriever import CustomTFIDFRetriever
+from mini_local_rag.sparse_index import SparseIndex
+from langchain_community.retrievers import TFIDFRetriever
 
 
 class UpdateTFIDFRetrieverStep(Step):
     """
-    A pipeline step that updates a TF-IDF retriever model with new documents.
+    A pipeline step that appends new documents to the BM25 sparse index.
 
-    This step loads an existing retriever model (if available), adds new documents to it, 
-    and saves the updated model back to the specified path.
+    The index is append-only, so only the new documents are processed and the cost of the step
+    doesn't grow with the size of the corpus.
 
     Attributes:
         label (str): The label identifying this step ("update tf idf retriever model").
-        retriever_path (str): The directory where the retriever is located, retrieved from the `config.retriever_path`.
+        config (Config): The configuration containing the sparse index settings.
+        retriever_path (str): The directory of the legacy pickled retriever, retrieved from the `config.retriever_path`.
     """
     label="update tf idf retriever model"
     def __init__(self, config: Config) -> None:
         """
-        Initializes the retriever path.
+        Initializes the index configuration and the legacy retriever path.
 
         Args:
-            config (Config): The configuration for the pipeline containing parameters for the splitters.
+            config (Config): The configuration for the pipeline containing the sparse index settings.
         """
+        self.config = config
         self.retriever_path = config.retriever_path
 
     def execute(self,context: Dict[str, Any]) -> None:
         """
-        Updates the TF-IDF retriever model by adding new documents to the existing model.
+        Adds the new documents of the pipeline context to the sparse index and deletes the chunks that are no longer part of the file.
 
-        The method loads the current retriever model (if it exists), combines it with the 
-        new documents provided in the pipeline context, and saves the updated model.
+        On the first update, the documents of a legacy pickled retriever are imported first so
+        previously ingested files stay searchable.
 
         Args:
-            context (Dict[str, Any]): The context containing the new documents to be added to the retriever model.
-            config (Config): The configuration containing the path to the retriever model.
-
+            context (Dict[str, Any]): The context containing the new documents to be added to the index, the stored
+                documents missing from it and the ids of the chunks to delete.
         """
-        cwd = os.getcwd()
-        path = os.path.join(cwd, self.retriever_path)
-        documents: list[Document] = context["documents"]
-        
-        if os.path.exists(path):
-            retriever = CustomTFIDFRetriever.load_local(folder_path=path,allow_dangerous_deserialization=True)
-            old_docs = retriever.docs
-            documents = old_docs+documents
-
-        retriever = CustomTFIDFRetriever.from_documents(documents=documents)
-        retriever.save_local(folder_path=path)
\ No newline at end of file
+        documents: list[Document] = [*context["documents"], *context.get("unindexed_documents",[])]
+        index = open_sparse_index(config=self.config)
+        index.delete(context.get("deleted_ids",[]))
+        index.add(documents)
+
+
+def open_sparse_index(config: Config) -> SparseIndex:
+    """
+    Opens the sparse index for an update.
+
+    When the index doesn't exist yet, the documents of a legacy pickled retriever at `config.retriever_path`
+    are imported first so previously ingested files stay searchable.
+
+    Args:
+        config (Config): The configuration containing the sparse index settings and the legacy retriever path.
+
+    Returns:
+        SparseIndex: The sparse index.
+    """
+    index = SparseIndex(config=config)
+    cwd = os.getcwd()
+    legacy_path = os.path.join(cwd, config.retriever_path)
+    if not index.exists() and os.path.exists(legacy_path):
+        retriever = TFIDFRetriever.load_local(folder_path=legacy_path,allow_dangerous_deserialization=True)
+        index.add(retriever.docs)
+    return index
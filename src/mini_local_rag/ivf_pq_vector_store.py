@@ -0,0 +1,279 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.config import Config
+from mini_local_rag.flat_vector_store import FlatVectorStore, _top_k
+
+
+class IvfPqVectorStore(FlatVectorStore):
+    """
+    An approximate vector store using an inverted file with product quantization (IVF-PQ), in pure NumPy.
+
+    The embeddings, at the store precision, and the sidecar table are kept exactly like `FlatVectorStore`, but queries
+    don't scan them. Instead every embedding is assigned to one of `nlist` coarse k-means centroids, and its
+    residual to that centroid is compressed to `subquantizers` one-byte codes. Only the centroids, the codebooks
+    and the memory-mapped codes are read. The codes of new rows are appended in place to files that grow like the
+    embeddings matrix, and their number is recorded in the sidecar database. A query visits the `nprobe` closest lists, ranks their rows with asymmetric
+    distance lookup tables, and re-ranks the best `rerank_candidates` rows exactly against the memory-mapped file.
+
+    Until the store holds `train_min_rows` embeddings, the quantizers are not trained and queries fall back to
+    the exact flat search.
+
+    Attributes:
+        __index_files (dict[str, str]): The file names of the trained index arrays inside the index folder.
+        nlist (int): The number of coarse centroids (inverted lists).
+        nprobe (int): The number of lists visited per query.
+        subquantizers (int): The number of PQ sub-vectors; must divide the embedding dimension.
+        train_sample (int): The maximum number of embeddings sampled to train the quantizers.
+        train_min_rows (int): The number of stored embeddings required before training.
+        rerank_candidates (int): The number of approximate results re-ranked with exact similarity.
+    """
+
+    __index_files: dict[str, str] = {
+        "centroids": "ivf_centroids.npy",
+        "codebooks": "pq_codebooks.npy",
+        "codes": "pq_codes.npy",
+        "lists": "ivf_lists.npy",
+    }
+    __codewords: int = 256  # one byte per sub-vector code
+    __encode_batch: int = 4096  # rows encoded per step, bounds the memory used while encoding
+
+    def __init__(self,config:Config):
+        """
+        Opens the index folder, memory-maps the embeddings and loads the trained quantizers if they exist.
+
+        Args:
+            config (Config): The configuration containing the index folder and the IVF-PQ parameters.
+        """
+        self.nlist = config.ivf_nlist
+        self.nprobe = config.ivf_nprobe
+        self.subquantizers = config.pq_subquantizers
+        self.train_sample = config.ivf_train_sample
+        self.train_min_rows = max(config.ivf_train_min_rows, config.ivf_nlist)
+        self.rerank_candidates = config.ivf_rerank_candidates
+        self._centroids: Optional[np.ndarray] = None
+        super().__init__(config=config)
+
+    def _load(self) -> None:
+        """
+        Memory-maps the embeddings and the codes, and loads the trained quantizers and the inverted lists.
+
+        Rows that exist in the matrix but were not encoded yet, either just saved or left by an interrupted save, are
+        encoded and appended to the code files.
+        """
+        super()._load()
+        self._connection.execute("CREATE TABLE IF NOT EXISTS pq_codes (encoded INTEGER NOT NULL)")
+        self._centroids = None
+        paths = {name: os.path.join(self.path, file) for name, file in self.__index_files.items()}
+        if self._embeddings is None or not all(os.path.exists(path) for path in paths.values()):
+            return
+
+        self._centroids = np.load(paths["centroids"])
+        self._codebooks = np.load(paths["codebooks"])
+        count = self._embeddings.shape[0]
+        encoded = self._encoded_rows()
+        if encoded < count:
+            self._write_codes(*self._encode(first=encoded), start=encoded)
+        self._set_codes(count)
+
+    def saveAll(self,chunks:ChunkBatch) -> None:
+        """
+        Appends a batch of chunks to the index and encodes them with the trained quantizers.
+
+        The quantizers are trained once the store holds `train_min_rows` embeddings.
+
+        Args:
+            chunks (ChunkBatch): The chunks to be saved.
+
+        Raises:
+            ValueError: If the embedding dimension is not divisible by the number of subquantizers.
+        """
+        if len(chunks) and chunks.embeddings.shape[1] % self.subquantizers != 0:
+            raise ValueError(f"Embedding dimension {chunks.embeddings.shape[1]} is not divisible by pq_subquantizers={self.subquantizers}")
+
+        # reloading after the save encodes the new rows when the quantizers are trained
+        super().saveAll(chunks)
+        if self._embeddings is None:
+            return
+
+        with self._lock:
+            if self._centroids is None and self._embeddings.shape[0] >= self.train_min_rows:
+                self._train()
+
+    def _search(self, query: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the rows most similar to the normalised query using the inverted lists and PQ codes,
+        then re-ranks the shortlist with exact similarity.
+
+        Falls back to the exact flat search while the quantizers are not trained.
+
+        Args:
+            query (np.ndarray): The L2-normalised query embedding.
+            top_k (int): The number of rows to return.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The best rows and their exact similarity scores, most similar first.
+        """
+        if self._centroids is None:
+            return super()._search(query, top_k)
+
+        centroids = self._centroids
+        coarse = np.sum(centroids * centroids, axis=1) - 2 * (centroids @ query)
+        probes = _top_k(-coarse, self.nprobe)[0]
+
+        dsub = query.shape[0] // self.subquantizers
+        sub_range = np.arange(self.subquantizers)
+        candidate_rows: list[np.ndarray] = []
+        candidate_distances: list[np.ndarray] = []
+        for probe in probes:
+            rows = self._list_rows[self._list_offsets[probe]:self._list_offsets[probe + 1]]
+            if self._alive is not None:
+                rows = rows[self._alive[rows]]
+            if rows.shape[0] == 0:
+                continue
+            residual = (query - centroids[probe]).reshape(self.subquantizers, 1, dsub)
+            # table[j, c]: squared distance of the j-th residual sub-vector to codeword c
+            table = np.sum((self._codebooks - residual) ** 2, axis=2)
+            candidate_rows.append(rows)
+            candidate_distances.append(table[sub_range, self._codes[rows]].sum(axis=1))
+
+        if not candidate_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = np.concatenate(candidate_rows)
+        distances = np.concatenate(candidate_distances)
+        shortlist = rows[_top_k(-distances, max(self.rerank_candidates, top_k))[0]]
+        # read the shortlist from the memory-mapped file in row order
+        shortlist = np.sort(shortlist)
+        positions, scores = _top_k(self._rows(shortlist) @ query, top_k)
+        return shortlist[positions], scores
+
+    def _train(self) -> None:
+        """
+        Trains the coarse centroids and the PQ codebooks on a sample of the stored embeddings,
+        then encodes every stored embedding and persists the index arrays.
+
+        Raises:
+            ValueError: If the embedding dimension is not divisible by the number of subquantizers.
+        """
+        count, dim = self._embeddings.shape
+        if dim % self.subquantizers != 0:
+            raise ValueError(f"Embedding dimension {dim} is not divisible by pq_subquantizers={self.subquantizers}")
+
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(count, size=min(count, self.train_sample), replace=False))
+        sample = self._rows(sample_rows)
+
+        centroids = _kmeans(sample, min(self.nlist, sample.shape[0]), rng)
+        residuals = sample - centroids[_assign(sample, centroids)]
+        dsub = dim // self.subquantizers
+        codewords = min(self.__codewords, sample.shape[0])
+        codebooks = np.empty((self.subquantizers, self.__codewords, dsub), dtype=np.float32)
+        for j in range(self.subquantizers):
+            codebooks[j, :codewords] = _kmeans(residuals[:, j * dsub:(j + 1) * dsub], codewords, rng)
+        # with fewer samples than codewords, pad with copies of the first codeword; ties resolve to the lowest code
+        codebooks[:, codewords:] = codebooks[:, :1]
+
+        self._centroids = centroids
+        self._codebooks = codebooks
+        np.save(os.path.join(self.path, self.__index_files["centroids"]), centroids)
+        np.save(os.path.join(self.path, self.__index_files["codebooks"]), codebooks)
+
+        self._write_codes(*self._encode(first=0), start=0)
+        self._set_codes(count)
+
+    def _encode(self, first: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Assigns the stored rows from `first` on to their closest coarse centroid and encodes their residuals with the PQ codebooks.
+
+        Args:
+            first (int): The first matrix row to encode.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The uint8 codes, one row per encoded row, and the inverted list of every encoded row.
+        """
+        count, dim = self._embeddings.shape
+        dsub = dim // self.subquantizers
+        codes = np.empty((count - first, self.subquantizers), dtype=np.uint8)
+        lists = np.empty(count - first, dtype=np.int32)
+        for start in range(0, count - first, self.__encode_batch):
+            batch = self._rows(slice(first + start, first + start + self.__encode_batch))
+            assigned = _assign(batch, self._centroids)
+            residuals = batch - self._centroids[assigned]
+            for j in range(self.subquantizers):
+                codes[start:start + batch.shape[0], j] = _assign(residuals[:, j * dsub:(j + 1) * dsub], self._codebooks[j])
+            lists[start:start + batch.shape[0]] = assigned
+        return codes, lists
+
+    def _encoded_rows(self) -> int:
+        """
+        Returns the number of matrix rows whose codes are stored, recorded in the sidecar database.
+        """
+        row = self._connection.execute("SELECT encoded FROM pq_codes").fetchone()
+        if row is not None:
+            return row[0]
+        # code files written before the count was recorded hold exactly the encoded rows
+        return np.load(os.path.join(self.path, self.__index_files["codes"]), mmap_mode="r").shape[0]
+
+    def _write_codes(self, codes: np.ndarray, lists: np.ndarray, start: int) -> None:
+        """
+        Writes the codes and inverted lists of the rows from `start` on in place, growing the files like the embeddings
+        matrix, then records the number of encoded rows.
+        """
+        # release the mappings of the files, a grown file can't replace them on Windows otherwise
+        self._codes = self._lists = None
+        self._append_rows(os.path.join(self.path, self.__index_files["codes"]), codes, start)
+        self._append_rows(os.path.join(self.path, self.__index_files["lists"]), lists, start)
+        self._connection.execute("DELETE FROM pq_codes")
+        self._connection.execute("INSERT INTO pq_codes (encoded) VALUES (?)", (start + len(codes),))
+        self._connection.commit()
+
+    def _set_codes(self, count: int) -> None:
+        """
+        Memory-maps the codes of the first `count` rows and groups the rows by inverted list.
+        """
+        self._codes = np.load(os.path.join(self.path, self.__index_files["codes"]), mmap_mode="r")[:count]
+        self._lists = np.load(os.path.join(self.path, self.__index_files["lists"]), mmap_mode="r")[:count]
+        self._list_rows = np.argsort(self._lists, kind="stable")
+        self._list_offsets = np.searchsorted(self._lists[self._list_rows], np.arange(self._centroids.shape[0] + 1))
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Returns the index of the closest centroid (squared L2 distance) for every vector.
+    """
+    distances = np.sum(centroids * centroids, axis=1) - 2 * (vectors @ centroids.T)
+    return np.argmin(distances, axis=1)
+
+
+def _kmeans(vectors: np.ndarray, k: int, rng: np.random.Generator, iterations: int = 20) -> np.ndarray:
+    """
+    Clusters the vectors with Lloyd's k-means, starting from `k` distinct random vectors.
+
+    Empty clusters are restarted from random vectors.
+
+    Args:
+        vectors (np.ndarray): The training vectors, one per row.
+        k (int): The number of clusters; at most the number of vectors.
+        rng (np.random.Generator): The random generator used for initialisation.
+        iterations (int): The number of Lloyd iterations. Defaults to 20.
+
+    Returns:
+        np.ndarray: The float32 centroids, one per row.
+    """
+    centroids = vectors[rng.choice(vectors.shape[0], size=k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assigned = _assign(vectors, centroids)
+        counts = np.bincount(assigned, minlength=k)
+        order = np.argsort(assigned, kind="stable")
+        clusters = np.flatnonzero(counts)
+        # sum the vectors of every non-empty cluster in one pass over the sorted rows
+        sums = np.add.reduceat(vectors[order], np.concatenate([[0], np.cumsum(counts[clusters])[:-1]]), axis=0)
+        centroids[clusters] = sums / counts[clusters, None]
+        empty = counts == 0
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(vectors.shape[0], size=int(empty.sum()), replace=False)]
+    return centroids
@@ -1,13 +1,15 @@
+from datetime import datetime
 from typing import Any, Dict
+from mini_local_rag.document_manifest import CatalogEntry
 from mini_local_rag.pipeline import Step
 from rich.markdown import Markdown
-from langchain_core.documents import Document
 
 class CreateDisplayOutputStep(Step):
     """
     A pipeline step that generates a Markdown output displaying a list of documents.
 
-    This step formats the list of documents in a Markdown table and stores the resulting 
+    This step formats the page of documents read from the catalog in a Markdown table, with their
+    number of chunks, size, parsing profile and ingestion time, and stores the resulting 
     Markdown in the pipeline's context for display or further processing.
 
     Attributes:
@@ -33,17 +35,35 @@ class CreateDisplayOutputStep(Step):
         Updates:
             context['output'] (Markdown): A Markdown formatted string containing a table of documents.
         """
-        documents:list[Document] = context.get("documents",[])
+        documents:list[CatalogEntry] = context.get("documents",[])
+        total:int = context.get("total",len(documents))
+        page:int = max(1,context.get("page",1))
+        page_size:int = max(1,context.get("page_size",len(documents) or 1))
+        first = (page-1)*page_size
         
         markdown:list[str] = []
         markdown.append("")
         markdown.append("# Documents")
-        markdown.append("| idx | Document |")
-        markdown.append("|-----------|---------|")
+        markdown.append("| idx | Document | Chunks | Size | Profile | Ingested |")
+        markdown.append("|-----------|---------|---------|---------|---------|---------|")
 
         for idx, doc in enumerate(documents):
-            markdown.append( f"| {1+idx} | {doc} |")
+            chunks = "-" if doc.chunks is None else doc.chunks
+            ingested_at = datetime.fromtimestamp(doc.ingested_at/1e9).strftime("%Y-%m-%d %H:%M")
+            markdown.append( f"| {first+1+idx} | {doc.path} | {chunks} | {_format_size(doc.size)} | {doc.profile or '-'} | {ingested_at} |")
 
+        markdown.append("")
+        pages = max(1,-(-total//page_size))
+        markdown.append(f"Page {page} of {pages}, {total} documents")
         markdown.append("----")
         markdown.append("")
-        context["output"]=Markdown("\n".join(markdown))
\ No newline at end of file
+        context["output"]=Markdown("\n".join(markdown))
+
+
+def _format_size(size:int) -> str:
+    """Formats a size in bytes with a binary unit, e.g. 1.5 MiB."""
+    for unit in ("B","KiB","MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
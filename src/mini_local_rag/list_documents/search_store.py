@@ -1,45 +1,47 @@
 from typing import Any, Dict
+from mini_local_rag.document_manifest import DocumentManifest
 from mini_local_rag.pipeline import Step
-from mini_local_rag.vector_store import VectorStore
 
 
 class SearchExistingDocumentsStep(Step):
     """
-    A pipeline step that searches for documents in a vector store.
+    A pipeline step that reads a page of the ingested documents from the document catalog.
 
-    This step queries the vector store to retrieve the list of documents and stores
-    the result in the provided context.
+    The catalog holds one row per file, so listing the documents doesn't depend on the number of stored chunks.
 
     Attributes:
-        label (str): A label identifying this step ("Searching vector store for documents").
-        vector_store (VectorStore): The vector store instance used to retrieve documents.
+        label (str): A label identifying this step ("Searching document catalog").
+        manifest (DocumentManifest): The manifest of the ingested files, used as the document catalog.
 
     Methods:
         execute(context: Dict[str, Any]) -> None:
-            Executes the step by searching the vector store for documents and 
+            Executes the step by reading the requested page of the catalog and
             storing the result in the context.
     """
-    label = "Searching vector store for documents"
-    def __init__(self,vector_store:VectorStore):
+    label = "Searching document catalog"
+    def __init__(self,manifest:DocumentManifest):
         """
-        Initializes the step with the given vector store.
+        Initializes the step with the given document catalog.
 
         Args:
-            vector_store (VectorStore): The vector store instance used to search for documents.
+            manifest (DocumentManifest): The manifest of the ingested files, used as the document catalog.
         """
-        self.vector_store=vector_store
+        self.manifest=manifest
 
     def execute(self, context: Dict[str, Any]) -> None:
         """
         Executes the document search step.
 
-        Queries the vector store for a list of documents and stores the result 
-        in the context under the 'documents' key.
+        Reads the page `context['page']` (starting at 1) of `context['page_size']` documents whose path
+        contains `context['search']`, when given, and stores it in the context.
 
         Args:
-            context (Dict[str, Any]): The context containing shared data for the pipeline.
+            context (Dict[str, Any]): The context containing the page, the page size and the optional search text.
 
         Updates:
-            context['documents'] (List[Document]): The list of documents retrieved from the vector store.
+            context['documents'] (List[CatalogEntry]): The documents of the page, ordered by path.
+            context['total'] (int): The number of documents matching the search.
         """
-        context['documents'] =self.vector_store.listDocuments()
\ No newline at end of file
+        page = max(1,context["page"])
+        page_size = max(1,context["page_size"])
+        context['documents'],context['total'] = self.manifest.catalog(offset=(page-1)*page_size,limit=page_size,search=context.get("search"))
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Optional
+import unicodedata
+
+import numpy as np
+
+from mini_local_rag.config import Config
+
+
+class MinHashIndex:
+    """
+    A persistent MinHash/LSH index of the stored chunks, used to find exact and near-duplicate chunks before embedding.
+
+    The text of a chunk is normalized (Unicode NFC, lowercase, words only) and split into shingles of `shingle_size`
+    consecutive words. Its MinHash signature holds, for each of `num_perm` hash functions, the smallest hash of its
+    shingles; the fraction of equal values between two signatures estimates the Jaccard similarity of their shingle sets.
+    The signatures are split into `bands` bands, and chunks sharing the hash of any band are candidates, so only a few
+    signatures are compared per lookup. A candidate is a duplicate when its estimated similarity reaches `threshold`.
+
+    The index also keeps the duplicate chunks that were not stored, as references to the surviving chunk with their own
+    file path and headers, so the provenance of a duplicate is not lost.
+
+    Everything is stored in a SQLite file under `config.data_folder`.
+
+    Attributes:
+        __index_file (str): The name of the index file inside the data folder.
+        __prime (int): The Mersenne prime modulus of the hash functions.
+        __seed (int): The seed of the hash function parameters, fixed so signatures are comparable across runs.
+        path (str): The path of the SQLite database file.
+        num_perm (int): The number of hash functions of a signature, retrieved from `config.dedup_num_perm`.
+        bands (int): The number of LSH bands, retrieved from `config.dedup_bands`.
+        threshold (float): The estimated Jaccard similarity of duplicates, retrieved from `config.dedup_threshold`.
+        shingle_size (int): The number of words of a shingle, retrieved from `config.dedup_shingle_size`.
+    """
+
+    __index_file: str = "minhash_index.db"
+    __prime: int = (1 << 61) - 1
+    __seed: int = 1
+
+    def __init__(self, config: Config):
+        """
+        Opens (or creates) the index database.
+
+        Args:
+            config (Config): The configuration containing the data folder and the deduplication settings.
+
+        Raises:
+            ValueError: If `config.dedup_bands` doesn't divide `config.dedup_num_perm`.
+        """
+        if config.dedup_num_perm % config.dedup_bands != 0:
+            raise ValueError(f"dedup_bands ({config.dedup_bands}) must divide dedup_num_perm ({config.dedup_num_perm})")
+
+        self.num_perm = config.dedup_num_perm
+        self.bands = config.dedup_bands
+        self.threshold = config.dedup_threshold
+        self.shingle_size = config.dedup_shingle_size
+        rng = np.random.default_rng(self.__seed)
+        self._a = rng.integers(1, self.__prime, self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, self.__prime, self.num_perm, dtype=np.uint64)
+
+        cwd = os.getcwd()
+        self.path = os.path.join(cwd, config.data_folder, self.__index_file)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS signatures (id TEXT PRIMARY KEY, signature BLOB NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, bucket INTEGER NOT NULL, id TEXT NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS bands_bucket ON bands(band, bucket)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS bands_id ON bands(id)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS duplicates (file_path TEXT NOT NULL, id TEXT NOT NULL, headers TEXT NOT NULL, survivor_id TEXT NOT NULL, PRIMARY KEY (file_path, id))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS duplicates_survivor ON duplicates(survivor_id)")
+        self._connection.commit()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Computes the MinHash signature of a text.
+
+        Args:
+            text (str): The text of a chunk.
+
+        Returns:
+            Optional[np.ndarray]: The `num_perm` minimum hashes, or None if the text has no words.
+        """
+        words = re.findall(r"\w+", unicodedata.normalize("NFC", text).lower())
+        if not words:
+            return None
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[start:start + size]) for start in range(len(words) - size + 1)}
+        hashes = np.array([int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little") for shingle in shingles], dtype=np.uint64)
+        # universal hashing (a * x + b) mod p, the products wrap around in uint64 like other MinHash implementations
+        return ((hashes[:, None] * self._a + self._b) % np.uint64(self.__prime)).min(axis=0)
+
+    def buckets(self, signature: np.ndarray) -> list[tuple[int, int]]:
+        """
+        Returns the (band, bucket) pairs of a signature, chunks sharing any pair are duplicate candidates.
+        """
+        rows = self.num_perm // self.bands
+        return [
+            (band, int.from_bytes(hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(), "little", signed=True))
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """
+        Estimates the Jaccard similarity of two signatures.
+        """
+        return float(np.mean(first == second))
+
+    def find(self, signature: np.ndarray, exclude: set[str]) -> Optional[str]:
+        """
+        Finds the most similar stored chunk whose estimated similarity reaches `threshold`.
+
+        Args:
+            signature (np.ndarray): The signature of the chunk.
+            exclude (set[str]): The ids of the chunks that can't be used as survivor, e.g. because they are being deleted.
+
+        Returns:
+            Optional[str]: The id of the duplicated chunk, or None if the chunk has no duplicate.
+        """
+        buckets = self.buckets(signature)
+        conditions = " OR ".join(["(band = ? AND bucket = ?)"] * len(buckets))
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT id, signature FROM signatures WHERE id IN (SELECT id FROM bands WHERE {conditions})",
+                [value for bucket in buckets for value in bucket]
+            ).fetchall()
+
+        best, best_similarity = None, self.threshold
+        for id, blob in rows:
+            if id in exclude:
+                continue
+            similarity = self.similarity(signature, np.frombuffer(blob, dtype=np.uint64))
+            if similarity >= best_similarity:
+                best, best_similarity = id, similarity
+        return best
+
+    def add(self, signatures: dict[str, np.ndarray]) -> None:
+        """
+        Adds the signatures of stored chunks to the index.
+
+        Args:
+            signatures (dict[str, np.ndarray]): The signatures by chunk id.
+        """
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO signatures (id, signature) VALUES (?, ?)",
+                [(id, signature.tobytes()) for id, signature in signatures.items()]
+            )
+            self._connection.executemany("DELETE FROM bands WHERE id = ?", [(id,) for id in signatures])
+            self._connection.executemany(
+                "INSERT INTO bands (band, bucket, id) VALUES (?, ?, ?)",
+                [(band, bucket, id) for id, signature in signatures.items() for band, bucket in self.buckets(signature)]
+            )
+            self._connection.commit()
+
+    def delete(self, ids: list[str]) -> None:
+        """
+        Removes the chunks from the index.
+
+        Args:
+            ids (list[str]): The ids of the deleted chunks.
+        """
+        with self._lock:
+            self._connection.executemany("DELETE FROM signatures WHERE id = ?", [(id,) for id in ids])
+            self._connection.executemany("DELETE FROM bands WHERE id = ?", [(id,) for id in ids])
+            self._connection.commit()
+
+    def replace_duplicates(self, file_path: str, duplicates: list[tuple[str, str, str]]) -> None:
+        """
+        Replaces the duplicate chunks recorded for a file.
+
+        Args:
+            file_path (str): The path of the file.
+            duplicates (list[tuple[str, str, str]]): The id, headers and surviving chunk id of every duplicate chunk of the file.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM duplicates WHERE file_path = ?", (file_path,))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO duplicates (file_path, id, headers, survivor_id) VALUES (?, ?, ?, ?)",
+                [(file_path, id, headers, survivor_id) for id, headers, survivor_id in duplicates]
+            )
+            self._connection.commit()
+
+    def referenced(self, ids: list[str], except_file: str) -> set[str]:
+        """
+        Returns the chunks among `ids` that are the survivor of a duplicate of another file than `except_file`.
+        """
+        with self._lock:
+            return {
+                row[0] for id in ids
+                for row in self._connection.execute(
+                    "SELECT survivor_id FROM duplicates WHERE survivor_id = ? AND file_path != ? LIMIT 1", (id, except_file)
+                )
+            }
+
+    def duplicates_of(self, ids: list[str]) -> dict[str, list[dict[str, str]]]:
+        """
+        Returns the provenance of the duplicates of the given surviving chunks.
+
+        Args:
+            ids (list[str]): The ids of surviving chunks.
+
+        Returns:
+            dict[str, list[dict[str, str]]]: The file path and headers of every duplicate, by surviving chunk id.
+                                             Chunks without duplicates are left out.
+        """
+        found: dict[str, list[dict[str, str]]] = {}
+        with self._lock:
+            for id in ids:
+                for file_path, headers in self._connection.execute(
+                    "SELECT file_path, headers FROM duplicates WHERE survivor_id = ? ORDER BY file_path, headers", (id,)
+                ):
+                    found.setdefault(id, []).append({"file_path": file_path, "headers": headers})
+        return found
@@ -0,0 +1,67 @@
+import hashlib
+import os
+from typing import Optional
+
+from mini_local_rag.config import Config
+from mini_local_rag.sqlite_cache import SqliteLRUCache
+
+
+class ParseCheckpoints:
+    """
+    A persistent store of the markdown of parsed and captioned PDFs, stored in a SQLite file under `config.data_folder`.
+
+    Parsing and captioning are by far the slowest stages of an ingestion. Their output is saved as a checkpoint,
+    so an ingestion that failed in a later stage (e.g. because Ollama restarted while embedding) resumes from the
+    markdown instead of parsing the file again. The checkpoint key is the hash of the file content, the parsing
+    profile and every setting that changes the captions, so a checkpoint is never reused for a different output.
+
+    Attributes:
+        __checkpoint_file (str): The name of the checkpoint file inside the data folder.
+        __version (int): The version of the checkpoint format, part of the key.
+    """
+
+    __checkpoint_file: str = "parse_checkpoints.db"
+    __version: int = 1
+
+    def __init__(self, config: Config):
+        """
+        Opens (or creates) the checkpoint store.
+
+        Args:
+            config (Config): The configuration containing the data folder, the checkpoint limit and the captioning settings.
+        """
+        self.config = config
+        cwd = os.getcwd()
+        self._cache = SqliteLRUCache(path=os.path.join(cwd, config.data_folder, self.__checkpoint_file), max_entries=config.parse_checkpoint_max_entries)
+
+    def key(self, sha256: str, profile: str) -> str:
+        """
+        Builds the checkpoint key of a file.
+
+        Args:
+            sha256 (str): The SHA-256 hash of the file content.
+            profile (str): The parsing profile of the file.
+
+        Returns:
+            str: The hash of the file hash, the parsing profile and the captioning settings.
+        """
+        prompt_hash = hashlib.sha256(self.config.image_to_text_prompt.encode("utf-8")).hexdigest()
+        parts = [
+            str(self.__version), sha256, profile,
+            self.config.vision_model, prompt_hash,
+            str(self.config.caption_min_image_edge), str(self.config.caption_max_image_edge), str(self.config.caption_jpeg_quality),
+        ]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def load(self, key: str) -> Optional[str]:
+        """
+        Returns the markdown saved under the key, or None if there is no checkpoint.
+        """
+        value = self._cache.get_many([key]).get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def save(self, key: str, markdown: str) -> None:
+        """
+        Saves the markdown of a file under its key.
+        """
+        self._cache.put_many({key: markdown.encode("utf-8")})
@@ -96,6 +96,13 @@ class Pipeline:
         For each step, it measures the execution time and logs any errors. It also displays
         progress to the console.
 
+        A step can stop the pipeline early by setting context['stop_reason']; the remaining steps are
+        skipped and the reason is added to the log record.
+
+        A step can also resume the pipeline from a later stage by setting context['resume_from'] to a step class,
+        e.g. when the output of the steps in between was restored from a checkpoint; the steps before the first
+        step of that class are skipped and listed in the log record.
+
         At the end displays the output from context['output'] if exist
 
         Logs using StructuredLogger after completion
@@ -109,8 +116,16 @@ class Pipeline:
                             TaskProgressColumn(),
                             transient=False) as progress:
                 task = progress.add_task(self.label, total=len(self.steps), time_remaining=None)
+                resume_from = None
                 
                 for idx,step in enumerate(self.steps):
+                    if resume_from is not None:
+                        if not isinstance(step, resume_from):
+                            progress.update(task, advance=1)
+                            self.context["log_record"].resumed["skipped"].append(f"{step.label}({step.__class__.__name__})")
+                            continue
+                        resume_from = None
+
                     progress.update(task, description=f"{self.label} Status: {step.label}")                                    
                     start = time.time()
                     try:    
@@ -121,6 +136,20 @@ class Pipeline:
                         progress.update(task, advance=1)
                         diff = round((time.time() - start) , 2)
                         self.latency [f"{idx}-{step.label}({step.__class__.__name__})"] = diff
+
+                    # a step can skip the stages whose output it restored
+                    resume_from = self.context.pop("resume_from",None)
+                    if resume_from is not None:
+                        self.context["log_record"].resumed = {"step":f"{step.label}({step.__class__.__name__})","skipped":[]}
+
+                    # a step can end the pipeline early, e.g. when there is nothing left to do
+                    stop_reason = self.context.get("stop_reason",None)
+                    if stop_reason is not None:
+                        progress.update(task, completed=len(self.steps))
+                        log_record:LogRecord =self.context.get("log_record",None)
+                        if log_record is not None :
+                            log_record.stopped = {"step":f"{step.label}({step.__class__.__name__})","reason":stop_reason}
+                        break
         except Exception as e: 
             log_record:LogRecord =self.context.get("log_record",None)
             if log_record is not None :
@@ -1,59 +1,162 @@
+from typing import Optional
+
 from mini_local_rag.ask.draft_response import DraftResponseStep
-from mini_local_rag.ask.generate_embedding import GenerateQuestionEmbeddingsStep
+from mini_local_rag.ask.hybrid_retrieval import HybridRetrievalStep
 from mini_local_rag.ask.log_retrieval import AppendRetrievalLogsStep
-from mini_local_rag.ask.retrieve_tf_idf import InvokeTFIDFRetrieverStep
-from mini_local_rag.ask.retrieve_vector import RetrieveFromVectorStoreStep
+from mini_local_rag.batch_ingestion import BatchIngestion
+from mini_local_rag.compression_report.create_report import CreateCompressionReportStep
+from mini_local_rag.compression_report.embed_stored_sample import EmbedStoredSampleStep
+from mini_local_rag.chunk_store import ChunkStore, open_chunk_store
 from mini_local_rag.config import Config
+from mini_local_rag.document_manifest import DocumentManifest, open_document_manifest
 from mini_local_rag.embedder import Embedder, Qwen3Embedder
+from mini_local_rag.embedding_cache import CachedEmbedder
+from mini_local_rag.embedding_compression import TruncatedEmbedder
+from mini_local_rag.flat_vector_store import FlatVectorStore
+from mini_local_rag.ivf_pq_vector_store import IvfPqVectorStore
+from mini_local_rag.ingest.check_manifest import CheckManifestStep
 from mini_local_rag.ingest.chunk_markdown import MarkdownChunkingStep
 from mini_local_rag.ingest.convert_markdown import MarkdownConvertStep
+from mini_local_rag.ingest.deduplicate_chunks import DeduplicateChunksStep
+from mini_local_rag.ingest.diff_chunks import DiffChunksStep
 from mini_local_rag.ingest.generate_embeddings import GenerateEmbeddingsStep
+from mini_local_rag.ingest.load_checkpoint import LoadCheckpointStep
 from mini_local_rag.ingest.pdf_parse import PdfParseStep
 from mini_local_rag.ingest.persist_changes import PersistChangesStep
 from mini_local_rag.ingest.replace_images import ImageReplaceStep
+from mini_local_rag.ingest.save_checkpoint import SaveCheckpointStep
+from mini_local_rag.ingest.stream_chunks import StreamChunksStep
+from mini_local_rag.ingest.update_manifest import UpdateManifestStep
+from mini_local_rag.ingest.update_minhash_index import UpdateMinHashIndexStep
 from mini_local_rag.ingest.update_tf_idf_retreiver import UpdateTFIDFRetrieverStep
 from mini_local_rag.list_documents.create_display_output import CreateDisplayOutputStep
 from mini_local_rag.list_documents.search_store import SearchExistingDocumentsStep
 from mini_local_rag.logger.structured_logger import StructuredLogger
-from mini_local_rag.pipeline import Pipeline
-from mini_local_rag.vector_store import VectorStore
+from mini_local_rag.minhash_index import MinHashIndex
+from mini_local_rag.parse_checkpoints import ParseCheckpoints
+from mini_local_rag.pipeline import Pipeline, Step
+from mini_local_rag.vector_store import ChromaVectorStore, VectorStore
 
 
 class PipelineBuilder:
+    vector_store_backends = {
+        "chroma": ChromaVectorStore,
+        "flat": FlatVectorStore,
+        "ivf_pq": IvfPqVectorStore,
+    }
     def __init__(self,config:Config):
         self.config=config
-        self.embedder: Embedder = Qwen3Embedder()
-        self.vector_store=VectorStore(config=config)
+        self.embedder: Embedder = self.create_embedder(config)
+        self.vector_store: VectorStore = self.create_vector_store(config)
+        self.chunk_store: ChunkStore = open_chunk_store(config=config,vector_store=self.vector_store)
         self.logger = StructuredLogger(config=config)
-        self.ingestion_steps =[
-                    PdfParseStep(config=config),
+        self.manifest: DocumentManifest = open_document_manifest(config=config,vector_store=self.vector_store)
+        self.checkpoints = ParseCheckpoints(config=config)
+        self.minhash_index = MinHashIndex(config=config)
+        # steps run for every parsed document, shared by single file and batch ingestion
+        self.document_steps = [
                     ImageReplaceStep(config=config),
                     MarkdownConvertStep(),
-                    MarkdownChunkingStep(config=config),
-                    GenerateEmbeddingsStep(embedder=self.embedder),
-                    PersistChangesStep(vector_store=self.vector_store),
-                    UpdateTFIDFRetrieverStep(config=config)
+                    SaveCheckpointStep(checkpoints=self.checkpoints),
+                    *self.create_chunk_steps(config),
+                ]
+        self.ingestion_steps =[
+                    CheckManifestStep(manifest=self.manifest,config=config),
+                    LoadCheckpointStep(checkpoints=self.checkpoints,config=config),
+                    PdfParseStep(config=config),
+                    *self.document_steps,
+                    UpdateTFIDFRetrieverStep(config=config),
+                    UpdateManifestStep(manifest=self.manifest,config=config)
                 ]
         self.ask_steps = [
-            GenerateQuestionEmbeddingsStep(embedder=self.embedder),
-            RetrieveFromVectorStoreStep(vector_store=self.vector_store),
-            InvokeTFIDFRetrieverStep(config=self.config),
+            HybridRetrievalStep(embedder=self.embedder,vector_store=self.vector_store,chunk_store=self.chunk_store,config=self.config,duplicates=self.minhash_index),
             AppendRetrievalLogsStep(),
             DraftResponseStep(config=self.config)
         ]
         self.get_documents_steps=[
-            SearchExistingDocumentsStep(vector_store=self.vector_store),
+            SearchExistingDocumentsStep(manifest=self.manifest),
             CreateDisplayOutputStep()
         ]
 
-    def get_documents(self) -> Pipeline:
+    def create_embedder(self,config:Config) -> Embedder:
+        """Create the cached embedder, truncating the embeddings to `config.embedding_dimensions` when set."""
+
+        if config.embedding_dimensions is None:
+            return CachedEmbedder(embedder=Qwen3Embedder(),config=config)
+        return CachedEmbedder(embedder=TruncatedEmbedder(embedder=Qwen3Embedder(),dimensions=config.embedding_dimensions),config=config)
+
+    def create_vector_store(self,config:Config) -> VectorStore:
+        """Create the vector store backend selected by `config.vector_store_backend`."""
+
+        backend = self.vector_store_backends.get(config.vector_store_backend)
+        if backend is None:
+            raise ValueError(f"Unknown vector store backend '{config.vector_store_backend}', expected one of {sorted(self.vector_store_backends)}")
+        return backend(config=config)
+
+    def create_chunk_steps(self,config:Config) -> list[Step]:
+        """
+        Create the steps turning the markdown into stored chunks, streamed in batches when `config.streaming_ingestion` is set.
+        Duplicate chunks are removed when `config.deduplicate_chunks` is set.
+        """
+
+        chunker = MarkdownChunkingStep(config=config)
+        if config.streaming_ingestion:
+            deduplicator = DeduplicateChunksStep(index=self.minhash_index) if config.deduplicate_chunks else None
+            return [StreamChunksStep(chunker=chunker,embedder=self.embedder,vector_store=self.vector_store,chunk_store=self.chunk_store,config=config,deduplicator=deduplicator)]
+        if not config.deduplicate_chunks:
+            return [
+                chunker,
+                DiffChunksStep(vector_store=self.vector_store,config=config),
+                GenerateEmbeddingsStep(embedder=self.embedder,config=config),
+                PersistChangesStep(vector_store=self.vector_store,chunk_store=self.chunk_store),
+            ]
+        return [
+            chunker,
+            DiffChunksStep(vector_store=self.vector_store,config=config),
+            DeduplicateChunksStep(index=self.minhash_index),
+            GenerateEmbeddingsStep(embedder=self.embedder,config=config),
+            PersistChangesStep(vector_store=self.vector_store,chunk_store=self.chunk_store),
+            UpdateMinHashIndexStep(index=self.minhash_index),
+        ]
+
+    def get_documents(self,page:int=1,page_size:Optional[int]=None,search:Optional[str]=None) -> Pipeline:
 
-        return Pipeline(label=f"Finding existing documents",context={},steps=self.get_documents_steps,config=self.config,logger=self.logger)
+        context = {"page":page,"page_size":page_size or self.config.documents_page_size}
+        if search:
+            context["search"] = search
+        return Pipeline(label=f"Finding existing documents",context=context,steps=self.get_documents_steps,config=self.config,logger=self.logger)
 
-    def get_ingestion_pipeline(self,file_path:str) -> Pipeline:
+    def get_ingestion_pipeline(self,file_path:str,profile:Optional[str]=None) -> Pipeline:
 
-        return Pipeline(label=f"Ingesting file: {file_path}",context={"file_path":file_path},steps=self.ingestion_steps,config=self.config,logger=self.logger)
+        context = {"file_path":file_path}
+        if profile is not None:
+            context["parse_profile"] = profile
+        return Pipeline(label=f"Ingesting file: {file_path}",context=context,steps=self.ingestion_steps,config=self.config,logger=self.logger)
     
+    def get_batch_ingestion(self,file_paths:list[str],workers:Optional[int]=None,profile:Optional[str]=None) -> BatchIngestion:
+
+        return BatchIngestion(
+            file_paths=file_paths,
+            workers=workers or self.config.parse_workers,
+            profile=profile or self.config.parse_profile,
+            config=self.config,
+            manifest=self.manifest,
+            checkpoints=self.checkpoints,
+            document_steps=self.document_steps,
+            index_steps=[UpdateTFIDFRetrieverStep(config=self.config)],
+            logger=self.logger
+        )
+
+    def get_compression_report(self,sample:Optional[int]=None) -> Pipeline:
+
+        # the sample is embedded at the full width of the model, the reference of the truncated embeddings
+        embedder = self.embedder if self.config.embedding_dimensions is None else CachedEmbedder(embedder=Qwen3Embedder(),config=self.config)
+        steps = [
+            EmbedStoredSampleStep(vector_store=self.vector_store,chunk_store=self.chunk_store,embedder=embedder,config=self.config),
+            CreateCompressionReportStep(config=self.config)
+        ]
+        return Pipeline(label="Compression report",context={"sample":sample or self.config.compression_report_sample},steps=steps,config=self.config,logger=self.logger)
+
     def get_ask_pipeline(self,question:str)-> Pipeline:
         
         return Pipeline(label="Planning answer",context={"question":question},steps=self.ask_steps,config=self.config,logger=self.logger)
\ No newline at end of file
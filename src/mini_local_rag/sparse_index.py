@@ -0,0 +1,484 @@
+from dataclasses import dataclass
+import heapq
+import json
+import os
+import shutil
+import threading
+from typing import Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from mini_local_rag.config import Config
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """
+    One immutable segment of the index, memory-mapped from its folder.
+
+    The postings are stored term-major: the postings of `terms[i]` are the slice
+    `term_offsets[i]:term_offsets[i + 1]` of `postings_docs` and `postings_tf`.
+
+    Attributes:
+        name (str): The name of the segment folder.
+        terms (np.ndarray): The sorted hashed term ids present in the segment.
+        term_offsets (np.ndarray): The start of the postings of every term, followed by the total number of postings.
+        postings_docs (np.ndarray): The segment row of every posting.
+        postings_tf (np.ndarray): The term frequency of every posting.
+        doc_lengths (np.ndarray): The number of tokens of every row.
+        ids (np.ndarray): The chunk id of every row.
+    """
+    name: str
+    terms: np.ndarray
+    term_offsets: np.ndarray
+    postings_docs: np.ndarray
+    postings_tf: np.ndarray
+    doc_lengths: np.ndarray
+    ids: np.ndarray
+
+    def to_counts(self, n_features: int) -> sparse.csr_matrix:
+        """Rebuilds the term counts of the segment, one row per chunk, used when merging segments."""
+
+        columns = np.repeat(self.terms, np.diff(self.term_offsets))
+        return sparse.csr_matrix(
+            (np.asarray(self.postings_tf), (np.asarray(self.postings_docs), columns)),
+            shape=(self.ids.shape[0], n_features),
+        )
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """
+    An immutable, query-ready view of the index at one version of its metadata file.
+
+    Attributes:
+        version (tuple): The inode, modification time and size of the metadata file the snapshot was built from.
+        segments (list[_Segment]): The segments of the index, in insertion order.
+        alive (list[Optional[np.ndarray]]): The mask of the live rows of every segment, or None when no row is deleted.
+        n_docs (int): The number of chunks in the index.
+        avg_length (float): The average number of tokens per chunk.
+        df (np.ndarray): The document frequency of every feature, memory-mapped.
+    """
+    version: tuple
+    segments: list
+    alive: list
+    n_docs: int
+    avg_length: float
+    df: np.ndarray
+
+
+class SparseIndex:
+    """
+    An append-only BM25 index over document chunks, stored as inverted postings lists.
+
+    Terms are mapped to a fixed number of features with a hashing vectorizer, so the vocabulary never
+    changes and new chunks don't require rebuilding the existing ones. Each `add` call writes the postings
+    of the new chunks as a new segment and updates the persisted document frequencies and total length,
+    so its cost depends only on the size of the new chunks. Small trailing segments are merged as they
+    accumulate, so the number of segments grows logarithmically.
+
+    A search reads only the postings of the query terms, scores them with BM25 and keeps the best `k`
+    chunks in a bounded heap, so its cost depends on the posting lengths of the query terms rather than
+    on the size of the corpus.
+
+    Deleting chunks records their segment rows in a tombstone file and removes their terms from the document
+    frequencies and total length; tombstoned rows are skipped by searches and dropped when their segment is merged.
+
+    The index stores chunk ids only; the content and metadata of the results are read from the `ChunkStore`.
+
+    The index is kept in memory between searches and only reloaded when the metadata file changes on disk
+    (new inode, modification time or size). A reload memory-maps only the segments that are not loaded yet.
+    Reloads are serialized with a lock, and searches use immutable snapshots, so a single instance can be
+    shared between threads and long-lived processes.
+
+    The index folder holds:
+    - `meta.json`: the vectorizer settings (the "vocabulary" of a hashed index), the number of chunks,
+      their total length and the list of segments.
+    - `df.npy`: the document frequency of every feature.
+    - one folder per segment with the postings (`terms.npy`, `term_offsets.npy`, `postings_docs.npy`,
+      `postings_tf.npy`), the chunk lengths (`doc_lengths.npy`) and the chunk ids (`ids.npy`),
+      all loadable with `mmap_mode`.
+    - one `tombstones-*.npy` file per segment with deleted rows, holding the deleted row numbers.
+
+    Attributes:
+        __meta_file (str): The name of the metadata file inside the index folder.
+        __df_file (str): The name of the document frequency file inside the index folder.
+        __token_pattern (str): The token pattern of the vectorizer, the same as scikit-learn's `TfidfVectorizer`.
+        __segment_files (tuple[str, ...]): The array files of a segment folder, in `_Segment` field order.
+        path (str): The index folder, retrieved from `config.sparse_index_path`.
+        n_features (int): The number of hashed features, retrieved from `config.sparse_index_features`.
+        k1 (float): The BM25 term frequency saturation, retrieved from `config.bm25_k1`.
+        b (float): The BM25 length normalization, retrieved from `config.bm25_b`.
+    """
+
+    __meta_file: str = "meta.json"
+    __df_file: str = "df.npy"
+    __token_pattern: str = r"(?u)\b\w\w+\b"
+    __segment_files: tuple = ("terms.npy", "term_offsets.npy", "postings_docs.npy", "postings_tf.npy", "doc_lengths.npy", "ids.npy")
+
+    def __init__(self, config: Config):
+        """
+        Initializes the index for the configured folder and reads its vectorizer settings if it exists.
+
+        Args:
+            config (Config): The configuration containing the index folder, the number of features and the BM25 parameters.
+        """
+        cwd = os.getcwd()
+        self.path = os.path.join(cwd, config.sparse_index_path)
+        self.n_features = config.sparse_index_features
+        self.k1 = config.bm25_k1
+        self.b = config.bm25_b
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        token_pattern = self.__token_pattern
+        meta = self._read_meta()
+        if meta is not None:
+            self.n_features = meta["vectorizer"]["n_features"]
+            token_pattern = meta["vectorizer"]["token_pattern"]
+        self._vectorizer = HashingVectorizer(n_features=self.n_features, token_pattern=token_pattern, alternate_sign=False, norm=None)
+
+    def exists(self) -> bool:
+        """Returns whether the index holds any document."""
+
+        meta = self._read_meta()
+        return meta is not None and meta["n_docs"] > 0
+
+    def add(self, documents: list[Document]) -> None:
+        """
+        Appends the documents to the index as a new segment and updates the document frequencies and total length.
+
+        Args:
+            documents (list[Document]): The chunks to add, with `id` in their metadata.
+        """
+        if not documents:
+            return
+
+        meta = self._read_meta() or {
+            "vectorizer": {"n_features": self.n_features, "token_pattern": self._vectorizer.token_pattern},
+            "n_docs": 0,
+            "total_length": 0,
+            "next_segment": 0,
+            "segments": [],
+        }
+        df_path = os.path.join(self.path, self.__df_file)
+        df = np.load(df_path) if os.path.exists(df_path) else np.zeros(self.n_features, dtype=np.int32)
+
+        counts = self._vectorizer.transform([doc.page_content for doc in documents]).tocsr()
+        counts.sum_duplicates()
+        df += np.bincount(counts.indices, minlength=self.n_features).astype(np.int32)
+
+        segments = list(meta["segments"])
+        next_segment = meta["next_segment"]
+        segments.append(self._write_segment(next_segment, counts, np.array([doc.metadata["id"] for doc in documents])))
+        next_segment += 1
+
+        # keep segment sizes decreasing, like a binary counter: O(log n) segments, each chunk rewritten O(log n) times
+        while len(segments) >= 2 and segments[-1]["rows"] >= segments[-2]["rows"]:
+            (older_counts, older_ids), (newer_counts, newer_ids) = self._live_rows(segments[-2]), self._live_rows(segments[-1])
+            merged = self._write_segment(
+                next_segment,
+                sparse.vstack([older_counts, newer_counts], format="csr"),
+                np.concatenate([older_ids, newer_ids]),
+            )
+            next_segment += 1
+            segments[-2:] = [merged]
+
+        # the new segments only become visible once the metadata referencing them is replaced
+        _save_atomic(df_path, lambda file: np.save(file, df))
+        meta = {
+            **meta,
+            "n_docs": meta["n_docs"] + len(documents),
+            "total_length": meta["total_length"] + int(counts.sum()),
+            "next_segment": next_segment,
+            "segments": segments,
+        }
+        _save_atomic(os.path.join(self.path, self.__meta_file), lambda file: file.write(json.dumps(meta).encode("utf-8")))
+        self._remove_unreferenced_segments(meta)
+
+    def delete(self, ids: list[str]) -> None:
+        """
+        Deletes chunks from the index by id. Unknown ids are ignored.
+
+        The rows of the chunks are tombstoned and their terms are removed from the document frequencies
+        and the total length, so the BM25 statistics stay the ones of the live chunks.
+
+        Args:
+            ids (list[str]): The ids of the chunks to delete.
+        """
+        meta = self._read_meta()
+        if meta is None or not ids:
+            return
+
+        df_path = os.path.join(self.path, self.__df_file)
+        df = np.load(df_path)
+        wanted = np.array(ids)
+        next_segment = meta["next_segment"]
+        n_docs, total_length = meta["n_docs"], meta["total_length"]
+        segments = []
+        for entry in meta["segments"]:
+            segment = self._open_segment(entry["name"])
+            tombstones = self._read_tombstones(entry)
+            rows = np.setdiff1d(np.flatnonzero(np.isin(segment.ids, wanted)), tombstones)
+            if rows.shape[0] == 0:
+                segments.append(entry)
+                continue
+
+            # the terms of the deleted rows, read from the postings
+            deleted_postings = np.isin(segment.postings_docs, rows)
+            terms = np.repeat(segment.terms, np.diff(segment.term_offsets))[deleted_postings]
+            df -= np.bincount(terms, minlength=self.n_features).astype(np.int32)
+            n_docs -= rows.shape[0]
+            total_length -= int(np.asarray(segment.doc_lengths[rows]).sum())
+
+            name = f"tombstones-{next_segment:06d}.npy"
+            next_segment += 1
+            np.save(os.path.join(self.path, name), np.union1d(tombstones, rows).astype(np.int32))
+            segments.append({**entry, "tombstones": name})
+
+        if n_docs == meta["n_docs"]:
+            return
+
+        _save_atomic(df_path, lambda file: np.save(file, df))
+        meta = {**meta, "n_docs": n_docs, "total_length": total_length, "next_segment": next_segment, "segments": segments}
+        _save_atomic(os.path.join(self.path, self.__meta_file), lambda file: file.write(json.dumps(meta).encode("utf-8")))
+        self._remove_unreferenced_segments(meta)
+
+    def contains(self, ids: list[str]) -> set[str]:
+        """
+        Returns which of the given chunk ids are held by the index, ignoring the deleted chunks.
+
+        Args:
+            ids (list[str]): The ids of the chunks to look up.
+
+        Returns:
+            set[str]: The ids of the chunks found in the index.
+        """
+        meta = self._read_meta()
+        if meta is None or not ids:
+            return set()
+
+        wanted = np.array(ids)
+        found: set[str] = set()
+        for entry in meta["segments"]:
+            segment = self._open_segment(entry["name"])
+            rows = np.setdiff1d(np.flatnonzero(np.isin(segment.ids, wanted)), self._read_tombstones(entry))
+            found.update(str(id) for id in segment.ids[rows])
+        return found
+
+    def search(self, query: str, k: int = 3) -> list[tuple[str, float]]:
+        """
+        Returns the ids of the `k` chunks with the highest BM25 score for the query.
+
+        Args:
+            query (str): The query text.
+            k (int): The number of chunks to return. Defaults to 3.
+
+        Returns:
+            list[tuple[str, float]]: The best chunk ids and their scores, highest first. Chunks sharing
+                                     no term with the query are not returned.
+        """
+        snapshot = self._refresh()
+        if snapshot is None or k < 1:
+            return []
+
+        terms = np.unique(self._vectorizer.transform([query]).indices).astype(np.int32)
+        if terms.shape[0] == 0:
+            return []
+
+        df = np.asarray(snapshot.df[terms], dtype=np.float64)
+        idf = np.log(1 + (snapshot.n_docs - df + 0.5) / (df + 0.5))
+
+        heap: list[tuple[float, str]] = []
+        for segment, alive in zip(snapshot.segments, snapshot.alive):
+            rows, scores = self._score_segment(segment, terms, idf, snapshot.avg_length)
+            if alive is not None:
+                rows, scores = rows[alive[rows]], scores[alive[rows]]
+            if rows.shape[0] > k:
+                # only the best k rows of a segment can enter the heap
+                best = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[best], scores[best]
+            for row, score in zip(rows, scores):
+                entry = (float(score), str(segment.ids[row]))
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        return [(id, score) for score, id in sorted(heap, reverse=True)]
+
+    def _score_segment(self, segment: _Segment, terms: np.ndarray, idf: np.ndarray, avg_length: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Scores the rows of one segment that contain at least one query term, reading only the postings of those terms.
+
+        Args:
+            segment (_Segment): The segment to score.
+            terms (np.ndarray): The sorted, unique hashed ids of the query terms.
+            idf (np.ndarray): The BM25 IDF weight of every query term.
+            avg_length (float): The average number of tokens per chunk in the index.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The matching segment rows and their BM25 scores.
+        """
+        if segment.terms.shape[0] == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+        positions = np.minimum(np.searchsorted(segment.terms, terms), segment.terms.shape[0] - 1)
+        present = segment.terms[positions] == terms
+
+        rows: list[np.ndarray] = []
+        contributions: list[np.ndarray] = []
+        for position, weight in zip(positions[present], idf[present]):
+            start, end = segment.term_offsets[position], segment.term_offsets[position + 1]
+            docs = np.asarray(segment.postings_docs[start:end])
+            tf = np.asarray(segment.postings_tf[start:end], dtype=np.float64)
+            lengths = np.asarray(segment.doc_lengths[docs], dtype=np.float64)
+            saturation = tf + self.k1 * (1 - self.b + self.b * lengths / avg_length)
+            rows.append(docs)
+            contributions.append(weight * tf * (self.k1 + 1) / saturation)
+
+        if not rows:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+        unique_rows, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        return unique_rows, np.bincount(inverse, weights=np.concatenate(contributions))
+
+    def _refresh(self) -> Optional[_Snapshot]:
+        """
+        Returns the in-memory snapshot, rebuilding it first if the metadata file changed since it was built.
+
+        Only the segments that are not part of the current snapshot are memory-mapped.
+
+        Returns:
+            Optional[_Snapshot]: The current snapshot, or None if the index holds no document.
+        """
+        meta_path = os.path.join(self.path, self.__meta_file)
+        with self._lock:
+            try:
+                stat = os.stat(meta_path)
+            except FileNotFoundError:
+                self._snapshot = None
+                return None
+
+            version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if self._snapshot is not None and self._snapshot.version == version:
+                return self._snapshot
+
+            meta = self._read_meta()
+            if meta is None or meta["n_docs"] == 0:
+                self._snapshot = None
+                return None
+
+            loaded = {segment.name: segment for segment in self._snapshot.segments} if self._snapshot is not None else {}
+            segments = [loaded.get(entry["name"]) or self._open_segment(entry["name"]) for entry in meta["segments"]]
+            alive = []
+            for entry, segment in zip(meta["segments"], segments):
+                tombstones = self._read_tombstones(entry)
+                mask = None
+                if tombstones.shape[0]:
+                    mask = np.ones(segment.ids.shape[0], dtype=bool)
+                    mask[tombstones] = False
+                alive.append(mask)
+
+            self._snapshot = _Snapshot(
+                version=version,
+                segments=segments,
+                alive=alive,
+                n_docs=meta["n_docs"],
+                avg_length=max(meta["total_length"] / meta["n_docs"], 1.0),
+                df=np.load(os.path.join(self.path, self.__df_file), mmap_mode="r"),
+            )
+            return self._snapshot
+
+    def _write_segment(self, number: int, counts: sparse.csr_matrix, ids: np.ndarray) -> dict:
+        """
+        Inverts the term counts of a new segment into postings lists and writes them with the chunk lengths and ids.
+
+        Args:
+            number (int): The sequence number of the segment, used in its folder name.
+            counts (sparse.csr_matrix): The term counts of the chunks, one row per chunk.
+            ids (np.ndarray): The chunk id of every row.
+
+        Returns:
+            dict: The metadata entry of the segment, with its name and number of rows.
+        """
+        by_term = counts.tocsc()
+        by_term.sort_indices()
+        postings_per_term = np.diff(by_term.indptr)
+        terms = np.flatnonzero(postings_per_term)
+        arrays = (
+            terms.astype(np.int32),
+            np.concatenate([[0], np.cumsum(postings_per_term[terms])]).astype(np.int64),
+            by_term.indices.astype(np.int32),
+            by_term.data.astype(np.float32),
+            np.asarray(counts.sum(axis=1)).ravel().astype(np.int32),
+            ids.astype(str),
+        )
+
+        name = f"segment-{number:06d}"
+        segment_path = os.path.join(self.path, name)
+        os.makedirs(segment_path, exist_ok=True)
+        for file, array in zip(self.__segment_files, arrays):
+            np.save(os.path.join(segment_path, file), array)
+        return {"name": name, "rows": int(counts.shape[0])}
+
+    def _live_rows(self, entry: dict) -> tuple[sparse.csr_matrix, np.ndarray]:
+        """
+        Returns the term counts and the ids of the rows of a segment that are not tombstoned.
+        """
+        segment = self._open_segment(entry["name"])
+        counts, ids = segment.to_counts(self.n_features), np.asarray(segment.ids)
+        tombstones = self._read_tombstones(entry)
+        if tombstones.shape[0]:
+            alive = np.ones(ids.shape[0], dtype=bool)
+            alive[tombstones] = False
+            counts, ids = counts[alive], ids[alive]
+        return counts, ids
+
+    def _read_tombstones(self, entry: dict) -> np.ndarray:
+        """
+        Returns the deleted rows of a segment, sorted.
+        """
+        if "tombstones" not in entry:
+            return np.empty(0, dtype=np.int32)
+        return np.load(os.path.join(self.path, entry["tombstones"]))
+
+    def _open_segment(self, name: str) -> _Segment:
+        """
+        Memory-maps the arrays of one segment without copying them.
+        """
+        segment_path = os.path.join(self.path, name)
+        arrays = [np.load(os.path.join(segment_path, file), mmap_mode="r") for file in self.__segment_files]
+        return _Segment(name, *arrays)
+
+    def _remove_unreferenced_segments(self, meta: dict) -> None:
+        """
+        Deletes the folders of merged segments and the replaced tombstone files. Files still mapped by a reader (on Windows) are left for a later call.
+        """
+        referenced = {entry["name"] for entry in meta["segments"]} | {entry["tombstones"] for entry in meta["segments"] if "tombstones" in entry}
+        for name in os.listdir(self.path):
+            if name.startswith("segment-") and name not in referenced:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+            elif name.startswith("tombstones-") and name not in referenced:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    def _read_meta(self) -> Optional[dict]:
+        meta_path = os.path.join(self.path, self.__meta_file)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as file:
+            return json.load(file)
+
+
+def _save_atomic(path: str, write) -> None:
+    """Writes a file through a temporary file and replaces the target, so readers never see a partial file."""
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        write(file)
+    os.replace(tmp_path, path)
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class SqliteLRUCache:
+    """
+    A small persistent key/value cache backed by a SQLite file, with least-recently-used eviction.
+
+    Keys are strings (usually content hashes) and values are raw bytes. Every read refreshes the
+    entry's access time, and every write evicts the least recently used entries once the cache
+    holds more than `max_entries` rows. The connection is shared between threads and guarded by a lock.
+
+    Attributes:
+        path (str): The path of the SQLite database file.
+        max_entries (int): The maximum number of entries kept in the cache.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path (str): The path of the SQLite database file. Missing parent folders are created.
+            max_entries (int): The maximum number of entries kept in the cache.
+
+        Raises:
+            ValueError: If `max_entries` is smaller than 1.
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access INTEGER NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+        self._connection.commit()
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        """
+        Looks up several keys at once and refreshes the access time of the entries found.
+
+        Args:
+            keys (list[str]): The keys to look up.
+
+        Returns:
+            dict[str, bytes]: The cached values of the keys that were found.
+        """
+        found: dict[str, bytes] = {}
+        if not keys:
+            return found
+
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # stay below SQLite's limit of host parameters per statement
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+
+            now = time.time_ns()
+            self._connection.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+            )
+            self._connection.commit()
+        return found
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        """
+        Stores several entries at once and evicts the least recently used entries above the size limit.
+
+        Args:
+            items (dict[str, bytes]): The values to store, by key.
+        """
+        if not items:
+            return
+
+        now = time.time_ns()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, last_access) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()]
+            )
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
@@ -1,10 +1,103 @@
+from abc import ABC, abstractmethod
+from typing import Iterator
+
 import chromadb
 from langchain_core.documents import Document
 
+from mini_local_rag.chunk_batch import ChunkBatch
 from mini_local_rag.config import Config
-     
 
-class VectorStore:
+
+class VectorStore(ABC):
+    """
+    An abstract base class that defines the interface for vector store backends.
+
+    Subclasses store the ids, embeddings and file paths of the chunks and retrieve the ids of the chunks most similar
+    to a query embedding using cosine distance. The texts of the chunks are kept once, in the `ChunkStore`.
+    The backend is selected with `config.vector_store_backend`.
+
+    Attributes:
+        _distance_threshold (float): The maximum cosine distance of a query result.
+
+    Methods:
+        saveAll(chunks: ChunkBatch) -> None: Saves the embeddings of a batch of chunks.
+        search(embdedding: list[float], top_k: int = 3) -> list[tuple[str, float]]: Retrieves the ids and scores of the chunks most similar to the embedding.
+        listDocuments() -> set[str]: Lists the file paths of all documents currently stored.
+        listIds(file_path: str) -> set[str]: Lists the chunk ids stored for a file.
+        delete(ids: list[str]) -> None: Deletes stored chunks by id.
+        iterLegacyChunks() -> Iterator[list[Document]]: Reads the chunk texts stored by previous versions.
+    """
+
+    _distance_threshold: float = 0.35  # Threshold for distance when filtering query results.
+
+    @abstractmethod
+    def saveAll(self,chunks:ChunkBatch) -> None:
+        """
+        Saves the ids, file paths and float32 embeddings of a batch of chunks. The texts are not stored.
+
+        Args:
+            chunks (ChunkBatch): The chunks to be saved.
+        """
+        pass
+
+    @abstractmethod
+    def search(self,embdedding:list[float],top_k = 3) -> list[tuple[str,float]]:
+        """
+        Retrieves the stored chunks most similar to the given embedding.
+
+        Args:
+            embdedding (list[float]): The embedding for which to retrieve similar chunks.
+            top_k (int, optional): The number of top results to return. Default is 3.
+
+        Returns:
+            list[tuple[str, float]]: The ids and cosine similarity scores of up to `top_k` chunks within `_distance_threshold`, most similar first.
+        """
+        pass
+
+    @abstractmethod
+    def listDocuments(self) -> set[str]:
+        """
+        Lists the file paths of all documents currently stored.
+
+        Returns:
+            set[str]: A set of file paths.
+        """
+        pass
+
+    @abstractmethod
+    def listIds(self,file_path:str) -> set[str]:
+        """
+        Lists the chunk ids stored for a file.
+
+        Args:
+            file_path (str): The file path stored in the metadata of the chunks.
+
+        Returns:
+            set[str]: The ids of the chunks of the file.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self,ids:list[str]) -> None:
+        """
+        Deletes stored documents by chunk id. Unknown ids are ignored.
+
+        Args:
+            ids (list[str]): The chunk ids to delete.
+        """
+        pass
+
+    def iterLegacyChunks(self) -> Iterator[list[Document]]:
+        """
+        Reads, in batches, the chunks that previous versions stored together with their text, to import them in the `ChunkStore`.
+
+        Yields:
+            list[Document]: Chunks with `id`, `headers` and `file_path` in their metadata. Nothing by default.
+        """
+        yield from ()
+
+
+class ChromaVectorStore(VectorStore):
     """
     A class for storing, querying, and managing vector embeddings using ChromaDB.
 
@@ -13,90 +106,76 @@ class VectorStore:
 
     Attributes:
         __collection_name (str): The name of the ChromaDB collection used for storing embeddings.
-        __distance_threshold (float): The maximum distance threshold used when filtering query results.
         _collection (chromadb.Collection): The ChromaDB collection instance used for storing data.
 
     Methods:
-        __init__(): Initializes the `VectorStore` by setting up a ChromaDB collection.
-        saveAll(documents: list[Document]) -> None: Saves a list of documents to the ChromaDB collection.
-        query(query: str, top_k: int = 3) -> list[Document]: Queries the ChromaDB collection to retrieve the most
-                                                             similar documents to a given query string.
+        __init__(): Initializes the `ChromaVectorStore` by setting up a ChromaDB collection.
+        saveAll(chunks: ChunkBatch) -> None: Saves the embeddings of a batch of chunks to the ChromaDB collection.
+        search(embdedding: list[float], top_k: int = 3) -> list[tuple[str, float]]: Queries the ChromaDB collection for the ids
+                                                                                   of the chunks most similar to an embedding.
         listDocuments() -> set[str]: Lists the file paths of all documents currently stored in the collection.
+        listIds(file_path: str) -> set[str]: Lists the chunk ids stored for a file.
+        delete(ids: list[str]) -> None: Deletes documents from the collection by chunk id.
     """
 
     __collection_name: str = "embeddings_collection"  # The name of the collection in ChromaDB.
-    __distance_threshold: float = 0.35  # Threshold for distance when filtering query results.
     def __init__(self,config:Config):
         """
-        Initializes the `VectorStore` instance by setting up the ChromaDB client and collection.
+        Initializes the `ChromaVectorStore` instance by setting up the ChromaDB client and collection.
 
         Creates a ChromaDB `PersistentClient` and sets up a collection with cosine similarity
         using the HNSW (Hierarchical Navigable Small World) index for efficient vector search.
+
+        Raises:
+            ValueError: If `config.embedding_precision` is not "float32", ChromaDB only stores float32 embeddings.
         """
+        if config.embedding_precision != "float32":
+            raise ValueError(f"The chroma backend only stores float32 embeddings, use the flat or ivf_pq backend for embedding_precision='{config.embedding_precision}'")
         client = chromadb.PersistentClient(path=config.chromadb_path)
         # "hnsw:space": "cosine" -> Use cosine
         self._collection = client.get_or_create_collection(name=self.__collection_name,metadata={"hnsw:space": "cosine"})
 
-    def saveAll(self,documents:list[Document]) -> None:
+    def saveAll(self,chunks:ChunkBatch) -> None:
         """
-        Saves a list of documents to the ChromaDB collection.
+        Saves the embeddings of a batch of chunks to the ChromaDB collection.
 
         Args:
-            documents (list[Document]): A list of `Document` objects to be saved in the collection.
+            chunks (ChunkBatch): The chunks to be saved in the collection.
 
-        The method extracts the following information from each document's metadata:
-        - `id`: Document's unique identifier.
-        - `embeddings`: The document's embedding vector.
-        - `page_content`: The textual content of the document.
-        - `headers` and `file_path`: Metadata associated with the document.
-
-        This information is added to the ChromaDB collection for future querying.
+        The ids and the embedding matrix of the batch are passed to ChromaDB as they are and the file paths
+        become the metadata of each chunk. The texts are kept in the `ChunkStore` only.
         """
-        ids = [doc.metadata["id"] for doc in documents]
-        embeddings = [doc.metadata["embeddings"] for doc in documents]
-        contents = [doc.page_content for doc in documents]
-        metadatas = [{"headers": doc.metadata["headers"], "file_path": doc.metadata["file_path"]} for doc in documents]
+        if not len(chunks):
+            return
+        metadatas = [{"file_path": file_path} for file_path in chunks.file_paths]
 
         self._collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=contents,
+            ids=chunks.ids,
+            embeddings=chunks.embeddings,
             metadatas=metadatas
         )
-    def query(self,embdedding:list[float],top_k = 3) -> list[Document]:
+    def search(self,embdedding:list[float],top_k = 3) -> list[tuple[str,float]]:
         """
-        Queries the ChromaDB collection for the most similar documents to the given query.
+        Queries the ChromaDB collection for the chunks most similar to the given embedding.
 
         Args:
-            embdedding list[float]: The embdedding for which to retrieve similar documents.
+            embdedding list[float]: The embdedding for which to retrieve similar chunks.
             top_k (int, optional): The number of top results to return. Default is 3.
 
         Returns:
-            list[Document]: A list of `Document` objects representing the top-k most similar documents.
+            list[tuple[str, float]]: The ids and scores of the top-k most similar chunks.
 
-        The method computes the cosine distance between the query and stored document embeddings,
-        filtering out results that exceed the `__distance_threshold`. It returns documents that
-        are within the threshold distance, along with additional metadata, such as `id`, `headers`,
-        `file_path`, and a calculated `score` based on the inverse distance.
+        The method computes the cosine distance between the query and stored chunk embeddings,
+        filtering out results that exceed the `_distance_threshold`. Only the ids and distances are read,
+        the score of a chunk is the inverse distance.
         """
         results = self._collection.query(
             query_embeddings=embdedding,
-            n_results=top_k
+            n_results=top_k,
+            include=["distances"]
         )
-        documents:list[Document] =[]
-        for id,page_content, metadata,distance in zip(results["ids"][0],results["documents"][0],results["metadatas"][0],results["distances"][0]):
-            if ( distance <= self.__distance_threshold):
-                documents.append(Document(
-                    page_content,
-                    metadata ={
-                        "id": id,
-                        "headers":metadata["headers"],
-                        "file_path":metadata["file_path"],
-                        "score": (1-distance)
-                    }
-                ))
-        return documents
-    
+        return [(id,1-distance) for id,distance in zip(results["ids"][0],results["distances"][0]) if distance <= self._distance_threshold]
+
     def listDocuments(self) -> set[str]:
         """
         Lists all documents currently stored in the ChromaDB collection by their file paths.
@@ -105,12 +184,56 @@ class VectorStore:
             set[str]: A set of file paths for all documents in the collection.
 
         The method retrieves the metadata of all stored documents and extracts the file path (`file_path`)
-        to return a unique set of paths.
+        to return a unique set of paths. It reads every chunk, the `documents` command reads the document catalog instead.
         """
-        results = self._collection.get()
+        results = self._collection.get(include=["metadatas"])
         doc_names = set()
         for metadata in results["metadatas"]:
            file_path = str(metadata['file_path'])
            doc_names.add(file_path)
 
-        return doc_names
\ No newline at end of file
+        return doc_names
+
+    def listIds(self,file_path:str) -> set[str]:
+        """
+        Lists the chunk ids stored for a file in the ChromaDB collection.
+
+        Args:
+            file_path (str): The file path stored in the metadata of the chunks.
+
+        Returns:
+            set[str]: The ids of the chunks of the file.
+        """
+        results = self._collection.get(where={"file_path":file_path},include=[])
+        return set(results["ids"])
+
+    def delete(self,ids:list[str]) -> None:
+        """
+        Deletes documents from the ChromaDB collection by chunk id. Unknown ids are ignored.
+
+        Args:
+            ids (list[str]): The chunk ids to delete.
+        """
+        if ids:
+            self._collection.delete(ids=ids)
+
+    def iterLegacyChunks(self,batch_size:int=1000) -> Iterator[list[Document]]:
+        """
+        Reads the chunks stored with their text in the ChromaDB collection by previous versions, `batch_size` at a time.
+
+        Yields:
+            list[Document]: Chunks with `id`, `headers` and `file_path` in their metadata.
+        """
+        offset = 0
+        while True:
+            results = self._collection.get(limit=batch_size,offset=offset,include=["documents","metadatas"])
+            if not results["ids"]:
+                return
+            offset += len(results["ids"])
+            documents = [
+                Document(page_content,metadata={"id":id,"headers":metadata.get("headers",""),"file_path":metadata["file_path"]})
+                for id,page_content,metadata in zip(results["ids"],results["documents"],results["metadatas"])
+                if page_content is not None
+            ]
+            if documents:
+                yield documents
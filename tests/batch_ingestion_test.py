@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+import pytest
+
+from mini_local_rag import batch_ingestion
+from mini_local_rag.batch_ingestion import BatchIngestion
+from mini_local_rag.config import Config
+from mini_local_rag.document_manifest import DocumentManifest
+from mini_local_rag.ingest.save_checkpoint import SaveCheckpointStep
+from mini_local_rag.parse_checkpoints import ParseCheckpoints
+from mini_local_rag.pipeline import Step
+
+
+class MarkdownStep(Step):
+    label = "Markdown"
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        context["markdown"] = context["pdf"]
+
+
+class ChunkStep(Step):
+    label = "Chunk"
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        if "broken" in context["file_path"]:
+            raise ValueError("can't chunk")
+        context["documents"] = [Document(context["markdown"], metadata={"id": context["file_path"], "embeddings": [0.0]})]
+        context["deleted_ids"] = [f"old {context['file_path']}"]
+
+
+class RecordingStep(Step):
+    label = "Index"
+
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, context: Dict[str, Any]) -> None:
+        self.calls.append((context["documents"], context["deleted_ids"]))
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name in ("a.pdf", "b.pdf", "broken.pdf"):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+    return paths
+
+
+def test_batch_parses_in_pool_and_updates_index_per_file(files, tmp_path, monkeypatch):
+    # threads stand in for the worker processes, which can't see monkeypatched functions
+    monkeypatch.setattr(batch_ingestion, "ProcessPoolExecutor", lambda max_workers, mp_context, initializer, initargs: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(batch_ingestion, "_parse", lambda file_path, profile: f"parsed {file_path}")
+    config = Config(data_folder=str(tmp_path / "data"))
+    manifest = DocumentManifest(config=config)
+    index_step = RecordingStep()
+    checkpoints = ParseCheckpoints(config=config)
+    ingestion = BatchIngestion(file_paths=files, workers=2, config=config, manifest=manifest, checkpoints=checkpoints,
+                               document_steps=[MarkdownStep(), SaveCheckpointStep(checkpoints=checkpoints), ChunkStep()], index_steps=[index_step], logger=MagicMock())
+
+    ingestion.execute()
+
+    assert len(index_step.calls) == 2, "Expected an index update for every ingested file"
+    assert sorted(doc.metadata["id"] for documents, _ in index_step.calls for doc in documents) == files[:2]
+    assert sorted(id for _, deleted_ids in index_step.calls for id in deleted_ids) == [f"old {path}" for path in files[:2]]
+    assert manifest.get(files[0]) is not None and manifest.get(files[2]) is None, "Expected only ingested files in the manifest"
+
+    parsed = []
+    monkeypatch.setattr(batch_ingestion, "_parse", lambda file_path, profile: parsed.append(file_path) or f"parsed {file_path}")
+    ingestion.execute()
+
+    # the failed file resumes from the markdown saved before the failure
+    assert parsed == [], "Expected unchanged and checkpointed files not to be parsed"
+    assert len(index_step.calls) == 2, "Expected no index update when no file was ingested"
+
+
+def test_batch_resumes_files_with_a_checkpoint_without_parsing(files, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_ingestion, "ProcessPoolExecutor", lambda max_workers, mp_context, initializer, initargs: ThreadPoolExecutor(max_workers))
+    parsed = []
+    monkeypatch.setattr(batch_ingestion, "_parse", lambda file_path, profile: parsed.append(file_path) or f"parsed {file_path}")
+    config = Config(data_folder=str(tmp_path / "data"), parse_profile="fast")
+    manifest = DocumentManifest(config=config)
+    checkpoints = ParseCheckpoints(config=config)
+    _, fingerprint = manifest.check(files[0])
+    checkpoints.save(checkpoints.key(sha256=fingerprint.sha256, profile="fast"), "checkpointed markdown")
+    index_step = RecordingStep()
+    ingestion = BatchIngestion(file_paths=files[:2], workers=1, config=config, manifest=manifest, checkpoints=checkpoints,
+                               document_steps=[MarkdownStep(), SaveCheckpointStep(checkpoints=checkpoints), ChunkStep()], index_steps=[index_step], logger=MagicMock())
+
+    ingestion.execute()
+
+    assert parsed == [files[1]], "Expected the checkpointed file not to be parsed"
+    assert sorted(documents[0].page_content for documents, _ in index_step.calls) == ["checkpointed markdown", f"parsed {files[1]}"]
+
+
+def test_files_ingested_before_a_worker_died_are_recorded(files, tmp_path, monkeypatch):
+    class BreakingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            if "broken" in args[0]:
+                raise BrokenProcessPool("A child process terminated abruptly")
+            return super().submit(fn, *args)
+
+    monkeypatch.setattr(batch_ingestion, "ProcessPoolExecutor", lambda max_workers, mp_context, initializer, initargs: BreakingExecutor(max_workers))
+    monkeypatch.setattr(batch_ingestion, "_parse", lambda file_path, profile: f"parsed {file_path}")
+    config = Config(data_folder=str(tmp_path / "data"))
+    manifest = DocumentManifest(config=config)
+    checkpoints = ParseCheckpoints(config=config)
+    index_step = RecordingStep()
+    ingestion = BatchIngestion(file_paths=files, workers=1, config=config, manifest=manifest, checkpoints=checkpoints,
+                               document_steps=[MarkdownStep(), ChunkStep()], index_steps=[index_step], logger=MagicMock())
+
+    ingestion.execute()
+
+    assert [manifest.get(path) is not None for path in files] == [True, True, False]
+    assert len(index_step.calls) == 2
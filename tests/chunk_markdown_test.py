@@ -1,7 +1,6 @@
 
 from unittest.mock import MagicMock
-import uuid
-from mini_local_rag.ingest.chunk_markdown import MarkdownChunkingStep
+from mini_local_rag.ingest.chunk_markdown import MarkdownChunkingStep, chunk_id
 import pytest
 
 
@@ -24,20 +23,13 @@ def mock_splitters():
     # Mock the splitting behavior
     markdown_splitter.split_text.return_value = ["Header 1\nContent 1", "Header 2\nContent 2"]
     text_splitter.split_documents.return_value = [
-        MagicMock(metadata={"Header 1": "Header 1", "Header 2": "Header 2"}),
-        MagicMock(metadata={"Header 1": "Header 3", "Header 2": "Header 4"})
+        MagicMock(page_content="Content 1", metadata={"Header 1": "Header 1", "Header 2": "Header 2"}),
+        MagicMock(page_content="Content 2", metadata={"Header 1": "Header 3", "Header 2": "Header 4"})
     ]
     
     return markdown_splitter, text_splitter
 
-@pytest.fixture
-def mock_uuid():
-    # Mock the UUID generation
-    mock_uuid = MagicMock(return_value="mock-uuid-1234")
-    uuid.uuid4 = mock_uuid
-    return mock_uuid
-
-def test_markdown_chunking_step_execute(mock_config, mock_splitters, mock_uuid):
+def test_markdown_chunking_step_execute(mock_config, mock_splitters):
     markdown_splitter, text_splitter = mock_splitters
 
     # Instantiate the class
@@ -67,5 +59,11 @@ def test_markdown_chunking_step_execute(mock_config, mock_splitters, mock_uuid):
     assert "headers" in doc2.metadata  # Headers should be present
     assert doc2.metadata["headers"] == "Header 3 Header 4"
 
+    assert doc1.metadata["id"] == chunk_id("/some/path", "Header 1 Header 2", "Content 1")
+    assert doc1.metadata["id"] != doc2.metadata["id"]
+
 
-    assert mock_uuid.call_count == 2
\ No newline at end of file
+def test_chunk_ids_depend_on_content_only():
+    assert chunk_id("/a.pdf", "Intro", "Some  text\n") == chunk_id("/a.pdf", "Intro", "Some text"), "Expected whitespace to be normalized"
+    assert chunk_id("/a.pdf", "Intro", "Some text") != chunk_id("/b.pdf", "Intro", "Some text")
+    assert chunk_id("/a.pdf", "Intro", "Some text") != chunk_id("/a.pdf", "Intro", "Some text", occurrence=1)
\ No newline at end of file
@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+import pytest
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.chunk_store import ChunkStore, open_chunk_store
+from mini_local_rag.config import Config
+
+
+def make_document(id: str, file_path: str = "a.pdf") -> Document:
+    return Document(page_content=f"content of {id}", metadata={"id": id, "headers": f"Header {id}", "file_path": file_path})
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(data_folder=str(tmp_path / "data"))
+
+
+def test_get_returns_chunks_in_requested_order(config):
+    store = ChunkStore(config=config)
+    store.save(ChunkBatch.from_documents([make_document("x"), make_document("y", file_path="b.pdf")]))
+    store.save(ChunkBatch.from_documents([Document("updated x", metadata={"id": "x", "headers": "Header x", "file_path": "a.pdf"})]))
+
+    documents = ChunkStore(config=config).get(["y", "missing", "x"])
+
+    assert [doc.metadata["id"] for doc in documents] == ["y", "x"]
+    assert documents[0].page_content == "content of y" and documents[0].metadata["file_path"] == "b.pdf"
+    assert documents[1].page_content == "updated x", "Expected a chunk saved again to replace the previous one"
+
+    store.delete(["x", "missing"])
+    assert [doc.metadata["id"] for doc in store.get(["x", "y"])] == ["y"]
+
+
+def test_legacy_chunks_are_imported_once(config):
+    vector_store = MagicMock()
+    vector_store.iterLegacyChunks.return_value = iter([[make_document("old")]])
+
+    store = open_chunk_store(config=config, vector_store=vector_store)
+    store.delete(["old"])
+    reopened = open_chunk_store(config=config, vector_store=vector_store)
+
+    assert store.imported and reopened.imported
+    vector_store.iterLegacyChunks.assert_called_once()
+    assert reopened.get(["old"]) == []
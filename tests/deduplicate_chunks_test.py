@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+import pytest
+
+from mini_local_rag.config import Config
+from mini_local_rag.ingest.deduplicate_chunks import DeduplicateChunksStep
+from mini_local_rag.ingest.update_minhash_index import UpdateMinHashIndexStep
+from mini_local_rag.minhash_index import MinHashIndex
+
+
+BOILERPLATE = ("All rights reserved. No part of this publication may be reproduced, distributed, or transmitted in any form "
+               "or by any means without the prior written permission of the publisher, except in the case of brief quotations.")
+
+
+def chunk(id, text, headers="Section"):
+    return Document(text, metadata={"id": id, "headers": headers, "file_path": "/docs/b.pdf"})
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MinHashIndex(config=Config(data_folder=str(tmp_path / "data")))
+
+
+def test_duplicates_are_not_embedded_and_recorded(index):
+    index.add({"stored": index.signature(BOILERPLATE)})
+    step = DeduplicateChunksStep(index=index)
+    context = {
+        "file_path": "/docs/b.pdf",
+        "documents": [
+            chunk("first", "The turbine inspection interval is twelve months for all offshore units."),
+            chunk("copy", BOILERPLATE + " 2024", headers="Legal"),
+            chunk("again", "The turbine inspection interval is twelve months for all offshore units!"),
+        ],
+        "deleted_ids": [],
+        "log_record": MagicMock(),
+    }
+
+    step.execute(context)
+
+    assert [doc.metadata["id"] for doc in context["documents"]] == ["first"]
+    assert list(context["signatures"]) == ["first"]
+    assert context["duplicates"] == [("copy", "Legal", "stored"), ("again", "Section", "first")]
+    assert context["log_record"].duplicates == {"stored": 1, "in_file": 1}
+
+    UpdateMinHashIndexStep(index=index).execute(context)
+
+    assert index.duplicates_of(["stored", "first"]) == {
+        "stored": [{"file_path": "/docs/b.pdf", "headers": "Legal"}],
+        "first": [{"file_path": "/docs/b.pdf", "headers": "Section"}],
+    }
+    assert index.find(index.signature("The turbine inspection interval is twelve months for all offshore units."), exclude=set()) == "first"
+
+
+def test_deleted_chunks_are_not_survivors_and_referenced_ones_are_kept(index):
+    index.add({"old": index.signature(BOILERPLATE)})
+    index.replace_duplicates("/docs/a.pdf", [("a1", "Legal", "old")])
+    step = DeduplicateChunksStep(index=index)
+    context = {"file_path": "/docs/b.pdf", "documents": [chunk("new", BOILERPLATE)], "deleted_ids": ["gone", "old"]}
+
+    step.execute(context)
+
+    # "old" is being removed from its file, so the new copy survives instead of referencing it
+    assert [doc.metadata["id"] for doc in context["documents"]] == ["new"]
+    # but a duplicate of another file still references it
+    assert context["deleted_ids"] == ["gone"]
@@ -0,0 +1,26 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+
+from mini_local_rag.config import Config
+from mini_local_rag.ingest.diff_chunks import DiffChunksStep
+from mini_local_rag.sparse_index import SparseIndex
+
+
+def test_only_new_chunks_are_kept_and_removed_chunks_deleted(tmp_path):
+    config = Config(sparse_index_path=str(tmp_path / "sparse_index"), retriever_path=str(tmp_path / "retriever"))
+    vector_store = MagicMock()
+    vector_store.listIds.return_value = {"unchanged", "unindexed", "removed"}
+    documents = [Document(page_content=id, metadata={"id": id}) for id in ("unchanged", "unindexed", "added")]
+    # the previous ingestion failed after saving "unindexed" to the vector store
+    SparseIndex(config=config).add([documents[0]])
+    step = DiffChunksStep(vector_store=vector_store, config=config)
+
+    context = {"documents": documents, "file_path": "a.pdf", "log_record": MagicMock()}
+    step.execute(context)
+
+    vector_store.listIds.assert_called_once_with("a.pdf")
+    assert [doc.metadata["id"] for doc in context["documents"]] == ["added"]
+    assert [doc.metadata["id"] for doc in context["unindexed_documents"]] == ["unindexed"]
+    assert context["deleted_ids"] == ["removed"]
+    assert context["log_record"].chunks == {"new": 1, "unchanged": 2, "deleted": 1}
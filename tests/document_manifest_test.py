@@ -0,0 +1,107 @@
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.config import Config
+from mini_local_rag.document_manifest import DocumentManifest, FileFingerprint, open_document_manifest
+from mini_local_rag.flat_vector_store import FlatVectorStore
+from mini_local_rag.ingest.check_manifest import CheckManifestStep
+from mini_local_rag.list_documents.create_display_output import CreateDisplayOutputStep
+from mini_local_rag.list_documents.search_store import SearchExistingDocumentsStep
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return DocumentManifest(config=Config(data_folder=str(tmp_path / "data")))
+
+
+def test_unchanged_files_are_detected(manifest, tmp_path):
+    file = tmp_path / "report.pdf"
+    file.write_bytes(b"first version")
+
+    unchanged, fingerprint = manifest.check(str(file))
+    assert not unchanged, "Expected a new file to be ingested"
+
+    manifest.record(fingerprint, chunks=3, profile="auto")
+    assert manifest.check(str(file))[0] and manifest.check(str(file), profile="auto")[0]
+    assert not manifest.check(str(file), profile="full")[0], "Expected a file recorded with another profile to be parsed again"
+
+    # same content with a new modification time, e.g. after a copy
+    os.utime(file, ns=(0, fingerprint.mtime_ns + 10**9))
+    assert manifest.check(str(file))[0]
+    assert manifest.get(str(file)).mtime_ns == fingerprint.mtime_ns + 10**9, "Expected the new modification time to be recorded"
+    assert manifest.catalog()[0][0].chunks == 3, "Expected the catalog entry to be kept"
+
+    file.write_bytes(b"second version")
+    unchanged, changed = manifest.check(str(file))
+    assert not unchanged
+    assert changed.sha256 != fingerprint.sha256
+
+
+def test_check_step_stops_the_pipeline_for_unchanged_files(manifest, tmp_path, monkeypatch):
+    file = tmp_path / "report.pdf"
+    file.write_bytes(b"content")
+    step = CheckManifestStep(manifest=manifest, config=Config())
+    monkeypatch.chdir(tmp_path)
+
+    context = {"file_path": "./report.pdf"}
+    step.execute(context)
+    assert "stop_reason" not in context
+    assert context["file_path"] == str(file), "Expected the file path to be made absolute for the next steps"
+
+    manifest.record(context["fingerprint"])
+    context = {"file_path": str(file)}
+    step.execute(context)
+    assert context["stop_reason"] == "unchanged since last ingest"
+
+
+def test_catalog_lists_pages_of_matching_files(manifest):
+    for idx in range(5):
+        manifest.record(FileFingerprint(path=f"/docs/report_{idx}.pdf", size=2048, mtime_ns=1, sha256=str(idx)), chunks=10 * idx, profile="fast")
+    manifest.record(FileFingerprint(path="/other/50%_off.pdf", size=10, mtime_ns=1, sha256="x"))
+
+    entries, total = manifest.catalog(offset=2, limit=2, search="REPORT")
+    assert total == 5
+    assert [(entry.path, entry.chunks, entry.profile) for entry in entries] == [("/docs/report_2.pdf", 20, "fast"), ("/docs/report_3.pdf", 30, "fast")]
+    assert [entry.path for entry in manifest.catalog(search="50%")[0]] == ["/other/50%_off.pdf"]
+
+    context = {"page": 2, "page_size": 2, "search": "report"}
+    SearchExistingDocumentsStep(manifest=manifest).execute(context)
+    CreateDisplayOutputStep().execute(context)
+    assert "| 3 | /docs/report_2.pdf | 20 | 2.0 KiB | fast |" in context["output"].markup
+    assert "Page 2 of 3, 5 documents" in context["output"].markup
+
+
+def test_catalog_columns_are_added_to_existing_manifests(tmp_path):
+    path = tmp_path / "data" / "manifest.db"
+    path.parent.mkdir()
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL, ingested_at INTEGER NOT NULL)")
+    connection.execute("INSERT INTO files VALUES ('/docs/old.pdf', 1, 1, 'abc', 1)")
+    connection.commit()
+    connection.close()
+
+    manifest = DocumentManifest(config=Config(data_folder=str(tmp_path / "data")))
+
+    (entry,), total = manifest.catalog()
+    assert total == 1 and entry.chunks is None and entry.profile is None
+
+
+def test_documents_of_an_existing_store_are_listed(tmp_path):
+    config = Config(data_folder=str(tmp_path / "data"), flat_index_path=str(tmp_path / "flat_index"))
+    file = tmp_path / "old.pdf"
+    file.write_bytes(b"content")
+    vector_store = FlatVectorStore(config=config)
+    vector_store.saveAll(ChunkBatch(ids=["1", "2"], texts=["a", "b"], headers=["", ""], file_paths=[str(file)] * 2, embeddings=np.eye(2)))
+
+    manifest = open_document_manifest(config=config, vector_store=vector_store)
+
+    (entry,), total = manifest.catalog()
+    assert total == 1 and (entry.path, entry.chunks, entry.size) == (str(file), 2, 7)
+    assert not manifest.check(str(file))[0], "Expected an imported file to be parsed again on its next ingestion"
+
+    vector_store.delete(["1", "2"])
+    assert open_document_manifest(config=config, vector_store=vector_store).catalog()[1] == 1, "Expected the import to run once"
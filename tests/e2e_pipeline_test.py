@@ -29,7 +29,7 @@ def pipelineBuilder():
         shutil.rmtree(os.path.join(cwd,".test/data"))
     except FileNotFoundError as e:
         pass
-    return PipelineBuilder(config=Config(retriever_path=".test/tf-idf-retriever",chromadb_path=".test/chroma_db"))
+    return PipelineBuilder(config=Config(data_folder=".test/data",retriever_path=".test/tf-idf-retriever",sparse_index_path=".test/sparse_index",chromadb_path=".test/chroma_db"))
 
 
 def test_pipelines_e2e(pipelineBuilder:PipelineBuilder):
@@ -1,3 +1,7 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
 from mini_local_rag.embedder import Qwen3Embedder
 
 def test_embed_returns_float_list():
@@ -21,4 +25,40 @@ def test_embed_returns_float_list():
     # Assert: Check that the result is a list of floats
     assert isinstance(result, list), "Result should be a list"
     assert all(isinstance(i, float) for i in result), "All elements should be floats"
-    assert len(result) > 0, "Embedding should not be an empty list"
\ No newline at end of file
+    assert len(result) > 0, "Embedding should not be an empty list"
+
+def test_embed_many_batches_requests():
+    """
+    Verify that embed_many sends the texts to the model in batches and keeps the input order.
+    """
+    texts = [f"text {i}" for i in range(5)]
+
+    def fake_embed(model, input):
+        return {"embeddings": [[float(text.split(" ")[1])] for text in input]}
+
+    with patch("mini_local_rag.embedder.ollama.embed", side_effect=fake_embed) as mock_embed:
+        result = Qwen3Embedder().embed_many(texts, batch_size=2)
+
+    assert mock_embed.call_count == 3, "Expected one request per batch"
+    assert result == [[0.0], [1.0], [2.0], [3.0], [4.0]]
+
+
+def test_embed_array_fills_a_float32_matrix():
+    """
+    Verify that embed_array writes every batch response into one float32 matrix, in input order.
+    """
+    texts = [f"text {i}" for i in range(5)]
+
+    def fake_embed(model, input):
+        return {"embeddings": [[float(text.split(" ")[1]), 1.0] for text in input]}
+
+    with patch("mini_local_rag.embedder.ollama.embed", side_effect=fake_embed):
+        result = Qwen3Embedder().embed_array(texts, batch_size=2)
+
+    assert result.dtype == np.float32 and result.shape == (5, 2)
+    assert result[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_embed_many_rejects_invalid_batch_size():
+    with pytest.raises(ValueError):
+        Qwen3Embedder().embed_many(["text"], batch_size=0)
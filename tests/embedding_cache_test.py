@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from mini_local_rag.config import Config
+from mini_local_rag.embedder import Embedder
+from mini_local_rag.embedding_cache import CachedEmbedder, record_cache_stats
+from mini_local_rag.logger.log_record import LogRecord
+from mini_local_rag.sqlite_cache import SqliteLRUCache
+
+
+class CountingEmbedder(Embedder):
+    """Deterministic embedder that records every text it is asked to embed."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+
+    @property
+    def model_name(self) -> str:
+        return "counting"
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        self.calls.extend(texts)
+        return [[float(len(text)), 0.5] for text in texts]
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(data_folder=str(tmp_path), embedding_cache_max_entries=100)
+
+
+def test_cache_serves_repeated_texts(config):
+    inner = CountingEmbedder()
+    embedder = CachedEmbedder(embedder=inner, config=config)
+
+    first = embedder.embed_many(["alpha", "beta", "alpha"])
+    second = embedder.embed_many(["beta", "alpha  "])
+
+    assert inner.calls == ["alpha", "beta"], "Expected each normalized text to be embedded once"
+    assert first == [[5.0, 0.5], [4.0, 0.5], [5.0, 0.5]]
+    assert second == [[4.0, 0.5], [5.0, 0.5]]
+    assert embedder.misses == 2
+    assert embedder.hits == 3
+
+
+def test_cache_persists_between_instances(config):
+    CachedEmbedder(embedder=CountingEmbedder(), config=config).embed("question")
+
+    inner = CountingEmbedder()
+    assert CachedEmbedder(embedder=inner, config=config).embed("question") == [8.0, 0.5]
+    assert inner.calls == []
+
+
+def test_record_cache_stats_updates_log_record(config):
+    embedder = CachedEmbedder(embedder=CountingEmbedder(), config=config)
+    embedder.embed("warm up")
+    record = LogRecord.create(trace_id="trace", plan=[])
+
+    with record_cache_stats(embedder, record):
+        embedder.embed_many(["warm up", "new text"])
+
+    assert record.embedding_cache == {"hits": 1, "misses": 1}
+
+
+def test_record_cache_stats_ignores_uncached_embedder():
+    record = LogRecord.create(trace_id="trace", plan=[])
+
+    with record_cache_stats(MagicMock(), record):
+        pass
+
+    assert not hasattr(record, "embedding_cache")
+
+
+def test_lru_cache_evicts_least_recently_used(tmp_path):
+    cache = SqliteLRUCache(path=str(tmp_path / "cache.db"), max_entries=2)
+    cache.put_many({"a": b"1"})
+    cache.put_many({"b": b"2"})
+    cache.get_many(["a"])
+    cache.put_many({"c": b"3"})
+
+    assert len(cache) == 2
+    assert cache.get_many(["a", "b", "c"]) == {"a": b"1", "c": b"3"}
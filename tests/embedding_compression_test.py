@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from mini_local_rag.embedding_compression import TruncatedEmbedder, bytes_per_vector, dequantize, quantize, recall_report, truncate_embeddings
+
+
+@pytest.fixture
+def vectors():
+    """Unit vectors grouped around 20 random directions, with most of the signal in the leading dimensions."""
+    rng = np.random.default_rng(7)
+    weights = np.linspace(2.0, 0.2, 64)
+    centers = rng.normal(size=(20, 64)) * weights
+    vectors = centers[rng.integers(0, 20, size=300)] + 0.3 * rng.normal(size=(300, 64)) * weights
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_truncated_embeddings_are_renormalised(vectors):
+    truncated = truncate_embeddings(vectors, 16)
+
+    assert truncated.shape == (300, 16) and truncated.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(truncated, axis=1), 1.0, rtol=1e-5)
+    with pytest.raises(ValueError):
+        truncate_embeddings(vectors, 65)
+
+
+def test_truncated_embedder_truncates_documents_and_questions(vectors):
+    inner = MagicMock()
+    inner.model_name = "qwen3-embedding:4b"
+    inner.embed_array.side_effect = lambda texts, batch_size: vectors[:len(texts)]
+    embedder = TruncatedEmbedder(embedder=inner, dimensions=8)
+
+    assert embedder.model_name == "qwen3-embedding:4b@8"
+    assert embedder.embed_array(["a", "b"]).shape == (2, 8)
+    np.testing.assert_allclose(embedder.embed("question"), truncate_embeddings(vectors[:1], 8)[0], rtol=1e-6)
+
+
+def test_int8_quantization_keeps_rows_close(vectors):
+    codes, scales = quantize(vectors, "int8")
+
+    assert codes.dtype == np.int8 and scales.shape == (300,)
+    assert np.abs(dequantize(codes, scales) - vectors).max() < 0.01
+    assert quantize(vectors, "float16")[0].dtype == np.float16
+    with pytest.raises(ValueError):
+        quantize(vectors, "int4")
+
+
+def test_recall_report_trades_recall_for_size(vectors):
+    report = recall_report(vectors, dimensions=[64, 16], precisions=["float32", "int8"], top_k=5)
+    by_setting = {(entry["dimensions"], entry["precision"]): entry for entry in report}
+
+    assert by_setting[(64, "float32")]["recall"] == 1.0
+    assert by_setting[(64, "int8")]["recall"] >= 0.9
+    assert by_setting[(16, "int8")]["bytes"] == bytes_per_vector(16, "int8") == 20
+    assert by_setting[(16, "int8")]["compression"] == pytest.approx(64 * 4 / 20)
+    assert by_setting[(16, "float32")]["recall"] < 1.0
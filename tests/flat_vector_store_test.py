@@ -0,0 +1,131 @@
+import sqlite3
+
+from langchain_core.documents import Document
+import numpy as np
+import pytest
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.config import Config
+from mini_local_rag.flat_vector_store import FlatVectorStore
+
+
+def make_document(id: str, embedding: list[float], file_path: str = "a.pdf") -> Document:
+    return Document(
+        page_content=f"content of {id}",
+        metadata={"id": id, "embeddings": embedding, "headers": "Header", "file_path": file_path}
+    )
+
+
+def make_batch(documents: list[Document]) -> ChunkBatch:
+    return ChunkBatch.from_documents(documents, embeddings=np.array([doc.metadata["embeddings"] for doc in documents]))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FlatVectorStore(config=Config(flat_index_path=str(tmp_path / "flat_index")))
+
+
+def test_query_returns_most_similar_first(store):
+    store.saveAll(make_batch([
+        make_document("x", [1.0, 0.0, 0.0]),
+        make_document("xy", [1.0, 0.3, 0.0]),
+        make_document("z", [0.0, 0.0, 1.0]),
+    ]))
+
+    results = store.search([2.0, 0.1, 0.0], top_k=3)
+
+    assert [id for id, _ in results] == ["x", "xy"], "Expected results ordered by similarity and z filtered by the threshold"
+    assert results[0][1] == pytest.approx(0.9988, abs=1e-3)
+
+
+def test_save_appends_and_reloads(store, tmp_path):
+    store.saveAll(make_batch([make_document("first", [1.0, 0.0], file_path="a.pdf")]))
+    store.saveAll(make_batch([make_document("second", [0.0, 1.0], file_path="b.pdf")]))
+
+    reopened = FlatVectorStore(config=Config(flat_index_path=str(tmp_path / "flat_index")))
+
+    assert reopened.listDocuments() == {"a.pdf", "b.pdf"}
+    assert [id for id, _ in reopened.search([0.0, 1.0])] == ["second"]
+
+
+def test_empty_store_and_dimension_mismatch(store):
+    assert store.search([1.0, 0.0]) == []
+    assert store.listDocuments() == set()
+
+    store.saveAll(make_batch([make_document("first", [1.0, 0.0])]))
+    with pytest.raises(ValueError):
+        store.saveAll(make_batch([make_document("second", [1.0, 0.0, 0.0])]))
+
+
+def test_legacy_index_keeps_working_and_yields_its_chunks(tmp_path):
+    path = tmp_path / "flat_index"
+    path.mkdir()
+    connection = sqlite3.connect(path / "chunks.db")
+    connection.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, content TEXT NOT NULL, headers TEXT, file_path TEXT)")
+    connection.commit()
+    connection.close()
+    store = FlatVectorStore(config=Config(flat_index_path=str(path)))
+    store.saveAll(make_batch([make_document("new", [1.0, 0.0])]))
+    connection = sqlite3.connect(path / "chunks.db")
+    connection.execute("INSERT INTO chunks VALUES (1, 'old', 'content of old', 'Header', 'a.pdf')")
+    connection.commit()
+    connection.close()
+
+    chunks = [doc for documents in FlatVectorStore(config=Config(flat_index_path=str(path))).iterLegacyChunks() for doc in documents]
+
+    assert [doc.metadata["id"] for doc in chunks] == ["old"], "Expected only the chunks stored with their content"
+    assert chunks[0].page_content == "content of old"
+    assert [id for id, _ in store.search([1.0, 0.0])] == ["new"]
+
+
+def test_saves_append_in_place_and_a_failed_save_keeps_the_store(store, tmp_path):
+    for idx in range(5):
+        store.saveAll(make_batch([make_document(str(idx), [1.0, 0.1 * idx])]))
+
+    assert np.load(tmp_path / "flat_index" / "embeddings.npy", mmap_mode="r").shape[0] == 8, "Expected the capacity to double when full"
+    assert store._embeddings.shape[0] == 5
+
+    with pytest.raises(sqlite3.IntegrityError):
+        store.saveAll(make_batch([make_document("5", [0.0, 1.0]), make_document("0", [0.0, 1.0])]))
+    assert [id for id, _ in store.search([1.0, 0.0])] == ["0", "1", "2"], "Expected the store to keep answering after a failed save"
+
+    store.saveAll(make_batch([make_document("6", [0.0, 1.0])]))
+    reopened = FlatVectorStore(config=Config(flat_index_path=str(tmp_path / "flat_index")))
+    assert reopened._embeddings.shape[0] == 6, "Expected the rows of the failed save to be overwritten"
+    assert [id for id, _ in reopened.search([0.0, 1.0], top_k=1)] == ["6"]
+
+
+def test_deleted_chunks_are_never_returned(store, tmp_path):
+    store.saveAll(make_batch([make_document("old", [1.0, 0.0]), make_document("kept", [0.9, 0.1]), make_document("other", [0.0, 1.0], file_path="b.pdf")]))
+    assert store.listIds("a.pdf") == {"old", "kept"}
+
+    store.delete(["old", "missing"])
+    store.saveAll(make_batch([make_document("new", [0.8, 0.2])]))
+
+    reopened = FlatVectorStore(config=Config(flat_index_path=str(tmp_path / "flat_index")))
+    for current in (store, reopened):
+        assert [id for id, _ in current.search([1.0, 0.0], top_k=3)] == ["kept", "new"]
+        assert current.listIds("a.pdf") == {"kept", "new"}
+
+
+def test_quantized_store_matches_float32_ranking(tmp_path):
+    documents = [make_document(str(idx), [np.cos(idx / 10), np.sin(idx / 10), 0.1 * idx]) for idx in range(20)]
+    stores = {}
+    for precision in ("float32", "float16", "int8"):
+        stores[precision] = FlatVectorStore(config=Config(flat_index_path=str(tmp_path / precision), embedding_precision=precision))
+        stores[precision].saveAll(make_batch(documents[:10]))
+        stores[precision].saveAll(make_batch(documents[10:]))
+
+    reopened = FlatVectorStore(config=Config(flat_index_path=str(tmp_path / "int8"), embedding_precision="int8"))
+    assert reopened._embeddings.dtype == np.int8
+
+    query = documents[12].metadata["embeddings"]
+    expected = [id for id, _ in stores["float32"].search(query, top_k=5)]
+    for current in (stores["float16"], stores["int8"], reopened):
+        found = [id for id, _ in current.search(query, top_k=5)]
+        # neighbours with almost equal scores may swap places
+        assert found[0] == "12" and set(found) == set(expected)
+
+    float32 = FlatVectorStore(config=Config(flat_index_path=str(tmp_path / "int8")))
+    with pytest.raises(ValueError):
+        float32.saveAll(make_batch([make_document("x", [1.0, 0.0, 0.0])]))
@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+import numpy as np
+import pytest
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.ingest.generate_embeddings import GenerateEmbeddingsStep
+
+
+@pytest.fixture
+def mock_config():
+    config = MagicMock()
+    config.embedding_batch_size = 2
+    config.embedding_concurrency = 1
+    return config
+
+
+def make_documents(count: int) -> list[Document]:
+    return [Document(page_content=f"chunk {i}", metadata={"id": str(i), "headers": "Header", "file_path": "a.pdf"}) for i in range(count)]
+
+
+def test_generate_embeddings_uses_batched_api(mock_config):
+    embedder = MagicMock()
+    embedder.embed_array.return_value = np.array([[0.1], [0.2], [0.3]])
+    step = GenerateEmbeddingsStep(embedder=embedder, config=mock_config)
+
+    context = {"documents": make_documents(3)}
+    step.execute(context)
+
+    embedder.embed_array.assert_called_once_with(["chunk 0", "chunk 1", "chunk 2"], batch_size=2)
+    embedder.embed.assert_not_called()
+    chunks: ChunkBatch = context["chunks"]
+    assert chunks.ids == ["0", "1", "2"] and chunks.texts == ["chunk 0", "chunk 1", "chunk 2"]
+    assert chunks.embeddings.dtype == np.float32 and chunks.embeddings.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(chunks.embeddings, [[0.1], [0.2], [0.3]])
+
+
+def test_generate_embeddings_concurrent_keeps_order(mock_config):
+    mock_config.embedding_concurrency = 3
+    embedder = MagicMock()
+    embedder.embed_array.side_effect = lambda texts, batch_size: np.array([[float(text.split(" ")[1])] for text in texts], dtype=np.float32)
+    step = GenerateEmbeddingsStep(embedder=embedder, config=mock_config)
+
+    context = {"documents": make_documents(7)}
+    step.execute(context)
+
+    assert embedder.embed_array.call_count == 4, "Expected one call per batch"
+    assert context["chunks"].embeddings.tolist() == [[float(i)] for i in range(7)]
+
+
+def test_generate_embeddings_concurrent_failure_fails_step(mock_config):
+    mock_config.embedding_concurrency = 2
+
+    def embed_array(texts, batch_size):
+        if "chunk 2" in texts:
+            raise ConnectionError("ollama restarted")
+        return np.zeros((len(texts), 1), dtype=np.float32)
+
+    embedder = MagicMock()
+    embedder.embed_array.side_effect = embed_array
+    step = GenerateEmbeddingsStep(embedder=embedder, config=mock_config)
+
+    context = {"documents": make_documents(6)}
+    with pytest.raises(ConnectionError):
+        step.execute(context)
+
+    assert "chunks" not in context
+
+
+def test_chunk_batch_rejects_mismatched_embeddings():
+    with pytest.raises(ValueError):
+        ChunkBatch.from_documents(make_documents(3), embeddings=np.zeros((2, 4)))
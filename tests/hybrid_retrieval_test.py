@@ -0,0 +1,66 @@
+import threading
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+import pytest
+
+from mini_local_rag.ask.hybrid_retrieval import HybridRetrievalStep
+from mini_local_rag.config import Config
+
+
+def make_document(id: str) -> Document:
+    return Document(page_content=f"content {id}", metadata={"id": id, "headers": "Header", "file_path": f"{id}.pdf"})
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(sparse_index_path=str(tmp_path / "sparse_index"), retrieval_top_k=3, retrieval_candidates=10, rrf_k=60)
+
+
+def test_rankings_are_fused_and_sparse_only_chunks_are_read(config):
+    embedder = MagicMock()
+    embedder.embed.return_value = [0.1, 0.2]
+    vector_store = MagicMock()
+    vector_store.search.return_value = [("a", 0.9), ("b", 0.8), ("c", 0.7)]
+    chunk_store = MagicMock()
+    chunk_store.get.side_effect = lambda ids: [make_document(id) for id in ids]
+    step = HybridRetrievalStep(embedder=embedder, vector_store=vector_store, chunk_store=chunk_store, config=config)
+    step.index = MagicMock()
+    step.index.search.return_value = [("c", 7.0), ("d", 5.0), ("b", 2.0)]
+
+    context = {"question": "dose adjustment"}
+    step.execute(context)
+
+    documents = context["documents"]
+    assert [doc.metadata["id"] for doc in documents] == ["c", "b", "a"], "Expected chunks found by both retrievers first"
+    assert documents[0].metadata["score"] == pytest.approx(1 / 63 + 1 / 61)
+    assert documents[0].metadata["sparse_score"] == 7.0 and documents[0].metadata["dense_score"] == 0.7
+    assert context["embedding"] == [0.1, 0.2]
+    vector_store.search.assert_called_once_with([0.1, 0.2], top_k=10)
+    step.index.search.assert_called_once_with("dose adjustment", 10)
+    chunk_store.get.assert_called_once_with(["c", "b", "a"]), "Expected only the texts of the fused top-k to be read"
+
+    step.sparse_weight = 3.0
+    step.execute(context)
+
+    assert [doc.metadata["id"] for doc in context["documents"]] == ["c", "b", "d"], "Expected the sparse-only chunk to replace the dense-only one"
+    assert "dense_score" not in context["documents"][2].metadata
+
+
+def test_sparse_search_runs_while_the_question_is_embedded(config):
+    sparse_started = threading.Event()
+    embedder = MagicMock()
+    embedder.embed.side_effect = lambda text: [0.0] if sparse_started.wait(timeout=5) else pytest.fail("Expected the sparse search to start before the embedding returns")
+    vector_store = MagicMock()
+    vector_store.search.return_value = []
+    chunk_store = MagicMock()
+    chunk_store.get.return_value = [make_document("a")]
+    step = HybridRetrievalStep(embedder=embedder, vector_store=vector_store, chunk_store=chunk_store, config=config)
+    step.index = MagicMock()
+    step.index.search.side_effect = lambda question, k: sparse_started.set() or [("a", 1.0)]
+
+    context = {"question": "dose", "log_record": MagicMock()}
+    step.execute(context)
+
+    assert [doc.metadata["id"] for doc in context["documents"]] == ["a"]
+    assert set(context["log_record"].retrieval_latency) == {"dense", "sparse"}
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from mini_local_rag.chunk_batch import ChunkBatch
+from mini_local_rag.config import Config
+from mini_local_rag.flat_vector_store import FlatVectorStore
+from mini_local_rag.ivf_pq_vector_store import IvfPqVectorStore
+
+
+def make_chunks(vectors: np.ndarray, offset: int = 0) -> ChunkBatch:
+    ids = [str(offset + idx) for idx in range(len(vectors))]
+    return ChunkBatch(
+        ids=ids,
+        texts=[f"chunk {id}" for id in ids],
+        headers=[""] * len(ids),
+        file_paths=["a.pdf"] * len(ids),
+        embeddings=vectors,
+    )
+
+
+@pytest.fixture
+def clustered_vectors():
+    """Unit vectors grouped around 16 random directions, so IVF lists are meaningful."""
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(16, 32))
+    vectors = centers[rng.integers(0, 16, size=600)] + 0.2 * rng.normal(size=(600, 32))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_config(tmp_path, name: str, precision: str = "float32") -> Config:
+    return Config(
+        flat_index_path=str(tmp_path / name),
+        embedding_precision=precision,
+        ivf_nlist=16,
+        ivf_nprobe=4,
+        pq_subquantizers=8,
+        ivf_train_sample=1000,
+        ivf_train_min_rows=300,
+        ivf_rerank_candidates=20,
+    )
+
+
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_ivf_pq_matches_exact_search(tmp_path, clustered_vectors, precision):
+    exact = FlatVectorStore(config=make_config(tmp_path, "flat"))
+    approximate = IvfPqVectorStore(config=make_config(tmp_path, "ivf", precision))
+    for store in (exact, approximate):
+        store.saveAll(make_chunks(clustered_vectors[:400]))
+        store.saveAll(make_chunks(clustered_vectors[400:], offset=400))
+
+    assert approximate._centroids is not None, "Expected the quantizers to be trained"
+    assert approximate._codes.shape == (600, 8)
+
+    queries = clustered_vectors[::37]
+    hits = 0
+    for query in queries:
+        expected = {id for id, _ in exact.search(query.tolist(), top_k=3)}
+        found = {id for id, _ in approximate.search(query.tolist(), top_k=3)}
+        hits += len(expected & found)
+
+    assert hits / (3 * len(queries)) >= 0.9, "Expected high recall after exact re-ranking"
+
+
+def test_ivf_pq_reload_and_untrained_fallback(tmp_path, clustered_vectors):
+    store = IvfPqVectorStore(config=make_config(tmp_path, "ivf"))
+    store.saveAll(make_chunks(clustered_vectors[:100]))
+
+    assert store._centroids is None, "Expected no training below ivf_train_min_rows"
+    assert store.search(clustered_vectors[5].tolist(), top_k=1)[0][0] == "5"
+
+    store.saveAll(make_chunks(clustered_vectors[100:], offset=100))
+    reopened = IvfPqVectorStore(config=make_config(tmp_path, "ivf"))
+
+    assert reopened._centroids is not None
+    assert reopened.search(clustered_vectors[500].tolist(), top_k=1)[0][0] == "500"
+
+    for idx in (100, 200):
+        reopened.saveAll(make_chunks(clustered_vectors[idx:idx + 1], offset=600 + idx))
+    assert np.load(tmp_path / "ivf" / "pq_codes.npy", mmap_mode="r").shape[0] == 1200, "Expected the codes to be appended in place"
+    again = IvfPqVectorStore(config=make_config(tmp_path, "ivf"))
+    assert again._codes.shape == (602, 8)
+    assert {id for id, _ in again.search(clustered_vectors[200].tolist(), top_k=2)} == {"200", "800"}
+
+
+def test_ivf_pq_rejects_indivisible_dimension(tmp_path):
+    store = IvfPqVectorStore(config=make_config(tmp_path, "ivf"))
+
+    with pytest.raises(ValueError):
+        store.saveAll(make_chunks(np.ones((1, 30), dtype=np.float32)))
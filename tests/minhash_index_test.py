@@ -0,0 +1,57 @@
+import pytest
+
+from mini_local_rag.config import Config
+from mini_local_rag.minhash_index import MinHashIndex
+
+
+DISCLAIMER = ("This report is provided for information purposes only and does not constitute an offer or a solicitation. "
+              "The information contained herein has been obtained from sources believed to be reliable, but its accuracy "
+              "and completeness are not guaranteed and it should not be relied upon as such.")
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MinHashIndex(config=Config(data_folder=str(tmp_path / "data")))
+
+
+def test_signature_similarity(index):
+    signature = index.signature(DISCLAIMER)
+
+    assert index.similarity(signature, index.signature(DISCLAIMER.upper().replace(" ", "  "))) == 1.0
+    assert index.similarity(signature, index.signature(DISCLAIMER.replace("reliable", "accurate"))) > 0.8
+    assert index.similarity(signature, index.signature("Revenue grew by ten percent in the third quarter compared to last year.")) < 0.2
+    assert index.signature("  ...  ") is None
+
+
+def test_find_near_duplicates_of_stored_chunks(index, tmp_path):
+    index.add({"disclaimer": index.signature(DISCLAIMER), "other": index.signature("Revenue grew by ten percent in the third quarter.")})
+    near_duplicate = index.signature(DISCLAIMER + " Page 4.")
+
+    assert index.find(near_duplicate, exclude=set()) == "disclaimer"
+    assert index.find(near_duplicate, exclude={"disclaimer"}) is None
+    assert index.find(index.signature("A completely unrelated sentence about turbine maintenance schedules."), exclude=set()) is None
+
+    # the index is persistent
+    reopened = MinHashIndex(config=Config(data_folder=str(tmp_path / "data")))
+    assert reopened.find(near_duplicate, exclude=set()) == "disclaimer"
+    reopened.delete(["disclaimer"])
+    assert reopened.find(near_duplicate, exclude=set()) is None
+
+
+def test_duplicate_references(index):
+    index.replace_duplicates("/docs/a.pdf", [("a1", "Legal", "survivor")])
+    index.replace_duplicates("/docs/b.pdf", [("b1", "Notes", "survivor"), ("b2", "Legal", "other")])
+
+    assert index.duplicates_of(["survivor", "missing"]) == {"survivor": [
+        {"file_path": "/docs/a.pdf", "headers": "Legal"},
+        {"file_path": "/docs/b.pdf", "headers": "Notes"},
+    ]}
+    assert index.referenced(["survivor", "other", "missing"], except_file="/docs/b.pdf") == {"survivor"}
+
+    index.replace_duplicates("/docs/a.pdf", [])
+    assert index.referenced(["survivor"], except_file="/docs/b.pdf") == set()
+
+
+def test_bands_must_divide_num_perm(tmp_path):
+    with pytest.raises(ValueError):
+        MinHashIndex(config=Config(data_folder=str(tmp_path / "data"), dedup_num_perm=128, dedup_bands=12))
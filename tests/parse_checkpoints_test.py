@@ -0,0 +1,58 @@
+import pytest
+
+from mini_local_rag.config import Config
+from mini_local_rag.document_manifest import FileFingerprint
+from mini_local_rag.ingest.load_checkpoint import LoadCheckpointStep
+from mini_local_rag.ingest.save_checkpoint import SaveCheckpointStep
+from mini_local_rag.parse_checkpoints import ParseCheckpoints
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(data_folder=str(tmp_path / "data"))
+
+
+def fingerprint(sha256="abc"):
+    return FileFingerprint(path="/docs/report.pdf", size=10, mtime_ns=1, sha256=sha256)
+
+
+def test_key_changes_with_content_profile_and_captioning(config):
+    checkpoints = ParseCheckpoints(config=config)
+    key = checkpoints.key(sha256="abc", profile="full")
+
+    assert key == ParseCheckpoints(config=config).key(sha256="abc", profile="full")
+    assert key != checkpoints.key(sha256="abd", profile="full")
+    assert key != checkpoints.key(sha256="abc", profile="fast")
+    config.vision_model = "other-vision-model"
+    assert key != ParseCheckpoints(config=config).key(sha256="abc", profile="full")
+
+
+def test_saved_markdown_resumes_from_chunking(config):
+    checkpoints = ParseCheckpoints(config=config)
+    load = LoadCheckpointStep(checkpoints=checkpoints, config=config)
+    save = SaveCheckpointStep(checkpoints=checkpoints)
+
+    context = {"fingerprint": fingerprint()}
+    load.execute(context)
+    assert "markdown" not in context and "resume_from" not in context
+
+    context["markdown"] = "# Report"
+    save.execute(context)
+
+    # a new run of the same file, e.g. after the embedding failed
+    context = {"fingerprint": fingerprint()}
+    load.execute(context)
+    assert context["markdown"] == "# Report"
+    assert context["resume_from"] is SaveCheckpointStep
+    assert "checkpoint_key" not in context
+
+
+def test_markdown_with_timed_out_captions_is_not_saved(config):
+    checkpoints = ParseCheckpoints(config=config)
+    context = {"fingerprint": fingerprint()}
+    LoadCheckpointStep(checkpoints=checkpoints, config=config).execute(context)
+    context.update(markdown="# Report", captions_timed_out=1)
+
+    SaveCheckpointStep(checkpoints=checkpoints).execute(context)
+
+    assert checkpoints.load(context["checkpoint_key"]) is None
@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+from unittest.mock import MagicMock
+
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import TableFormerMode
+from docling_core.types.doc.base import BoundingBox, Size
+from docling_core.types.doc.document import DocItemLabel, DoclingDocument, ProvenanceItem
+import pytest
+
+from mini_local_rag.config import Config
+from mini_local_rag.ingest import pdf_parse
+from mini_local_rag.ingest.pdf_parse import PdfParseStep
+
+
+def page_range_document(page_range, profile="full"):
+    document = DoclingDocument(name="spec")
+    for page_no in range(page_range[0], page_range[1] + 1):
+        document.add_page(page_no=page_no, size=Size(width=100, height=100))
+        document.add_text(label=DocItemLabel.TEXT, text=f"page {page_no} {profile}",
+                          prov=ProvenanceItem(page_no=page_no, bbox=BoundingBox(l=0, t=0, r=1, b=1), charspan=(0, 6)))
+    return document
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    # threads stand in for the worker processes, which can't see monkeypatched functions
+    monkeypatch.setattr(pdf_parse, "ProcessPoolExecutor", lambda max_workers, mp_context, initializer, initargs: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(pdf_parse, "_count_pages", lambda file_path: 5)
+    # pages 3 and 4 are scanned
+    monkeypatch.setattr(pdf_parse, "_text_layers", lambda file_path: [True, True, False, False, True])
+
+    def convert_range(file_path, page_range, profile):
+        # the first range finishes last
+        time.sleep(0.05 if page_range[0] == 1 else 0)
+        return page_range_document(page_range, profile)
+    monkeypatch.setattr(pdf_parse, "_convert_range", convert_range)
+
+
+def converters(step):
+    created = {}
+
+    def create(profile):
+        created[profile] = MagicMock()
+        created[profile].convert.side_effect = lambda file_path, page_range: MagicMock(document=page_range_document(page_range, profile))
+        return created[profile]
+    step._converter = lambda profile: created.get(profile) or create(profile)
+    return created
+
+
+def test_large_pdf_is_converted_by_page_range_and_merged_in_order(parallel, monkeypatch):
+    pools = []
+    monkeypatch.setattr(pdf_parse, "ProcessPoolExecutor", lambda max_workers, mp_context, initializer, initargs: pools.append(ThreadPoolExecutor(max_workers)) or pools[-1])
+    step = PdfParseStep(config=Config(parse_page_window=2, parse_page_workers=3))
+    step._converter = MagicMock()
+    step.execute({"file_path": "/docs/other.pdf"})
+    context = {"file_path": "/docs/spec.pdf", "log_record": MagicMock()}
+
+    step.execute(context)
+    step.close()
+
+    document = context["pdf"]
+    step._converter.assert_not_called()
+    assert [text.text for text in document.texts] == [f"page {page_no} full" for page_no in range(1, 6)]
+    assert [text.prov[0].page_no for text in document.texts] == [1, 2, 3, 4, 5]
+    assert sorted(document.pages) == [1, 2, 3, 4, 5]
+    assert context["log_record"].page_ranges == ["1-2: full", "3-4: full", "5-5: full"]
+    assert len(pools) == 1, "Expected the worker processes to be reused for the next PDF"
+
+
+def test_short_pdf_or_single_worker_is_converted_at_once(parallel):
+    for config, page_workers in ((Config(parse_page_window=10, parse_page_workers=3), None), (Config(parse_page_window=2), 1)):
+        step = PdfParseStep(config=config, page_workers=page_workers)
+        step._converter = MagicMock()
+        context = {"file_path": "/docs/spec.pdf"}
+
+        step.execute(context)
+
+        step._converter.assert_called_once_with("full")
+        step._converter.return_value.convert.assert_called_once_with("/docs/spec.pdf")
+        assert context["pdf"] is step._converter.return_value.convert.return_value.document
+
+
+def test_auto_profile_only_runs_ocr_on_scanned_pages(parallel):
+    step = PdfParseStep(config=Config(parse_profile="auto"), page_workers=1)
+    created = converters(step)
+    context = {"file_path": "/docs/spec.pdf", "log_record": MagicMock()}
+
+    step.execute(context)
+
+    assert [text.text for text in context["pdf"].texts] == ["page 1 fast", "page 2 fast", "page 3 balanced", "page 4 balanced", "page 5 fast"]
+    assert [call.kwargs["page_range"] for call in created["fast"].convert.call_args_list] == [(1, 2), (5, 5)]
+    assert [call.kwargs["page_range"] for call in created["balanced"].convert.call_args_list] == [(3, 4)]
+    assert context["log_record"].page_ranges == ["1-2: fast", "3-4: balanced", "5-5: fast"]
+
+
+def test_profile_of_the_context_overrides_the_config(parallel):
+    step = PdfParseStep(config=Config(parse_profile="full", parse_page_window=4, parse_page_workers=2))
+    context = {"file_path": "/docs/spec.pdf", "parse_profile": "auto"}
+
+    step.execute(context)
+
+    # the auto ranges are split again by the page window
+    assert [text.text for text in context["pdf"].texts] == ["page 1 fast", "page 2 fast", "page 3 balanced", "page 4 balanced", "page 5 fast"]
+
+    with pytest.raises(ValueError):
+        step.execute({"file_path": "/docs/spec.pdf", "parse_profile": "slow"})
+
+
+@pytest.mark.parametrize("profile, ocr, table_mode, formulas", [
+    ("fast", False, TableFormerMode.FAST, False),
+    ("balanced", True, TableFormerMode.ACCURATE, False),
+    ("full", True, TableFormerMode.ACCURATE, True),
+])
+def test_profile_pipeline_options(profile, ocr, table_mode, formulas):
+    converter = pdf_parse._create_converter(Config(), num_threads=1, profile=profile)
+
+    options = converter.format_to_options[InputFormat.PDF].pipeline_options
+    assert options.do_ocr == ocr
+    assert options.table_structure_options.mode == table_mode
+    assert options.do_formula_enrichment == formulas
+    assert options.generate_picture_images and not options.generate_page_images
@@ -65,4 +65,31 @@ def test_pipeline_execute_with_exception(pipeline):
 
     # Ensure that the error is logged and the correct number of steps are executed before the exception
     executed_steps = pipeline.context["executed_steps"]
-    assert executed_steps == ["Step 1"]
\ No newline at end of file
+    assert executed_steps == ["Step 1"]
+
+def test_pipeline_execute_stops_early(pipeline):
+    """
+    Test that a step can stop the pipeline by setting a stop reason in the context.
+    """
+    pipeline.steps[1].execute = MagicMock(side_effect=lambda context: context.update(stop_reason="nothing to do"))
+
+    pipeline.execute()
+
+    assert pipeline.context["executed_steps"] == ["Step 1"]
+    assert pipeline.context["log_record"].stopped == {"step": "Step 2(MockStep)", "reason": "nothing to do"}
+
+class ResumeStep(MockStep):
+    pass
+
+def test_pipeline_execute_resumes_from_a_later_step(pipeline):
+    """
+    Test that a step can skip the steps whose output it restored by setting the step class to resume from.
+    """
+    pipeline.steps = [MockStep("Step 1"), MockStep("Step 2"), MockStep("Step 3"), ResumeStep("Step 4"), MockStep("Step 5")]
+    pipeline.steps[0].execute = MagicMock(side_effect=lambda context: context.update(resume_from=ResumeStep))
+
+    pipeline.execute()
+
+    assert pipeline.context["executed_steps"] == ["Step 4", "Step 5"]
+    assert "resume_from" not in pipeline.context
+    assert pipeline.context["log_record"].resumed == {"step": "Step 1(MockStep)", "skipped": ["Step 2(MockStep)", "Step 3(MockStep)"]}
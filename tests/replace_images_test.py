@@ -0,0 +1,174 @@
+import base64
+import io
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from docling_core.types.doc.document import PictureItem
+from PIL import Image
+import pytest
+
+from mini_local_rag.ingest.replace_images import ImageReplaceStep
+
+
+@pytest.fixture
+def mock_config(tmp_path):
+    config = MagicMock()
+    config.data_folder = str(tmp_path)
+    config.caption_cache_max_entries = 100
+    config.vision_model = "vision"
+    config.image_to_text_prompt = "describe"
+    config.caption_concurrency = 3
+    config.caption_timeout = 5
+    config.caption_min_image_edge = 32
+    config.caption_max_image_edge = 512
+    config.caption_jpeg_quality = 85
+    return config
+
+
+# every test image gets its own width, so the model mock can tell which image it received after re-encoding
+NAMES = ["image0", "image1", "image2", "image3", "logo", "chart", "table"]
+
+
+def png(width: int, height: int, mode: str = "RGB") -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, (width, height)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def make_document(count: int, images: list = None) -> MagicMock:
+    images = images or [f"image{i}" for i in range(count)]
+    pictures = []
+    for image in images:
+        data = image if isinstance(image, bytes) else png(100 + 10 * NAMES.index(image), 100)
+        picture = MagicMock()
+        picture.__class__ = PictureItem
+        picture.image.uri.path = "data:image/png;base64," + base64.b64encode(data).decode()
+        picture.prov = []
+        pictures.append(picture)
+    document = MagicMock()
+    document.iterate_items.return_value = [(picture, 0) for picture in pictures]
+    document.add_text.side_effect = lambda label, text, prov: text
+    return document
+
+
+def image_of(messages) -> str:
+    return NAMES[(Image.open(io.BytesIO(messages[0].images[0].value)).width - 100) // 10]
+
+
+def caption_response(content: str) -> MagicMock:
+    response = MagicMock()
+    response.message.content = content
+    return response
+
+
+def test_captions_are_generated_concurrently_and_applied_in_order(mock_config):
+    document = make_document(4)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def chat(model, messages):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        # later images finish first
+        image = image_of(messages)
+        time.sleep(0.05 * (4 - int(image[-1])))
+        with lock:
+            running[0] -= 1
+        return caption_response(f"caption of {image}")
+
+    record = MagicMock()
+    with patch("mini_local_rag.ingest.replace_images.ollama.chat", side_effect=chat):
+        ImageReplaceStep(config=mock_config).execute({"pdf": document, "log_record": record})
+
+    replaced = [call.kwargs["new_item"] for call in document.replace_item.call_args_list]
+    assert replaced == [f"caption of image{i}" for i in range(4)], "Expected captions applied in document order"
+    assert 1 < peak[0] <= 3, "Expected concurrent captioning bounded by caption_concurrency"
+    assert record.image_captions == {"skipped": 0, "cached": 0, "generated": 4, "timed_out": 0}
+
+
+def test_slow_images_are_skipped_after_the_document_timeout(mock_config):
+    mock_config.caption_timeout = 0.2
+    document = make_document(2)
+    release = threading.Event()
+
+    def chat(model, messages):
+        image = image_of(messages)
+        if image == "image0":
+            release.wait(timeout=5)
+        return caption_response(f"caption of {image}")
+
+    record = MagicMock()
+    try:
+        with patch("mini_local_rag.ingest.replace_images.ollama.chat", side_effect=chat):
+            start = time.monotonic()
+            ImageReplaceStep(config=mock_config).execute({"pdf": document, "log_record": record})
+            elapsed = time.monotonic() - start
+    finally:
+        release.set()
+
+    assert elapsed < 2, "Expected the step not to wait for the slow image"
+    assert [call.kwargs["new_item"] for call in document.replace_item.call_args_list] == ["caption of image1"]
+    assert record.image_captions == {"skipped": 0, "cached": 0, "generated": 1, "timed_out": 1}
+
+
+def test_repeated_images_are_captioned_once_and_cached(mock_config):
+    calls = []
+
+    def chat(model, messages):
+        calls.append(image_of(messages))
+        return caption_response(f"caption of {image_of(messages)}")
+
+    first, second = MagicMock(), MagicMock()
+    with patch("mini_local_rag.ingest.replace_images.ollama.chat", side_effect=chat):
+        ImageReplaceStep(config=mock_config).execute({"pdf": make_document(3, ["logo", "chart", "logo"]), "log_record": first})
+        document = make_document(2, ["logo", "table"])
+        ImageReplaceStep(config=mock_config).execute({"pdf": document, "log_record": second})
+
+    assert sorted(calls) == ["chart", "logo", "table"], "Expected every distinct image to be sent to the model once"
+    assert first.image_captions == {"skipped": 0, "cached": 0, "generated": 2, "timed_out": 0}
+    assert second.image_captions == {"skipped": 0, "cached": 1, "generated": 1, "timed_out": 0}
+    assert [call.kwargs["new_item"] for call in document.replace_item.call_args_list] == ["caption of logo", "caption of table"]
+
+    mock_config.vision_model = "other-vision"
+    with patch("mini_local_rag.ingest.replace_images.ollama.chat", side_effect=chat):
+        ImageReplaceStep(config=mock_config).execute({"pdf": make_document(1, ["logo"]), "log_record": MagicMock()})
+
+    assert calls.count("logo") == 2, "Expected the cache to be keyed by vision model"
+
+    mock_config.caption_jpeg_quality = 60
+    with patch("mini_local_rag.ingest.replace_images.ollama.chat", side_effect=chat):
+        ImageReplaceStep(config=mock_config).execute({"pdf": make_document(1, ["logo"]), "log_record": MagicMock()})
+
+    assert calls.count("logo") == 3, "Expected the cache to be keyed by JPEG quality"
+
+
+def test_images_are_downscaled_and_tiny_images_skipped(mock_config):
+    received = []
+
+    def chat(model, messages):
+        received.append(messages[0].images[0].value)
+        return caption_response("caption")
+
+    record = MagicMock()
+    document = make_document(2, [png(16, 400), png(2048, 1024, mode="RGBA")])
+    with patch("mini_local_rag.ingest.replace_images.ollama.chat", side_effect=chat):
+        ImageReplaceStep(config=mock_config).execute({"pdf": document, "log_record": record})
+
+    assert len(received) == 1, "Expected the decorative image not to be captioned"
+    with Image.open(io.BytesIO(received[0])) as sent:
+        assert sent.format == "JPEG" and sent.size == (512, 256)
+    assert record.image_captions == {"skipped": 1, "cached": 0, "generated": 1, "timed_out": 0}
+    assert document.replace_item.call_count == 1
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "LA", "PA"])
+def test_transparent_areas_are_flattened_on_white(mock_config, mode):
+    output = io.BytesIO()
+    # fully transparent black
+    Image.new(mode, (40, 40)).save(output, format="TIFF")
+
+    prepared = ImageReplaceStep(config=mock_config)._prepare(output.getvalue())
+
+    with Image.open(io.BytesIO(prepared)) as sent:
+        assert sent.mode == "RGB" and min(sent.getpixel((20, 20))) > 250
@@ -0,0 +1,120 @@
+import os
+
+from langchain_core.documents import Document
+import numpy as np
+import pytest
+
+from mini_local_rag.config import Config
+from mini_local_rag.sparse_index import SparseIndex
+
+
+def make_document(id: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"id": id, "headers": "Header", "file_path": f"{id}.pdf"})
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(sparse_index_path=str(tmp_path / "sparse_index"), sparse_index_features=2**12)
+
+
+def test_search_on_empty_index(config):
+    index = SparseIndex(config=config)
+
+    assert not index.exists()
+    assert index.search("anything") == []
+
+
+def test_incremental_adds_are_searchable(config):
+    index = SparseIndex(config=config)
+    index.add([make_document("placebo", "placebo controlled trial design"), make_document("tables", "statistical tables and listings")])
+    index.add([make_document("control", "choice of control group in clinical trials")])
+
+    reopened = SparseIndex(config=config)
+    results = reopened.search("control group", k=2)
+
+    assert reopened.exists()
+    assert [id for id, _ in results] == ["control"], "Expected chunks without query terms to be skipped"
+
+
+def test_document_frequencies_match_full_build(config, tmp_path):
+    documents = [make_document(str(i), text) for i, text in enumerate(["a b c", "b c d", "c d e", "e f"])]
+
+    incremental = SparseIndex(config=config)
+    for doc in documents:
+        incremental.add([doc])
+    full = SparseIndex(config=Config(sparse_index_path=str(tmp_path / "full"), sparse_index_features=2**12))
+    full.add(documents)
+
+    assert np.array_equal(np.load(f"{incremental.path}/df.npy"), np.load(f"{full.path}/df.npy"))
+    assert incremental.search("d e") == pytest.approx(full.search("d e"))
+
+
+def test_bm25_ranks_only_matching_chunks(config):
+    index = SparseIndex(config=config)
+    index.add([
+        make_document("focused", "dose adjustment"),
+        make_document("long", "dose adjustment " + "unrelated words " * 30),
+        make_document("other", "statistical tables"),
+    ])
+
+    results = index.search("dose adjustment", k=10)
+
+    assert [id for id, _ in results] == ["focused", "long"], "Expected the shorter chunk first and non-matching chunks skipped"
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_segments_are_merged_and_memory_mapped(config):
+    index = SparseIndex(config=config)
+    for i in range(5):
+        index.add([make_document(str(i), f"chunk number {i} about term{i}")])
+
+    segments = index._read_meta()["segments"]
+    assert [segment["rows"] for segment in segments] == [4, 1], "Expected trailing segments to be merged"
+    assert sorted(name for name in os.listdir(index.path) if name.startswith("segment-")) == sorted(segment["name"] for segment in segments)
+
+    segment = index._refresh().segments[0]
+    assert isinstance(segment.postings_docs, np.memmap) and isinstance(segment.postings_tf, np.memmap), "Expected memory-mapped postings, not copies"
+    assert index.search("term3", k=1)[0][0] == "3"
+
+
+def test_index_stays_resident_until_it_changes(config, monkeypatch):
+    writer = SparseIndex(config=config)
+    reader = SparseIndex(config=config)
+    writer.add([make_document("first", "first chunk about dosing"), make_document("other", "unrelated text")])
+
+    opened = []
+    original = SparseIndex._open_segment
+    monkeypatch.setattr(SparseIndex, "_open_segment", lambda self, name: opened.append(name) or original(self, name))
+
+    assert reader.search("dosing")[0][0] == "first"
+    reader.search("dosing")
+    assert opened == ["segment-000000"], "Expected the index to be loaded once"
+
+    writer.add([make_document("second", "second chunk about dosing schedules")])
+    opened.clear()
+
+    assert reader.search("dosing schedules")[0][0] == "second"
+    assert opened == ["segment-000001"], "Expected only the new segment to be loaded"
+
+
+def test_deleted_chunks_are_removed_from_results_and_statistics(config, tmp_path):
+    documents = [make_document(str(i), text) for i, text in enumerate(["dose a", "dose b", "dose c", "tables d"])]
+    index = SparseIndex(config=config)
+    index.add(documents[:2])
+    index.add(documents[2:])
+    assert index.search("dose", k=5)
+
+    index.delete(["1", "missing"])
+    assert index.contains(["0", "1", "3", "missing"]) == {"0", "3"}
+
+    remaining = SparseIndex(config=Config(sparse_index_path=str(tmp_path / "remaining"), sparse_index_features=2**12))
+    remaining.add([documents[0], documents[2], documents[3]])
+    assert sorted(id for id, _ in index.search("dose", k=5)) == ["0", "2"]
+    assert index.search("dose b", k=5) == pytest.approx(remaining.search("dose b", k=5))
+    assert np.array_equal(np.load(f"{index.path}/df.npy"), np.load(f"{remaining.path}/df.npy"))
+
+    # merging drops the tombstoned rows
+    index.add([make_document(str(i), f"dose {i}") for i in range(4, 8)])
+    assert [segment["rows"] for segment in index._read_meta()["segments"]] == [7]
+    assert not [name for name in os.listdir(index.path) if name.startswith("tombstones-")]
+    assert "1" not in {id for id, _ in index.search("dose", k=10)}
@@ -0,0 +1,93 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from mini_local_rag.config import Config
+from mini_local_rag.ingest import stream_chunks
+from mini_local_rag.ingest.chunk_markdown import MarkdownChunkingStep
+from mini_local_rag.ingest.deduplicate_chunks import DeduplicateChunksStep
+from mini_local_rag.ingest.stream_chunks import StreamChunksStep
+from mini_local_rag.minhash_index import MinHashIndex
+
+
+MARKDOWN = "\n\n".join(
+    f"# Chapter {chapter}\n\n## Section {section}\n\n" + " ".join(f"word{chapter}{section}{n}" for n in range(40))
+    for chapter in range(3) for section in range(3)
+)
+
+
+@pytest.fixture
+def config():
+    return Config(chunk_size=120, chunk_overlap=0, streaming_batch_size=4, embedding_batch_size=2)
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = MagicMock()
+    index.contains.return_value = set()
+    monkeypatch.setattr(stream_chunks, "open_sparse_index", lambda config: index)
+    return index
+
+
+def test_iter_chunks_yields_the_chunks_of_execute(config):
+    chunker = MarkdownChunkingStep(config=config)
+    context = {"markdown": MARKDOWN, "file_path": "/docs/report.pdf"}
+    chunker.execute(context)
+
+    streamed = list(chunker.iter_chunks(MARKDOWN, "/docs/report.pdf"))
+
+    assert len(streamed) > config.streaming_batch_size
+    assert [(doc.page_content, doc.metadata) for doc in streamed] == [(doc.page_content, doc.metadata) for doc in context["documents"]]
+
+
+def test_chunks_are_embedded_saved_and_indexed_in_batches(config, index):
+    chunker = MarkdownChunkingStep(config=config)
+    chunks = list(chunker.iter_chunks(MARKDOWN, "/docs/report.pdf"))
+    embedder = MagicMock()
+    embedder.embed_array.side_effect = lambda texts, batch_size: np.array([[float(len(text))] for text in texts], dtype=np.float32)
+    vector_store = MagicMock()
+    # the first chunks were saved before a crash, the second one before it was indexed, the stale chunk is no longer part of the file
+    vector_store.listIds.return_value = {chunks[0].metadata["id"], chunks[1].metadata["id"], "stale"}
+    index.contains.return_value = {chunks[0].metadata["id"]}
+    chunk_store = MagicMock()
+    step = StreamChunksStep(chunker=chunker, embedder=embedder, vector_store=vector_store, chunk_store=chunk_store, config=config)
+    context = {"markdown": MARKDOWN, "file_path": "/docs/report.pdf", "log_record": MagicMock()}
+
+    step.execute(context)
+
+    saved = [call.args[0] for call in vector_store.saveAll.call_args_list]
+    assert all(len(batch) <= config.streaming_batch_size for batch in saved)
+    assert [id for batch in saved for id in batch.ids] == [doc.metadata["id"] for doc in chunks[2:]]
+    assert all(batch.embeddings[:, 0].tolist() == [float(len(text)) for text in batch.texts] for batch in saved)
+    indexed = [[doc.metadata["id"] for doc in call.args[0]] for call in index.add.call_args_list]
+    assert [ids for ids in indexed if ids] == [[chunks[1].metadata["id"]], *[batch.ids for batch in saved]]
+    assert [call.args[0] for call in chunk_store.save.call_args_list] == saved
+    vector_store.delete.assert_called_once_with(["stale"])
+    chunk_store.delete.assert_called_once_with(["stale"])
+    index.delete.assert_called_once_with(["stale"])
+    assert context["documents"] == [] and context["deleted_ids"] == []
+    assert context["log_record"].chunks == {"new": len(chunks) - 2, "unchanged": 2, "deleted": 1, "batches": len(saved)}
+
+
+def test_duplicates_are_removed_across_batches(config, index, tmp_path):
+    disclaimer = " ".join(f"legal{n}" for n in range(12))
+    markdown = "\n\n".join(f"# Chapter {chapter}\n\n## Notice\n\n{disclaimer}\n\n## Body\n\n" + " ".join(f"word{chapter}{n}" for n in range(12)) for chapter in range(6))
+    config.data_folder = str(tmp_path / "data")
+    minhash_index = MinHashIndex(config=config)
+    chunker = MarkdownChunkingStep(config=config)
+    embedder = MagicMock()
+    embedder.embed_array.side_effect = lambda texts, batch_size: np.ones((len(texts), 1), dtype=np.float32)
+    vector_store = MagicMock()
+    vector_store.listIds.return_value = set()
+    step = StreamChunksStep(chunker=chunker, embedder=embedder, vector_store=vector_store, chunk_store=MagicMock(), config=config,
+                            deduplicator=DeduplicateChunksStep(index=minhash_index))
+    context = {"markdown": markdown, "file_path": "/docs/report.pdf", "log_record": MagicMock()}
+
+    step.execute(context)
+
+    saved = [call.args[0] for call in vector_store.saveAll.call_args_list]
+    assert sum(disclaimer in text for batch in saved for text in batch.texts) == 1, "Expected the disclaimer of later batches to be removed"
+    assert sum(len(batch) for batch in saved) == 7 and context["chunk_count"] == 12
+    duplicates = minhash_index.duplicates_of([id for batch in saved for id in batch.ids])
+    assert [len(found) for found in duplicates.values()] == [5]